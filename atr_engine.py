@@ -0,0 +1,258 @@
+"""
+Streaming Average True Range (Wilder smoothing) from OHLC bars.
+
+``WilderATR`` keeps only a handful of numbers of state (current ATR, last
+close, bar count, read offset), so bar files are consumed in bounded chunks
+and, once appended to, only the new bars are read. Supported sources:
+
+- CSV: read in byte blocks; the byte offset of the last complete line is kept
+  so a growing file is resumed exactly where it stopped.
+- Parquet: row batches from the first unread row group (requires pyarrow).
+- NPY: memory-mapped; a structured array with high/low/close fields, or a 2-D
+  array whose columns are (high, low, close) or (open, high, low, close).
+"""
+import io
+import json
+import math
+import os
+import threading
+from typing import BinaryIO, Dict, List, Optional, Union
+
+import numpy as np
+
+from parquet_tail import iter_unread
+
+DEFAULT_ATR_PERIOD = 14
+CSV_BLOCK_BYTES = 32 * 1024 * 1024
+ROW_BLOCK = 1_000_000
+OHLC_COLUMNS = ("high", "low", "close")
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+class OHLCFormatError(ValueError):
+    """The bar file cannot be read as OHLC data."""
+
+
+def detect_ohlc_format(name: str) -> str:
+    """'csv', 'parquet' or 'npy' from a file name's extension."""
+    extension = os.path.splitext(str(name))[1].lower().lstrip(".")
+    if extension in ("csv", "txt"):
+        return "csv"
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    if extension == "npy":
+        return "npy"
+    raise OHLCFormatError(f"Unsupported OHLC file: {name!r} (expected CSV, Parquet or NPY).")
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, prev_close: float) -> np.ndarray:
+    """Wilder's true range; the very first bar (no previous close) uses high - low."""
+    previous = np.empty_like(close)
+    previous[0] = prev_close
+    previous[1:] = close[:-1]
+    # fmax ignores the NaN gaps produced by a missing previous close
+    return np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📈 Incremental Wilder Engine
+# ────────────────────────────────────────────────────────────────────────────────
+class WilderATR:
+    """
+    ATR(period) updated chunk by chunk.
+
+    The first ``period`` true ranges seed the ATR with their mean; after that
+    ``ATR = (ATR_prev * (period - 1) + TR) / period``. A chunk of n bars is
+    applied in closed form, ``a**n * ATR_prev + sum(a**(n-1-j) * TR_j) / period``
+    with ``a = (period - 1) / period``, as one vectorized dot product.
+    """
+
+    def __init__(self, period: int = DEFAULT_ATR_PERIOD):
+        if period < 1:
+            raise ValueError("ATR period must be at least 1.")
+        self.period = int(period)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget every bar seen (e.g. when the source file was rewritten)."""
+        self.atr = math.nan
+        self.prev_close = math.nan
+        self.bars_seen = 0
+        self._seed_sum = 0.0
+        # Where the next incremental file read starts (bytes for CSV, rows otherwise)
+        self.offset = 0
+        self.columns: Optional[List[int]] = None  # CSV column positions of high/low/close
+
+    @property
+    def ready(self) -> bool:
+        return self.bars_seen >= self.period
+
+    def update(self, high, low, close) -> float:
+        """Consume a chunk of bars (oldest first) and return the current ATR."""
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+        if close.size == 0:
+            return self.atr
+
+        tr = true_range(high, low, close, self.prev_close)
+        self.prev_close = float(close[-1])
+
+        warmup = self.period - self.bars_seen
+        if warmup > 0:
+            head, tr = tr[:warmup], tr[warmup:]
+            self._seed_sum += float(head.sum())
+            self.bars_seen += head.size
+            if self.bars_seen < self.period:
+                return self.atr
+            self.atr = self._seed_sum / self.period
+
+        if tr.size:
+            decay = (self.period - 1) / self.period
+            weights = decay ** np.arange(tr.size - 1, -1, -1, dtype=np.float64)
+            self.atr = decay ** tr.size * self.atr + float(weights @ tr) / self.period
+            self.bars_seen += tr.size
+        return self.atr
+
+    # ─── Persistence ──────────────────────────────────────────────────────────────
+    def state_dict(self) -> Dict:
+        return {
+            "period": self.period,
+            "atr": self.atr,
+            "prev_close": self.prev_close,
+            "bars_seen": self.bars_seen,
+            "seed_sum": self._seed_sum,
+            "offset": self.offset,
+            "columns": self.columns,
+        }
+
+    @classmethod
+    def from_state_dict(cls, state: Dict) -> "WilderATR":
+        engine = cls(state["period"])
+        engine.atr = state["atr"]
+        engine.prev_close = state["prev_close"]
+        engine.bars_seen = state["bars_seen"]
+        engine._seed_sum = state["seed_sum"]
+        engine.offset = state["offset"]
+        engine.columns = state["columns"]
+        return engine
+
+    def save(self, path: Union[str, os.PathLike]):
+        # json writes NaN as a bare token, which json.load reads back
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.state_dict(), f)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "WilderATR":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_state_dict(json.load(f))
+
+    # ─── File Sources ─────────────────────────────────────────────────────────────
+    def update_from_file(
+        self,
+        source: Source,
+        file_format: Optional[str] = None,
+        complete_lines_only: bool = True,
+    ) -> float:
+        """
+        Read bars added to ``source`` since the last call and return the ATR.
+
+        With ``complete_lines_only`` (the default, for files that are still
+        being written) a trailing CSV line without a newline is left for the
+        next call; pass False for finished files such as uploads.
+        """
+        if file_format is None:
+            file_format = detect_ohlc_format(getattr(source, "name", source))
+        if file_format == "csv":
+            self._update_from_csv(source, complete_lines_only)
+        elif file_format == "parquet":
+            self._update_from_parquet(source)
+        elif file_format == "npy":
+            self._update_from_npy(source)
+        else:
+            raise OHLCFormatError(f"Unsupported OHLC format: {file_format!r}.")
+        return self.atr
+
+    def _update_from_csv(self, source: Source, complete_lines_only: bool):
+        import pandas as pd
+
+        if isinstance(source, (str, os.PathLike)) and os.path.getsize(source) < self.offset:
+            self.reset()  # Truncated or replaced rather than appended to
+        handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+        try:
+            if self.columns is None:
+                handle.seek(0)
+                header = handle.readline()
+                names = [n.strip().strip('"').lower() for n in header.decode("utf-8-sig").split(",")]
+                self.columns = [_find_column(names, column) for column in OHLC_COLUMNS]
+                self.offset = len(header)
+
+            handle.seek(self.offset)
+            tail = b""
+            while True:
+                block = handle.read(CSV_BLOCK_BYTES)
+                at_eof = len(block) < CSV_BLOCK_BYTES
+                data = tail + block
+                cut = len(data) if at_eof and not complete_lines_only else data.rfind(b"\n") + 1
+                if cut > 0 and data[:cut].strip():
+                    bars = pd.read_csv(
+                        io.BytesIO(data[:cut]), header=None, usecols=self.columns,
+                        dtype=np.float64, engine="c",
+                    )
+                    ordered = bars[self.columns].to_numpy()
+                    self.update(ordered[:, 0], ordered[:, 1], ordered[:, 2])
+                self.offset += cut
+                tail = data[cut:]
+                if at_eof:
+                    break
+        finally:
+            if handle is not source:
+                handle.close()
+
+    def _update_from_parquet(self, source: Source):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise OHLCFormatError("Reading Parquet files requires pyarrow.") from e
+        parquet = pq.ParquetFile(source)
+        names = {n.lower(): n for n in parquet.schema_arrow.names}
+        columns = [names.get(c) or _missing_column(c) for c in OHLC_COLUMNS]
+        if parquet.metadata.num_rows < self.offset:
+            self.reset()  # Rewritten with fewer rows rather than appended to
+        for batch, start, rows_read in iter_unread(parquet, self.offset, ROW_BLOCK, columns):
+            high, low, close = (
+                batch.column(i).to_numpy(zero_copy_only=False)[start:] for i in range(3)
+            )
+            self.update(high, low, close)
+            self.offset = rows_read
+
+    def _update_from_npy(self, source: Source):
+        bars = np.load(source, mmap_mode="r" if isinstance(source, (str, os.PathLike)) else None)
+        if bars.dtype.names:
+            names = {n.lower(): n for n in bars.dtype.names}
+            high, low, close = (bars[names.get(c) or _missing_column(c)] for c in OHLC_COLUMNS)
+        elif bars.ndim == 2 and bars.shape[1] in (3, 4):
+            high, low, close = (bars[:, i] for i in range(bars.shape[1] - 3, bars.shape[1]))
+        else:
+            raise OHLCFormatError("NPY bars must have high/low/close fields or 3-4 columns.")
+        for start in range(self.offset, len(close), ROW_BLOCK):
+            stop = start + ROW_BLOCK
+            self.update(high[start:stop], low[start:stop], close[start:stop])
+            self.offset = min(stop, len(close))
+
+
+def _find_column(names: List[str], column: str) -> int:
+    if column in names:
+        return names.index(column)
+    _missing_column(column)
+
+
+def _missing_column(column: str):
+    raise OHLCFormatError(f"OHLC data has no {column!r} column.")
+
+
+def compute_atr(source: Source, period: int = DEFAULT_ATR_PERIOD, file_format: Optional[str] = None) -> float:
+    """One-shot ATR of a finished bar file."""
+    return WilderATR(period).update_from_file(source, file_format, complete_lines_only=False)
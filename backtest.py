@@ -0,0 +1,371 @@
+"""
+Multi-symbol backtest of the calculator's sizing rules.
+
+Each symbol is a DataFrame of OHLC bars (``open``, ``high``, ``low``,
+``close``) with a ``signal`` column: ``1`` goes long and ``-1`` short at the
+next bar's open, ``0`` does nothing. A symbol holds at most one position;
+signals while it is open are ignored.
+
+Per trade, the rules are the app's:
+
+- the stop is ``suggest_stop_loss`` (ATR × multiplier from a Wilder ATR of
+  the bars up to the signal, or the fixed-risk stop);
+- the target sits ``reward_to_risk`` stop distances from entry;
+- the size is ``calculate_trade_metrics`` on the equity at entry, so
+  ``risk_percent`` of current equity is risked and the stop is worsened by
+  ``slippage_pct``; a stop that gaps fills at the bar's open, plus slippage;
+- a trade whose capital required exceeds the equity not already tied up
+  as margin (the "capital exceeded" notice) is skipped.
+
+Stop and target hits are found for every candidate entry at once on a
+(entries × ``max_holding_bars``) window of highs and lows; a bar touching
+both counts as a stop. Symbols are simulated in parallel on the shared
+process pool, and their trades are merged in time order into one portfolio
+equity curve.
+
+    python backtest.py --symbols 8 --bars 50000
+"""
+import argparse
+import heapq
+import math
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from risk_batch import suggest_stop_loss_batch
+from risk_core import (
+    DEFAULT_RISK_PERCENT,
+    DEFAULT_SLIPPAGE,
+    TradeValidationError,
+    calculate_trade_metrics,
+)
+
+BAR_COLUMNS = ("open", "high", "low", "close", "signal")
+WINDOW_CELLS = 4_000_000  # Entries × bars evaluated per block (bounds memory)
+EXIT_STOP, EXIT_TARGET, EXIT_TIME = "stop", "target", "time"
+_EXIT_REASONS = np.array([EXIT_STOP, EXIT_TARGET, EXIT_TIME], dtype=object)
+
+
+class BacktestFormatError(ValueError):
+    """A symbol's bars are missing columns or are not usable."""
+
+
+class BacktestConfig(NamedTuple):
+    initial_capital: float = 10_000.0
+    risk_percent: float = DEFAULT_RISK_PERCENT  # Percent of current equity, as in the form
+    leverage: float = 1.0
+    slippage_pct: float = DEFAULT_SLIPPAGE  # Percent, as in the form
+    use_atr: bool = True
+    atr_period: int = 14
+    atr_multiplier: float = 1.5
+    reward_to_risk: float = 2.0  # Target distance in stop distances
+    max_holding_bars: int = 500  # Positions still open after this many bars close at the close
+
+
+class BacktestResult(NamedTuple):
+    trades: pd.DataFrame  # One row per trade taken, in entry order
+    equity: pd.Series  # Equity after each exit, indexed by exit time (first point: initial capital)
+    summary: Dict[str, float]
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📈 Per-Symbol Simulation (runs in a worker process)
+# ────────────────────────────────────────────────────────────────────────────────
+def wilder_atr_series(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """ATR after every bar, NaN until ``period`` true ranges are seen (as ``atr_engine.WilderATR``)."""
+    previous = np.empty_like(close)
+    previous[0] = np.nan
+    previous[1:] = close[:-1]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    atr = np.full(len(close), np.nan)
+    if len(close) < period:
+        return atr
+    # Seeded with the mean of the first ``period`` ranges, then Wilder's
+    # smoothing, which is an EWM with alpha = 1 / period
+    seeded = true_range[period - 1:].copy()
+    seeded[0] = true_range[:period].mean()
+    atr[period - 1:] = pd.Series(seeded).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    return atr
+
+
+def _first_hits(hits: np.ndarray) -> np.ndarray:
+    """Column of the first True per row; the row width when there is none."""
+    return np.where(hits.any(axis=1), hits.argmax(axis=1), hits.shape[1])
+
+
+def simulate_symbol(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    signal: np.ndarray,
+    config: BacktestConfig,
+) -> Dict[str, np.ndarray]:
+    """
+    Capital-independent trades of one symbol: bar indices of entry and exit,
+    direction sign, entry/stop/target/exit prices and the exit reason.
+    """
+    n = len(close)
+    slippage = config.slippage_pct / 100
+    signal_bars = np.flatnonzero((signal[:-1] != 0) & ~np.isnan(signal[:-1])) if n > 1 else np.empty(0, int)
+    sign = np.sign(signal[signal_bars]).astype(np.float64)
+    entry_bar = signal_bars + 1
+    entry_price = open_[entry_bar]
+    direction = np.where(sign > 0, "Long", "Short").astype(object)
+
+    atr = wilder_atr_series(high, low, close, config.atr_period)[signal_bars]
+    # The fixed-risk stop doesn't depend on capital, so any capital will do
+    stop = suggest_stop_loss_batch(
+        entry_price, direction, 1.0, config.risk_percent, config.leverage,
+        config.use_atr, np.nan_to_num(atr), config.atr_multiplier,
+    )
+    # No ATR yet (too few bars) means no ATR stop, so no trade
+    has_stop = (atr > 0) if config.use_atr else np.ones(len(atr), dtype=bool)
+    usable = has_stop & ((entry_price - stop) * sign > 0)
+    target = entry_price + sign * config.reward_to_risk * np.abs(entry_price - stop)
+
+    # Window of the bars each candidate could be open for (NaN past the end)
+    horizon = max(int(config.max_holding_bars), 1)
+    padded = {name: np.concatenate([values, np.full(horizon, np.nan)])
+              for name, values in (("high", high), ("low", low))}
+    exit_offset = np.empty(len(entry_bar), dtype=np.int64)
+    reason = np.empty(len(entry_bar), dtype=np.int64)
+    block = max(WINDOW_CELLS // horizon, 1)
+    offsets = np.arange(horizon)
+    for start in range(0, len(entry_bar), block):
+        rows = slice(start, start + block)
+        window = entry_bar[rows, None] + offsets
+        s, st, tg = sign[rows, None], stop[rows, None], target[rows, None]
+        with np.errstate(invalid="ignore"):
+            adverse = np.where(s > 0, padded["low"][window] <= st, padded["high"][window] >= st)
+            favourable = np.where(s > 0, padded["high"][window] >= tg, padded["low"][window] <= tg)
+        first_stop, first_target = _first_hits(adverse), _first_hits(favourable)
+        # A bar touching both is a stop; neither within the window is a time exit
+        reason[rows] = np.where(first_stop <= first_target, 0, 1)
+        exit_offset[rows] = np.minimum(first_stop, first_target)
+        timed_out = exit_offset[rows] >= horizon
+        reason[rows][timed_out] = 2
+        exit_offset[rows][timed_out] = np.minimum(horizon, n - entry_bar[rows][timed_out]) - 1
+    exit_bar = entry_bar + exit_offset
+
+    exit_open = open_[exit_bar]
+    stop_fill = np.where(sign > 0, np.minimum(exit_open, stop), np.maximum(exit_open, stop)) * (1 - sign * slippage)
+    target_fill = np.where(sign > 0, np.maximum(exit_open, target), np.minimum(exit_open, target))
+    exit_price = np.choose(reason, [stop_fill, target_fill, close[exit_bar]])
+
+    # One position at a time: the next trade is the first signal at or after the exit bar
+    taken: List[int] = []
+    i = 0
+    while i < len(signal_bars):
+        if usable[i]:
+            taken.append(i)
+            i = int(np.searchsorted(signal_bars, exit_bar[i], side="left"))
+        else:
+            i += 1
+    taken = np.asarray(taken, dtype=np.int64)
+    return {
+        "entry_bar": entry_bar[taken],
+        "exit_bar": exit_bar[taken],
+        "sign": sign[taken],
+        "entry_price": entry_price[taken],
+        "stop_loss_price": stop[taken],
+        "target_price": target[taken],
+        "exit_price": exit_price[taken],
+        "exit_reason": reason[taken],
+    }
+
+
+def _simulate_frame(bars: pd.DataFrame, config: BacktestConfig) -> Dict[str, np.ndarray]:
+    columns = {c.lower(): c for c in bars.columns}
+    missing = [c for c in BAR_COLUMNS if c not in columns]
+    if missing:
+        raise BacktestFormatError(f"Bars are missing columns: {', '.join(missing)}.")
+    values = [bars[columns[c]].to_numpy(dtype=np.float64) for c in BAR_COLUMNS]
+    return simulate_symbol(*values, config)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 💼 Portfolio Merge
+# ────────────────────────────────────────────────────────────────────────────────
+def _merge_trades(candidates: pd.DataFrame, config: BacktestConfig) -> Tuple[pd.DataFrame, int]:
+    """
+    Size every trade on the equity at its entry, in time order. Entries fill
+    at a bar's open, so an exit during a bar with the same time comes after.
+    """
+    slippage = config.slippage_pct / 100
+    equity = config.initial_capital
+    margin_in_use = 0.0
+    open_positions: list = []  # Heap of (exit time, row, pnl, capital required)
+    sizes = np.full(len(candidates), np.nan)
+    pnls = np.full(len(candidates), np.nan)
+    equity_after = np.full(len(candidates), np.nan)
+    skipped = 0
+
+    def close_before(time=None):
+        nonlocal equity, margin_in_use
+        while open_positions and (time is None or open_positions[0][0] < time):
+            _, row, pnl, capital_required = heapq.heappop(open_positions)
+            equity += pnl
+            margin_in_use -= capital_required
+            equity_after[row] = equity
+
+    columns = [candidates[c].to_numpy() for c in (
+        "entry_time", "exit_time", "direction", "entry_price", "stop_loss_price",
+        "target_price", "exit_price", "sign",
+    )]
+    for row, (entry_time, exit_time, direction, entry, stop, target, exit_price, sign) in enumerate(zip(*columns)):
+        close_before(entry_time)
+        if equity <= 0:
+            skipped += 1
+            continue
+        try:
+            metrics = calculate_trade_metrics(
+                equity, config.risk_percent, entry, direction, target,
+                config.leverage, stop, slippage,
+            )
+        except TradeValidationError:
+            skipped += 1
+            continue
+        if metrics.position_size <= 0 or metrics.capital_required > equity - margin_in_use:
+            skipped += 1
+            continue
+        pnl = metrics.position_size * (exit_price - entry) * sign
+        sizes[row], pnls[row] = metrics.position_size, pnl
+        margin_in_use += metrics.capital_required
+        heapq.heappush(open_positions, (exit_time, row, pnl, metrics.capital_required))
+    close_before()  # Everything still open
+
+    trades = candidates.assign(position_size=sizes, pnl=pnls, equity_after=equity_after)
+    return trades[trades["position_size"].notna()].reset_index(drop=True), skipped
+
+
+def _summarize(trades: pd.DataFrame, equity: pd.Series, skipped: int, config: BacktestConfig) -> Dict[str, float]:
+    risk = (trades["entry_price"] - trades["stop_loss_price"]).abs() * trades["position_size"]
+    r_multiple = trades["pnl"] / risk
+    peaks = equity.cummax()
+    gains, losses = trades["pnl"].clip(lower=0).sum(), -trades["pnl"].clip(upper=0).sum()
+    return {
+        "trades": float(len(trades)),
+        "skipped": float(skipped),
+        "win_rate": float((trades["pnl"] > 0).mean()) if len(trades) else math.nan,
+        "average_r": float(r_multiple.mean()) if len(trades) else math.nan,
+        "profit_factor": float(gains / losses) if losses > 0 else math.inf,
+        "final_equity": float(equity.iloc[-1]),
+        "total_return": float(equity.iloc[-1] / config.initial_capital - 1),
+        "max_drawdown": float((1 - equity / peaks).max()),
+    }
+
+
+def run_backtest(
+    bars: Dict[str, pd.DataFrame],
+    config: BacktestConfig = BacktestConfig(),
+    workers: Optional[int] = None,
+) -> BacktestResult:
+    """
+    Backtest every symbol in ``bars`` and merge them into one portfolio.
+
+    Bar indexes are the bar times and must be comparable across symbols
+    (all datetimes or all integers). ``workers`` defaults to the CPU count;
+    with one worker (or one symbol) everything runs in-process.
+    """
+    if not bars:
+        raise BacktestFormatError("No symbols to backtest.")
+    symbols = list(bars)
+    workers = min(workers or os.cpu_count() or 1, len(symbols))
+    frames = [bars[s] for s in symbols]
+    if workers <= 1:
+        results = [_simulate_frame(frame, config) for frame in frames]
+    else:
+        from monte_carlo import _get_pool
+
+        results = list(_get_pool(workers).map(_simulate_frame, frames, [config] * len(frames)))
+
+    parts = []
+    for symbol, frame, result in zip(symbols, frames, results):
+        index = frame.index
+        parts.append(pd.DataFrame({
+            "symbol": symbol,
+            "entry_time": index[result["entry_bar"]],
+            "exit_time": index[result["exit_bar"]],
+            "direction": np.where(result["sign"] > 0, "Long", "Short"),
+            "sign": result["sign"],
+            "entry_price": result["entry_price"],
+            "stop_loss_price": result["stop_loss_price"],
+            "target_price": result["target_price"],
+            "exit_price": result["exit_price"],
+            "exit_reason": _EXIT_REASONS[result["exit_reason"]],
+        }))
+    candidates = pd.concat(parts, ignore_index=True).sort_values(
+        ["entry_time", "symbol"], kind="stable"
+    ).reset_index(drop=True)
+
+    trades, skipped = _merge_trades(candidates, config)
+    by_exit = trades.sort_values("exit_time", kind="stable")  # Ties close in entry order
+    start = min(frame.index[0] for frame in frames if len(frame))
+    equity = pd.concat([
+        pd.Series([config.initial_capital], index=[start]),
+        pd.Series(by_exit["equity_after"].to_numpy(), index=by_exit["exit_time"].to_numpy()),
+    ])
+    equity = equity[~equity.index.duplicated(keep="last")]
+    return BacktestResult(trades.drop(columns="sign"), equity, _summarize(trades, equity, skipped, config))
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧪 Synthetic Data (offline testing)
+# ────────────────────────────────────────────────────────────────────────────────
+def synthetic_bars(
+    n_symbols: int = 4,
+    n_bars: int = 10_000,
+    seed: int = 42,
+    signal_rate: float = 0.02,
+    volatility: float = 0.01,
+    freq: str = "1h",
+) -> Dict[str, pd.DataFrame]:
+    """
+    Random-walk OHLC bars (geometric Brownian motion) with random long/short
+    signals on ``signal_rate`` of the bars, on a shared hourly clock.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=n_bars, freq=freq)
+    bars = {}
+    for i in range(n_symbols):
+        log_returns = rng.normal(0, volatility, n_bars)
+        close = 100.0 * np.exp(np.cumsum(log_returns))
+        open_ = np.concatenate([[100.0], close[:-1]])
+        wick = np.abs(rng.normal(0, volatility / 2, (2, n_bars)))
+        high = np.maximum(open_, close) * (1 + wick[0])
+        low = np.minimum(open_, close) * (1 - wick[1])
+        signal = np.where(rng.random(n_bars) < signal_rate, rng.choice([-1, 1], n_bars), 0)
+        bars[f"SYN{i + 1}"] = pd.DataFrame(
+            {"open": open_, "high": high, "low": low, "close": close, "signal": signal}, index=index
+        )
+    return bars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=4, help="synthetic symbols")
+    parser.add_argument("--bars", type=int, default=10_000, help="bars per symbol")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--risk-percent", type=float, default=DEFAULT_RISK_PERCENT)
+    parser.add_argument("--leverage", type=float, default=5.0)
+    parser.add_argument("--reward-to-risk", type=float, default=2.0)
+    parser.add_argument("--no-atr", action="store_true", help="use the fixed-risk stop")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    config = BacktestConfig(
+        risk_percent=args.risk_percent,
+        leverage=args.leverage,
+        reward_to_risk=args.reward_to_risk,
+        use_atr=not args.no_atr,
+    )
+    result = run_backtest(synthetic_bars(args.symbols, args.bars, args.seed), config, args.workers)
+    for name, value in result.summary.items():
+        print(f"{name:>14}: {value:,.4f}")
+
+
+if __name__ == "__main__":
+    main()
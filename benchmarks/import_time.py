@@ -0,0 +1,55 @@
+"""
+Cold-start import time of the sizing core versus the full Streamlit app.
+
+Each module is imported in a fresh interpreter several times and the median
+wall time of the ``import`` statement is reported, e.g.:
+
+    python benchmarks/import_time.py --repeat 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODULES = ["risk_core", "risk_batch", "risk_calculator_app"]
+
+_SNIPPET = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure(module: str, repeat: int) -> float:
+    """Median import time of ``module`` in milliseconds over ``repeat`` cold starts."""
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _SNIPPET.format(module=module)],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7, help="cold starts per module")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        try:
+            ms = measure(module, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<24} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{module:<24} {ms:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
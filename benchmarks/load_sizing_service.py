@@ -0,0 +1,158 @@
+"""
+Load generator for the local sizing service (``sizing_service.py``).
+
+Opens ``--concurrency`` keep-alive connections, each sending POST /v1/size
+requests back to back for ``--duration`` seconds, then reports latency
+percentiles and throughput. With ``--spawn`` the service is started in a
+subprocess on a free port first, e.g.:
+
+    python benchmarks/load_sizing_service.py --spawn --concurrency 128 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def random_trade(rng: random.Random) -> Dict:
+    entry = rng.uniform(1, 1_000)
+    direction = rng.choice(["Long", "Short"])
+    move = entry * rng.uniform(0.01, 0.1)
+    trade = {
+        "liquid_capital": rng.choice([1_000, 10_000, 100_000]),
+        "entry_price": round(entry, 3),
+        "direction": direction,
+        "target_price": round(entry + move if direction == "Long" else entry - move, 3),
+        "risk_percent": rng.choice([0.5, 1.0, 2.0]),
+        "leverage": rng.choice([1, 2, 5, 10]),
+    }
+    if rng.random() < 0.5:
+        trade.update(use_atr=True, atr_value=round(entry * 0.02, 3), atr_multiplier=1.5)
+    return trade
+
+
+def _request(host: str, port: int, body: bytes) -> bytes:
+    return (
+        f"POST /v1/size HTTP/1.1\r\nHost: {host}:{port}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+
+
+async def _client(
+    host: str, port: int, deadline: float, trades_per_request: int, seed: int,
+    latencies: List[float], statuses: Dict[str, int],
+):
+    """Send requests back to back, reconnecting whenever the server closes the connection."""
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            statuses["connect failed"] = statuses.get("connect failed", 0) + 1
+            await asyncio.sleep(0.05)
+            continue
+        try:
+            keep_alive = True
+            while keep_alive and time.perf_counter() < deadline:
+                trades = [random_trade(rng) for _ in range(trades_per_request)]
+                payload = trades[0] if trades_per_request == 1 else trades
+                message = _request(host, port, json.dumps(payload).encode())
+                start = time.perf_counter()
+                writer.write(message)
+                await writer.drain()
+                status = (await reader.readline()).split()[1].decode()
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                    elif name.lower() == "connection":
+                        keep_alive = value.strip().lower() != "close"
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == "503":
+                    await asyncio.sleep(0.05)
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError):
+            statuses["dropped"] = statuses.get("dropped", 0) + 1
+        finally:
+            writer.close()
+
+
+async def run_load(host: str, port: int, concurrency: int, duration: float, trades_per_request: int):
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        _client(host, port, deadline, trades_per_request, seed, latencies, statuses)
+        for seed in range(concurrency)
+    ))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(host: str, port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Sizing service did not come up on {host}:{port}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=64, help="simultaneous connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--trades-per-request", type=int, default=1)
+    parser.add_argument("--spawn", action="store_true", help="start the service on a free port first")
+    args = parser.parse_args()
+
+    service = None
+    if args.spawn:
+        args.port = _free_port()
+        service = subprocess.Popen(
+            [sys.executable, "sizing_service.py", "--host", args.host, "--port", str(args.port)],
+            cwd=REPO_ROOT,
+            stderr=subprocess.DEVNULL,
+        )
+    try:
+        _wait_for_port(args.host, args.port)
+        latencies, statuses, elapsed = asyncio.run(
+            run_load(args.host, args.port, args.concurrency, args.duration, args.trades_per_request)
+        )
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+
+    ok = statuses.get("200", 0)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"requests      {len(latencies):>10,}  ({', '.join(f'{k}: {v:,}' for k, v in sorted(statuses.items()))})")
+    print(f"requests/s    {len(latencies) / elapsed:>10,.0f}")
+    print(f"trades/s      {ok * args.trades_per_request / elapsed:>10,.0f}")
+    print(f"p50 latency   {quantiles[49] * 1000:>10.2f} ms")
+    print(f"p99 latency   {quantiles[98] * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Benchmark suite for the sizing math and full-page rerun latency.
+
+Two groups of benchmarks:
+
+- ``math``: throughput of ``calculate_trade_metrics`` and the stop
+  suggestion, scalar (calls/s) and batched through ``risk_batch`` (rows/s).
+- ``app``: end-to-end latency of ``main()`` driven headlessly by Streamlit's
+  AppTest harness (first run, plain rerun, rerun after a stop change).
+
+Results are written as JSON; ``--compare`` checks them against an earlier
+file and exits with status 1 if any benchmark regressed by more than
+``--threshold`` percent, e.g.:
+
+    python benchmarks/perf_suite.py --output baseline.json
+    python benchmarks/perf_suite.py --compare baseline.json --threshold 10
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = REPO_ROOT / "risk_calculator_app.py"
+sys.path.insert(0, str(REPO_ROOT))
+
+BATCH_ROWS = 1_000_000
+SCALAR_CALLS = 100_000
+DEFAULT_THRESHOLD = 10.0  # Percent
+
+
+class Result(NamedTuple):
+    value: float  # Median over the repeats
+    unit: str
+    higher_is_better: bool
+    samples: List[float]
+
+
+def _timings(func: Callable[[], object], repeat: int) -> List[float]:
+    """Wall time of ``func`` for each of ``repeat`` runs, after one warm-up."""
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _throughput(func: Callable[[], object], items: int, unit: str, repeat: int) -> Result:
+    samples = [items / t for t in _timings(func, repeat)]
+    return Result(statistics.median(samples), unit, True, samples)
+
+
+def _latency_ms(samples: List[float]) -> Result:
+    samples = [t * 1000 for t in samples]
+    return Result(statistics.median(samples), "ms", False, samples)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧮 Sizing Math
+# ────────────────────────────────────────────────────────────────────────────────
+def bench_math(repeat: int, batch_rows: int = BATCH_ROWS, scalar_calls: int = SCALAR_CALLS) -> Dict[str, Result]:
+    import numpy as np
+
+    from risk_batch import calculate_trade_metrics_batch, suggest_stop_loss_batch
+    from risk_core import calculate_trade_metrics, suggest_stop_loss
+
+    rng = np.random.default_rng(0)
+    entry = rng.uniform(1, 1_000, scalar_calls)
+    directions = np.where(rng.random(scalar_calls) < 0.5, "Long", "Short")
+    distance = entry * rng.uniform(0.005, 0.1, scalar_calls)
+    stop = np.where(directions == "Long", entry - distance, entry + distance)
+    target = np.where(directions == "Long", entry + 2 * distance, entry - 2 * distance)
+    rows = list(zip(entry.tolist(), directions.tolist(), stop.tolist(), target.tolist()))
+
+    def scalar_metrics():
+        for e, d, s, t in rows:
+            calculate_trade_metrics(10_000.0, 1.0, e, d, t, 2.0, s, 0.001)
+
+    def scalar_fixed_stop():
+        for e, d, _, _ in rows:
+            suggest_stop_loss(e, d, 10_000.0, 1.0, 2.0)
+
+    def scalar_atr_stop():
+        for e, d, _, _ in rows:
+            suggest_stop_loss(e, d, 10_000.0, 1.0, 2.0, True, e * 0.02, 1.5)
+
+    reps = max(batch_rows // scalar_calls, 1)
+    batch_entry = np.tile(entry, reps)
+    batch_directions = np.tile(directions.astype(object), reps)
+    batch_stop = np.tile(stop, reps)
+    batch_target = np.tile(target, reps)
+    n = len(batch_entry)
+
+    def batch_metrics():
+        calculate_trade_metrics_batch(
+            10_000.0, 1.0, batch_entry, batch_directions, batch_target, 2.0, batch_stop, 0.001
+        )
+
+    def batch_stops():
+        suggest_stop_loss_batch(
+            batch_entry, batch_directions, 10_000.0, 1.0, 2.0,
+            batch_entry > 500, batch_entry * 0.02, 1.5,
+        )
+
+    return {
+        "scalar.calculate_trade_metrics": _throughput(scalar_metrics, len(rows), "calls/s", repeat),
+        "scalar.suggest_stop_loss.fixed_risk": _throughput(scalar_fixed_stop, len(rows), "calls/s", repeat),
+        "scalar.suggest_stop_loss.atr": _throughput(scalar_atr_stop, len(rows), "calls/s", repeat),
+        "batch.calculate_trade_metrics": _throughput(batch_metrics, n, "rows/s", repeat),
+        "batch.suggest_stop_loss": _throughput(batch_stops, n, "rows/s", repeat),
+    }
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🖥️ Full-Page Reruns (AppTest)
+# ────────────────────────────────────────────────────────────────────────────────
+def bench_app(repeat: int) -> Dict[str, Result]:
+    """
+    Every sized trade is saved to the history, so the runs get a throwaway
+    data directory instead of writing benchmark rows into ./data.
+    """
+    with tempfile.TemporaryDirectory(prefix="perf_suite_") as data_dir, mock.patch.dict(os.environ, {
+        "RISK_CALC_DATA_DIR": data_dir,
+        "RISK_CALC_HISTORY_DB": str(Path(data_dir) / "trade_history.sqlite3"),
+    }):
+        return _bench_app(repeat)
+
+
+def _bench_app(repeat: int) -> Dict[str, Result]:
+    from streamlit.testing.v1 import AppTest
+
+    def first_run():
+        AppTest.from_file(str(APP_PATH), default_timeout=60).run()
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=60).run()
+    if at.exception:
+        raise RuntimeError(f"App raised on first run: {at.exception[0].message}")
+
+    def rerun():
+        at.run()
+
+    stops = itertools.cycle([95.0 + i * 0.1 for i in range(40)])
+
+    def stop_change():
+        # AppTest always reruns the whole script, so this measures the full
+        # page including the trade fragment
+        at.number_input(key="stop_loss_price").set_value(next(stops)).run()
+
+    return {
+        "app.first_run": _latency_ms(_timings(first_run, max(repeat // 4, 3))),
+        "app.rerun": _latency_ms(_timings(rerun, repeat)),
+        "app.rerun_stop_change": _latency_ms(_timings(stop_change, repeat)),
+    }
+
+
+GROUPS = {"math": bench_math, "app": bench_app}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📊 Results and Comparison
+# ────────────────────────────────────────────────────────────────────────────────
+def environment() -> Dict[str, Optional[str]]:
+    import numpy
+    import pandas
+    import streamlit
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "streamlit": streamlit.__version__,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print a comparison table; return the names that regressed beyond ``threshold`` %."""
+    regressions = []
+    print(f"\n{'benchmark':<38} {'baseline':>14} {'current':>14} {'change':>9}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<38} {'–':>14} {result['value']:>14,.2f} {'new':>9}")
+            continue
+        if not before.get("value") or not math.isfinite(before["value"]):
+            # Nothing to take a percentage of; report it rather than guess
+            print(f"{name:<38} {before.get('value', '–')!s:>14} {result['value']:>14,.2f} {'n/a':>9}")
+            continue
+        change = (result["value"] - before["value"]) / before["value"] * 100
+        # Positive "worse" means slower, whichever direction the unit runs
+        worse = -change if result["higher_is_better"] else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<38} {before['value']:>14,.2f} {result['value']:>14,.2f} {change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per benchmark")
+    parser.add_argument("--groups", nargs="+", choices=list(GROUPS), default=list(GROUPS))
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="percent slowdown that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    results: Dict[str, Result] = {}
+    for group in args.groups:
+        results.update(GROUPS[group](args.repeat))
+
+    for name, result in results.items():
+        print(f"{name:<38} {result.value:>14,.2f} {result.unit}")
+
+    report = {
+        "environment": environment(),
+        "repeat": args.repeat,
+        "results": {name: result._asdict() for name, result in results.items()},
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:g}%.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
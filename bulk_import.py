@@ -0,0 +1,398 @@
+"""
+Chunked sizing of CSV/Parquet trade-plan files.
+
+A trade plan has one row per trade with the same fields as the form in
+``get_user_inputs`` (see ``TRADE_PLAN_DEFAULTS``). Files are read and sized
+chunk by chunk, and the enriched rows are appended to a CSV destination, so
+memory use is bounded by the chunk size rather than the file size.
+"""
+import os
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from risk_batch import (
+    BATCH_OUTPUT_COLUMNS,
+    calculate_trade_metrics_batch,
+    round_to_step_batch,
+    suggest_stop_loss_batch,
+)
+from risk_core import DEFAULT_RISK_PERCENT, DEFAULT_SLIPPAGE
+
+if TYPE_CHECKING:
+    from fx_rates import FxRates
+    from instruments import InstrumentRegistry
+    from liquidation import MarginTiers
+
+DEFAULT_CHUNK_SIZE = 100_000
+SUPPORTED_FORMATS = ("csv", "parquet")
+
+# Columns the sizing math cannot do without
+REQUIRED_COLUMNS = ("liquid_capital", "entry_price", "direction", "target_price")
+
+# Optional columns and the value used when a column (or a cell) is missing.
+# slippage_pct is in percent, as typed in the form (0.1 means 0.1%).
+# A missing stop_loss_price is replaced by the suggested stop, as in main().
+TRADE_PLAN_DEFAULTS = {
+    "total_capital": np.nan,
+    "risk_percent": DEFAULT_RISK_PERCENT,
+    "leverage": 1.0,
+    "slippage_pct": DEFAULT_SLIPPAGE,
+    "use_atr": False,
+    "atr_value": 0.0,
+    "atr_multiplier": 1.5,
+    "stop_loss_price": np.nan,
+}
+
+# Optional scale-out ladder: ``;``-separated targets (``"110;120;130"``) and
+# the percent of the position each closes (``"50;30;20"``; an even split when
+# missing), plus whether the stop moves to breakeven after the first target
+LADDER_COLUMNS = ("tp_prices", "tp_close_pct", "tp_breakeven")
+LADDER_OUTPUT_COLUMNS = ["ladder_status", "blended_reward", "blended_reward_to_risk", "average_exit"]
+
+# Optional currencies: capital is in ``account_currency`` and prices in
+# ``quote_currency`` (inferred from the symbol's suffix, e.g. BTCUSDT -> USDT,
+# when missing). Either column adds an ``fx_rate`` (account per quote) column.
+CURRENCY_COLUMNS = ("account_currency", "quote_currency")
+
+# Written as text whatever a chunk's values look like: an optional column that
+# is empty in the first chunk must not fix a numeric type for later chunks
+TEXT_COLUMNS = ("symbol", "direction", "status", "ladder_status") + LADDER_COLUMNS + CURRENCY_COLUMNS
+
+NUMERIC_COLUMNS = tuple(
+    c for c in REQUIRED_COLUMNS + tuple(TRADE_PLAN_DEFAULTS) if c not in ("direction", "use_atr")
+)
+
+Source = Union[str, os.PathLike, BinaryIO]
+ProgressCallback = Callable[[int, float], None]
+
+
+class TradePlanFormatError(ValueError):
+    """The uploaded file is not a usable trade plan."""
+
+
+def detect_format(name: str) -> str:
+    """'csv' or 'parquet' from a file name's extension."""
+    extension = os.path.splitext(str(name))[1].lower().lstrip(".")
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    if extension in ("csv", "txt"):
+        return "csv"
+    raise TradePlanFormatError(f"Unsupported trade plan format: {name!r} (expected CSV or Parquet).")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📥 Chunked Readers
+# ────────────────────────────────────────────────────────────────────────────────
+def _source_size(source: Source) -> Optional[int]:
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    size = getattr(source, "size", None)  # Streamlit's UploadedFile
+    if size is None and hasattr(source, "seek"):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+    return size
+
+
+def read_trade_plan_chunks(
+    source: Source,
+    file_format: str = "csv",
+    chunksize: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[pd.DataFrame, float]]:
+    """
+    Yield ``(chunk, fraction_done)`` pairs without reading the whole file.
+
+    CSV progress is estimated from the reader's byte offset; Parquet progress
+    is exact, from the row count in the file footer.
+    """
+    if file_format == "csv":
+        size = _source_size(source)
+        handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+        try:
+            for chunk in pd.read_csv(handle, chunksize=chunksize):
+                done = handle.tell() / size if size else 0.0
+                yield chunk, min(done, 1.0)
+        finally:
+            if handle is not source:
+                handle.close()
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise TradePlanFormatError("Reading Parquet files requires pyarrow.") from e
+        parquet = pq.ParquetFile(source)
+        total_rows = parquet.metadata.num_rows
+        rows_done = 0
+        for batch in parquet.iter_batches(batch_size=chunksize):
+            rows_done += batch.num_rows
+            yield batch.to_pandas(), (rows_done / total_rows if total_rows else 1.0)
+    else:
+        raise TradePlanFormatError(f"Unsupported trade plan format: {file_format!r}.")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧮 Chunk Sizing
+# ────────────────────────────────────────────────────────────────────────────────
+def _as_bool(values: pd.Series) -> np.ndarray:
+    if values.dtype == bool:
+        return values.to_numpy()
+    return values.astype(str).str.strip().str.lower().isin(("true", "1", "yes", "y")).to_numpy()
+
+
+def _snap_prices(plan: pd.DataFrame, columns, tick_size: np.ndarray):
+    """Snap price columns to each row's tick, leaving rows without an instrument alone."""
+    known = ~np.isnan(tick_size)
+    for column in columns:
+        values = plan[column].to_numpy(dtype=np.float64, copy=True)
+        values[known] = round_to_step_batch(values[known], tick_size[known])
+        plan[column] = values
+
+
+def _quote_to_account_rates(plan: pd.DataFrame, fx_rates: "FxRates") -> np.ndarray:
+    """Per-row ``fx_rate`` from ``CURRENCY_COLUMNS``, NaN where no rate links the two."""
+    from fx_rates import DEFAULT_CURRENCY, quote_currency_of
+
+    column = plan.get("account_currency")
+    account = DEFAULT_CURRENCY if column is None else column.fillna(DEFAULT_CURRENCY).to_numpy()
+    inferred = np.full(len(plan), DEFAULT_CURRENCY, dtype=object)
+    if "symbol" in plan.columns:
+        # One suffix match per distinct symbol, not per row
+        codes, symbols = pd.factorize(plan["symbol"].fillna("").astype(str))
+        currencies = fx_rates.currencies
+        suffixes = np.array([quote_currency_of(s, currencies) or DEFAULT_CURRENCY for s in symbols], dtype=object)
+        inferred = suffixes[codes]
+    column = plan.get("quote_currency")
+    quote = inferred if column is None else column.where(column.notna(), inferred).to_numpy()
+    return fx_rates.rate_batch(quote, account)
+
+
+def _size_ladders(
+    plan: pd.DataFrame,
+    metrics: pd.DataFrame,
+    specs: Optional[Dict[str, np.ndarray]],
+    fx_rate=1.0,
+):
+    """Evaluate every row's take-profit ladder in one pass (see ``LADDER_COLUMNS``)."""
+    from take_profit import evaluate_ladders_batch, parse_ladder_column
+
+    targets = parse_ladder_column(plan["tp_prices"].to_numpy())
+    if "tp_close_pct" in plan.columns:
+        fractions = parse_ladder_column(plan["tp_close_pct"].to_numpy(), width=targets.shape[1])
+        fractions = fractions[:, :targets.shape[1]] / 100
+    else:
+        legs = (~np.isnan(targets)).sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore"):
+            fractions = np.where(np.isnan(targets), np.nan, 1 / legs)
+    if specs is not None:
+        known = ~np.isnan(specs["tick_size"])
+        targets[known] = round_to_step_batch(targets[known], specs["tick_size"][known, None])
+    breakeven = (
+        _as_bool(plan["tp_breakeven"].fillna(False)) if "tp_breakeven" in plan.columns else False
+    )
+
+    ladders = evaluate_ladders_batch(
+        plan["entry_price"].to_numpy(dtype=np.float64),
+        plan["direction"].to_numpy(),
+        metrics["position_size"].to_numpy(),
+        metrics["effective_stop_loss"].to_numpy(),
+        metrics["risk_amount"].to_numpy() / fx_rate,  # Ladders are priced in the quote currency
+        targets,
+        fractions,
+        breakeven,
+        plan["slippage_pct"].to_numpy(dtype=np.float64) / 100,
+        None if specs is None else specs["size_step"],
+    )
+    plan["ladder_status"] = ladders["status"]
+    for column in LADDER_OUTPUT_COLUMNS[1:]:
+        plan[column] = ladders[column]
+    plan["blended_reward"] = ladders["blended_reward"] * fx_rate
+
+
+def size_trade_plan(
+    chunk: pd.DataFrame,
+    margin_tiers: Optional["MarginTiers"] = None,
+    instruments: Optional["InstrumentRegistry"] = None,
+    fx_rates: Optional["FxRates"] = None,
+) -> pd.DataFrame:
+    """
+    Return ``chunk`` with resolved stops, every sizing output and a status
+    column, plus ``liquidation_price`` and ``stop_past_liquidation`` when the
+    exchange's ``margin_tiers`` are given.
+
+    With ``instruments`` and a ``symbol`` column, rows whose symbol is in the
+    registry get prices snapped to the tick, size floored to the lot step,
+    and ``contracts`` and ``below_min_notional`` columns.
+
+    With a ``tp_prices`` column, each row's take-profit ladder adds
+    ``LADDER_OUTPUT_COLUMNS``.
+
+    With ``CURRENCY_COLUMNS`` (which need ``fx_rates``), money outputs are
+    converted to each row's account currency and an ``fx_rate`` column is
+    added; rows without a rate get the ``invalid_fx_rate`` status.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise TradePlanFormatError(f"Trade plan is missing required columns: {', '.join(missing)}.")
+    multi_currency = any(c in chunk.columns for c in CURRENCY_COLUMNS)
+    if multi_currency and fx_rates is None:
+        raise TradePlanFormatError("Trade plans with currency columns need an FX rate table.")
+
+    plan = chunk.copy()
+    for column, default in TRADE_PLAN_DEFAULTS.items():
+        if column not in plan.columns:
+            plan[column] = default
+        elif column != "stop_loss_price":
+            plan[column] = plan[column].fillna(default)
+    # Unparseable numbers become NaN and surface as invalid rows, and every
+    # chunk ends up with the same float64 schema
+    for column in NUMERIC_COLUMNS:
+        plan[column] = pd.to_numeric(plan[column], errors="coerce").astype(np.float64)
+    plan["direction"] = plan["direction"].astype(str).str.strip().str.capitalize()
+    plan["use_atr"] = _as_bool(plan["use_atr"])
+
+    specs = None
+    if instruments is not None and "symbol" in plan.columns:
+        specs = instruments.lookup_batch(plan["symbol"].fillna("").to_numpy())
+        _snap_prices(plan, ("entry_price", "target_price", "stop_loss_price"), specs["tick_size"])
+
+    plan["suggested_stop_loss"] = suggest_stop_loss_batch(
+        plan["entry_price"].to_numpy(dtype=np.float64),
+        plan["direction"].to_numpy(),
+        plan["liquid_capital"].to_numpy(dtype=np.float64),
+        plan["risk_percent"].to_numpy(dtype=np.float64),
+        plan["leverage"].to_numpy(dtype=np.float64),
+        plan["use_atr"].to_numpy(),
+        plan["atr_value"].to_numpy(dtype=np.float64),
+        plan["atr_multiplier"].to_numpy(dtype=np.float64),
+    )
+    plan["stop_loss_price"] = plan["stop_loss_price"].fillna(plan["suggested_stop_loss"])
+    if specs is not None:
+        _snap_prices(plan, ("suggested_stop_loss", "stop_loss_price"), specs["tick_size"])
+
+    fx_rate = 1.0
+    if multi_currency:
+        fx_rate = plan["fx_rate"] = _quote_to_account_rates(plan, fx_rates)
+
+    metrics = calculate_trade_metrics_batch(
+        plan["liquid_capital"].to_numpy(dtype=np.float64),
+        plan["risk_percent"].to_numpy(dtype=np.float64),
+        plan["entry_price"].to_numpy(dtype=np.float64),
+        plan["direction"].to_numpy(),
+        plan["target_price"].to_numpy(dtype=np.float64),
+        plan["leverage"].to_numpy(dtype=np.float64),
+        plan["stop_loss_price"].to_numpy(dtype=np.float64),
+        plan["slippage_pct"].to_numpy(dtype=np.float64) / 100,  # Percent to decimal
+        None if specs is None else specs["size_step"],
+        fx_rate,
+    )
+    metrics.index = plan.index
+    for column in BATCH_OUTPUT_COLUMNS + ["status"]:
+        plan[column] = metrics[column]
+
+    if specs is not None:
+        with np.errstate(invalid="ignore"):
+            notional = metrics["position_size"].to_numpy() * plan["entry_price"].to_numpy(dtype=np.float64)
+            plan["contracts"] = metrics["position_size"].to_numpy() / specs["multiplier"]
+            plan["below_min_notional"] = (notional <= 0) | (notional < specs["min_notional"])
+
+    if "tp_prices" in plan.columns:
+        _size_ladders(plan, metrics, specs, fx_rate)
+
+    if margin_tiers is not None:
+        from liquidation import stop_past_liquidation
+
+        direction = plan["direction"].to_numpy()
+        liquidation_price = margin_tiers.liquidation_price_batch(
+            plan["entry_price"].to_numpy(dtype=np.float64),
+            direction,
+            metrics["position_size"].to_numpy(),
+            metrics["capital_required"].to_numpy() / fx_rate,  # Margin in the quote currency
+        )
+        plan["liquidation_price"] = liquidation_price
+        plan["stop_past_liquidation"] = stop_past_liquidation(
+            direction, metrics["effective_stop_loss"].to_numpy(), liquidation_price
+        )
+    return plan
+
+
+class _ChunkCsvWriter:
+    """Append sized chunks to a CSV file, via pyarrow when available (much faster)."""
+
+    def __init__(self, out):
+        self.out = out
+        self._writer = None
+        self._schema = None
+        self._header_written = False
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            self._pa = None
+        else:
+            self._pa, self._pa_csv = pa, pa_csv
+
+    def write(self, frame: pd.DataFrame):
+        if self._pa is None:
+            frame.to_csv(self.out, header=not self._header_written, index=False)
+            self._header_written = True
+            return
+        table = self._pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            # Text columns and columns with no values yet are fixed as strings;
+            # anything a later chunk holds can be cast to a string
+            self._schema = self._pa.schema([
+                field.with_type(self._pa.string())
+                if field.name in TEXT_COLUMNS or self._pa.types.is_null(field.type)
+                or table.column(field.name).null_count == len(table)
+                else field
+                for field in table.schema
+            ])
+            self._writer = self._pa_csv.CSVWriter(self.out, self._schema)
+        if table.schema != self._schema:
+            try:
+                table = table.cast(self._schema)
+            except (self._pa.ArrowInvalid, self._pa.ArrowNotImplementedError, ValueError) as e:
+                raise TradePlanFormatError(f"A later chunk does not match the first chunk's columns: {e}") from e
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def size_trade_plan_file(
+    source: Source,
+    destination: Union[str, os.PathLike],
+    file_format: str = "csv",
+    chunksize: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+    margin_tiers: Optional["MarginTiers"] = None,
+    instruments: Optional["InstrumentRegistry"] = None,
+    fx_rates: Optional["FxRates"] = None,
+) -> Dict[str, int]:
+    """
+    Size every row of ``source`` into a CSV at ``destination``.
+
+    ``progress(rows_done, fraction_done)`` is called after each chunk;
+    ``margin_tiers``, ``instruments`` and ``fx_rates`` add the liquidation,
+    instrument and currency columns (see ``size_trade_plan``).
+    Returns the number of rows per status.
+    """
+    status_counts: Dict[str, int] = {}
+    rows_done = 0
+    with open(destination, "wb") as out:
+        writer = _ChunkCsvWriter(out)
+        try:
+            for chunk, fraction in read_trade_plan_chunks(source, file_format, chunksize):
+                sized = size_trade_plan(chunk, margin_tiers, instruments, fx_rates)
+                writer.write(sized)
+                rows_done += len(sized)
+                for status, count in sized["status"].value_counts().items():
+                    status_counts[status] = status_counts.get(status, 0) + int(count)
+                if progress is not None:
+                    progress(rows_done, fraction)
+        finally:
+            writer.close()
+    return status_counts
@@ -0,0 +1,281 @@
+"""
+Correlation-aware portfolio risk from per-symbol return series.
+
+``RollingCovariance`` keeps the last ``window`` return rows of a fixed set of
+symbols plus their running sums and cross-product sums, so k new rows update
+the covariance matrix in O(k·n²) instead of an O(window·n²) recompute.
+``CovarianceCache`` holds one per (source, symbol set, window), evicts the
+least recently used, and catches an entry up with only the rows it has not
+seen yet.
+"""
+import os
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+from typing import Dict, Hashable, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_WINDOW = 250  # Return rows (about one trading year of daily bars)
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_CACHE_SIZE = 32
+
+
+class PortfolioRisk(NamedTuple):
+    """Parametric (variance-covariance) risk of a set of dollar exposures."""
+
+    volatility: float  # One-period standard deviation of P&L ($)
+    value_at_risk: float  # Loss not exceeded with ``confidence`` ($)
+    standalone_var: np.ndarray  # VaR of each exposure held on its own ($)
+    marginal_var: np.ndarray  # d VaR / d exposure ($ of VaR per $ of exposure)
+    component_var: np.ndarray  # Exposure × marginal VaR; sums to ``value_at_risk``
+
+    @property
+    def diversification_benefit(self) -> float:
+        """How much less the portfolio VaR is than the sum of standalone VaRs."""
+        return float(self.standalone_var.sum()) - self.value_at_risk
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📐 Rolling Covariance
+# ────────────────────────────────────────────────────────────────────────────────
+class RollingCovariance:
+    """
+    Sample covariance of the last ``window`` return rows, updated in place.
+
+    Rows enter and leave through rank-k updates of the running sums; the
+    matrix is rebuilt from the buffered rows every ``window`` rows so
+    floating-point drift from the subtractions never accumulates.
+    """
+
+    def __init__(self, symbols: Sequence[str], window: int = DEFAULT_WINDOW):
+        if window < 2:
+            raise ValueError("Covariance window must be at least 2 rows.")
+        self.symbols: Tuple[str, ...] = tuple(symbols)
+        self.window = int(window)
+        self._position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._rows = np.zeros((self.window, len(self.symbols)))  # Ring buffer of the current window
+        self.reset()
+
+    def reset(self):
+        """Forget every row (e.g. when the history it came from was rewritten)."""
+        n = len(self.symbols)
+        self._head = 0  # Slot the next row is written to
+        self.count = 0
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._rows_since_rebuild = 0
+        self._covariance: Optional[np.ndarray] = None
+        self.last_label: Optional[Hashable] = None  # Index label of the newest row
+
+    def index_of(self, symbol: str) -> int:
+        return self._position[symbol]
+
+    @property
+    def last_row(self) -> Optional[np.ndarray]:
+        return self._rows[self._head - 1] if self.count else None
+
+    def extend(self, rows, last_label: Optional[Hashable] = None):
+        """Append return rows (oldest first); rows beyond the window push out the oldest."""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(self.symbols))
+        if len(rows) == 0:
+            return
+        if len(rows) >= self.window:
+            self._reset(rows[-self.window:])
+        else:
+            slots = (self._head + np.arange(len(rows))) % self.window
+            evicted = max(self.count + len(rows) - self.window, 0)
+            # Until the buffer is full the first slots written are empty; the
+            # rest hold the oldest rows, which leave as the new ones arrive
+            old = self._rows[slots[len(rows) - evicted:]]
+            # One product covers both: [new; old]ᵀ · [new; -old]
+            signed = np.concatenate([rows, -old])
+            self._sum += signed.sum(axis=0)
+            self._cross += np.concatenate([rows, old]).T @ signed
+            self._rows[slots] = rows
+            self._head = (self._head + len(rows)) % self.window
+            self.count = min(self.count + len(rows), self.window)
+            self._rows_since_rebuild += len(rows)
+            if self._rows_since_rebuild >= self.window:
+                self._reset(self._ordered_rows())
+        self._covariance = None
+        self.last_label = last_label
+
+    def push(self, row, last_label: Optional[Hashable] = None):
+        """Append one return row."""
+        self.extend(np.asarray(row, dtype=np.float64)[None, :], last_label)
+
+    def _ordered_rows(self) -> np.ndarray:
+        if self.count < self.window:
+            return self._rows[:self.count].copy()
+        return np.roll(self._rows, -self._head, axis=0)
+
+    def _reset(self, rows: np.ndarray):
+        self.count = len(rows)
+        self._rows[:self.count] = rows
+        self._head = self.count % self.window
+        self._sum = rows.sum(axis=0)
+        self._cross = rows.T @ rows
+        self._rows_since_rebuild = 0
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance matrix (read-only; recomputed only after new rows)."""
+        if self._covariance is None:
+            if self.count < 2:
+                covariance = np.full((len(self.symbols),) * 2, np.nan)
+            else:
+                covariance = np.outer(self._sum, self._sum / -self.count)
+                covariance += self._cross
+                covariance /= self.count - 1
+            covariance.setflags(write=False)
+            self._covariance = covariance
+        return self._covariance
+
+    def correlation(self) -> np.ndarray:
+        covariance = self.covariance()
+        volatility = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = covariance / np.outer(volatility, volatility)
+        return np.clip(correlation, -1.0, 1.0)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🗃️ Bounded Cache
+# ────────────────────────────────────────────────────────────────────────────────
+class CovarianceCache:
+    """LRU cache of ``RollingCovariance`` objects, safe to share between threads."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, RollingCovariance]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def covariance(
+        self,
+        returns,
+        symbols: Iterable[str],
+        window: int = DEFAULT_WINDOW,
+        source: Hashable = None,
+    ) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """
+        ``(symbols, covariance)`` over the last ``window`` rows of ``returns``.
+
+        ``returns`` is a DataFrame of returns, one column per symbol, oldest
+        row first; rows with a missing value for any requested symbol are
+        skipped. ``source`` identifies the data set (e.g. a file path) so
+        different files never share an entry. If the newest row the entry
+        has seen is still in ``returns`` unchanged, only the rows after it
+        are applied; anything else (new file, edited history) rebuilds it.
+        """
+        symbols = tuple(sorted(set(symbols)))
+        key = (source, symbols, int(window))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                entry = RollingCovariance(symbols, window)
+                self._entries[key] = entry
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            self._catch_up(entry, returns)
+            return entry.symbols, entry.covariance()
+
+    def _catch_up(self, entry: RollingCovariance, returns):
+        columns = returns.columns.get_indexer(entry.symbols)
+        if (columns < 0).any():
+            missing = [s for s, c in zip(entry.symbols, columns) if c < 0]
+            raise KeyError(f"No return series for {', '.join(missing)}.")
+        # A view for an all-float frame; plain NumPy indexing below keeps the
+        # per-rerun cost to the rows the entry has not seen
+        values = returns.to_numpy(dtype=np.float64, copy=False)
+        start = 0
+        if entry.last_label is not None:
+            position = returns.index.get_indexer([entry.last_label])[0]
+            if position >= 0 and np.array_equal(values[position, columns], entry.last_row):
+                start = position + 1
+            else:
+                self.rebuilds += 1
+                entry.reset()
+        new = values[start:, columns]
+        keep = ~np.isnan(new).any(axis=1)
+        if keep.any():
+            entry.extend(new[keep], returns.index[start + np.flatnonzero(keep)[-1]])
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# ⚖️ VaR and Risk Contributions
+# ────────────────────────────────────────────────────────────────────────────────
+def read_series_table(source, name: str):
+    """
+    Wide table of per-symbol series: first column is the time index, every
+    other column one symbol. CSV or Parquet, picked by ``name``'s extension.
+    """
+    import pandas as pd
+
+    extension = os.path.splitext(str(name))[1].lower()
+    if extension in (".parquet", ".pq"):
+        table = pd.read_parquet(source)
+        table = table.set_index(table.columns[0])
+    elif extension in (".csv", ".txt"):
+        table = pd.read_csv(source, index_col=0, engine="c")
+    else:
+        raise ValueError(f"Unsupported series file: {name!r} (expected CSV or Parquet).")
+    table.columns = [str(c).strip().upper() for c in table.columns]
+    return table.apply(pd.to_numeric, errors="coerce").astype(np.float64)
+
+
+def returns_from_prices(prices):
+    """Simple per-period returns from a price DataFrame (one column per symbol)."""
+    return prices.pct_change(fill_method=None).iloc[1:]
+
+
+def exposure_vector(symbols: Sequence[str], exposures: Dict[str, float]) -> np.ndarray:
+    """Net signed dollar exposure per symbol, aligned with ``symbols``."""
+    vector = np.zeros(len(symbols))
+    position = {symbol: i for i, symbol in enumerate(symbols)}
+    for symbol, exposure in exposures.items():
+        vector[position[symbol]] += exposure
+    return vector
+
+
+def portfolio_risk(
+    exposures: np.ndarray,
+    covariance: np.ndarray,
+    confidence: float = DEFAULT_CONFIDENCE,
+    horizon: int = 1,
+) -> PortfolioRisk:
+    """
+    Parametric VaR of signed dollar ``exposures`` (long > 0, short < 0).
+
+    Marginal VaR is ``z * (Σw)_i / σ_p``; component VaR multiplies it by the
+    exposure, so the components add up to the portfolio VaR (Euler).
+    ``horizon`` is in return periods and scales risk by its square root.
+    """
+    if not 0.5 < confidence < 1:
+        raise ValueError("Confidence must be between 0.5 and 1.")
+    exposures = np.asarray(exposures, dtype=np.float64)
+    z = NormalDist().inv_cdf(confidence) * np.sqrt(horizon)
+    covariance_times_w = covariance @ exposures
+    volatility = float(np.sqrt(max(exposures @ covariance_times_w, 0.0)))
+    if volatility > 0:
+        marginal = z * covariance_times_w / volatility
+    else:
+        marginal = np.zeros_like(exposures)
+    return PortfolioRisk(
+        volatility=volatility * np.sqrt(horizon),
+        value_at_risk=z * volatility,
+        standalone_var=z * np.abs(exposures) * np.sqrt(np.clip(np.diag(covariance), 0.0, None)),
+        marginal_var=marginal,
+        component_var=exposures * marginal,
+    )
@@ -0,0 +1,214 @@
+"""
+Currency conversion for accounts whose currency differs from the instrument's quote currency.
+
+Rates come from a CSV file with one row per quoted pair (``1 base = rate quote``):
+
+    base,quote,rate
+    EUR,USD,1.08
+    USD,JPY,151.2
+
+or from a stand-in feed: any callable returning ``{(base, quote): rate}``.
+Every pair reachable through quoted pairs is triangulated once per refresh
+into a dense matrix, so a conversion is an array lookup: ``EUR -> JPY``
+above is ``1.08 × 151.2`` without either cross being in the file.
+
+``FxRates`` keeps the matrix for ``ttl`` seconds; after that the file is
+re-parsed only if its modification time or size changed (a feed is always
+called again), so shared instances cost one ``stat`` per TTL.
+"""
+import csv
+import math
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Mapping, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+DEFAULT_FX_FILE = Path(
+    os.environ.get("RISK_CALC_FX_RATES", Path(__file__).resolve().parent / "fx_rates.csv")
+)
+FX_COLUMNS = ("base", "quote", "rate")
+DEFAULT_CURRENCY = "USD"
+DEFAULT_TTL = 60.0  # Seconds rates are served before the source is checked again
+
+Pairs = Dict[Tuple[str, str], float]
+RateFeed = Callable[[], Mapping[Tuple[str, str], float]]
+
+
+class FxRateError(ValueError):
+    """The rate source is unusable, or a pair cannot be converted."""
+
+
+def _code(value) -> str:
+    return str(value).strip().upper()
+
+
+def parse_rates(lines: Iterable[str]) -> Pairs:
+    """``{(BASE, QUOTE): rate}`` from CSV text lines; later rows override earlier ones."""
+    reader = csv.DictReader(lines)
+    header = [c.strip().lower() for c in reader.fieldnames or ()]
+    missing = [c for c in FX_COLUMNS if c not in header]
+    if missing:
+        raise FxRateError(f"FX rate file is missing columns: {', '.join(missing)}.")
+    reader.fieldnames = header
+
+    pairs: Pairs = {}
+    for row in reader:
+        base, quote = _code(row.get("base") or ""), _code(row.get("quote") or "")
+        if not base or not quote:
+            continue
+        text = (row.get("rate") or "").strip()
+        try:
+            rate = float(text)
+        except ValueError:
+            raise FxRateError(f"{base}/{quote}: rate must be a number, got {text!r}.") from None
+        if not math.isfinite(rate) or rate <= 0:
+            raise FxRateError(f"{base}/{quote}: rate must be positive.")
+        pairs[base, quote] = rate
+    return pairs
+
+
+class RateMatrix(NamedTuple):
+    """``rates[i, j]``: units of ``currencies[j]`` per unit of ``currencies[i]`` (NaN if unconnected)."""
+
+    currencies: Tuple[str, ...]
+    index: Dict[str, int]
+    rates: np.ndarray  # (n + 1, n + 1); the extra NaN row and column are hit by index -1 (unknown)
+
+
+def build_rate_matrix(pairs: Mapping[Tuple[str, str], float]) -> RateMatrix:
+    """
+    Triangulate every cross rate from the quoted ``pairs``.
+
+    Each connected group of currencies is priced in its first currency by a
+    breadth-first walk (shortest chains of conversions); quoted pairs then
+    keep their own rate rather than the triangulated one.
+    """
+    neighbours: Dict[str, list] = {}
+    for (base, quote), rate in pairs.items():
+        neighbours.setdefault(base, []).append((quote, rate))
+        neighbours.setdefault(quote, []).append((base, 1 / rate))
+    currencies = tuple(sorted(neighbours))
+    index = {c: i for i, c in enumerate(currencies)}
+    n = len(currencies)
+
+    # value[i]: price of currency i in its group's root currency
+    value = np.full(n, np.nan)
+    group = np.full(n, -1)
+    for root in currencies:
+        r = index[root]
+        if group[r] >= 0:
+            continue
+        group[r], value[r] = r, 1.0
+        queue = deque([root])
+        while queue:
+            current = queue.popleft()
+            for other, rate in neighbours[current]:
+                o = index[other]
+                if group[o] < 0:
+                    # 1 current = rate other, so other is worth value / rate
+                    group[o], value[o] = r, value[index[current]] / rate
+                    queue.append(other)
+
+    rates = np.full((n + 1, n + 1), np.nan)
+    rates[:n, :n] = np.where(group[:, None] == group[None, :], value[:, None] / value[None, :], np.nan)
+    for (base, quote), rate in pairs.items():
+        rates[index[base], index[quote]] = rate
+        rates[index[quote], index[base]] = 1 / rate
+    np.fill_diagonal(rates[:n, :n], 1.0)
+    rates.flags.writeable = False
+    return RateMatrix(currencies, index, rates)
+
+
+def quote_currency_of(symbol: str, currencies: Iterable[str]) -> Optional[str]:
+    """The longest known currency code ``symbol`` ends with (``BTCUSDT`` -> ``USDT``), or None."""
+    symbol = _code(symbol)
+    matches = [c for c in currencies if symbol.endswith(c) and len(symbol) > len(c)]
+    return max(matches, key=len) if matches else None
+
+
+class FxRates:
+    """TTL-cached rate matrix from a file or feed; safe to share between threads."""
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike] = DEFAULT_FX_FILE,
+        ttl: float = DEFAULT_TTL,
+        feed: Optional[RateFeed] = None,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.feed = feed
+        self._matrix: Optional[RateMatrix] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def matrix(self) -> RateMatrix:
+        matrix = self._matrix
+        if matrix is not None and time.monotonic() - self._checked_at < self.ttl:
+            return matrix
+        with self._lock:
+            if self._matrix is not None and time.monotonic() - self._checked_at < self.ttl:
+                return self._matrix  # Refreshed by another thread while we waited
+            if self.feed is not None:
+                self._matrix = build_rate_matrix({
+                    (_code(base), _code(quote)): float(rate) for (base, quote), rate in self.feed().items()
+                })
+                self.loads += 1
+            else:
+                try:
+                    stat = self.path.stat()
+                except FileNotFoundError:
+                    self._matrix, self._signature = build_rate_matrix({}), None
+                else:
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                    if signature != self._signature or self._matrix is None:
+                        with open(self.path, newline="", encoding="utf-8") as f:
+                            self._matrix = build_rate_matrix(parse_rates(f))
+                        self._signature = signature
+                        self.loads += 1
+            self._checked_at = time.monotonic()
+            return self._matrix
+
+    @property
+    def currencies(self) -> Tuple[str, ...]:
+        return self.matrix().currencies
+
+    def rate(self, base: str, quote: str) -> float:
+        """Units of ``quote`` per unit of ``base``; raises ``FxRateError`` if no chain of quotes links them."""
+        base, quote = _code(base), _code(quote)
+        if base == quote:
+            return 1.0
+        matrix = self.matrix()
+        rate = float(matrix.rates[matrix.index.get(base, -1), matrix.index.get(quote, -1)])
+        if math.isnan(rate):
+            raise FxRateError(f"No FX rate from {base} to {quote}.")
+        return rate
+
+    def rate_batch(self, bases, quotes) -> np.ndarray:
+        """Per-row ``rate(base, quote)``, NaN where there is none; scalars broadcast."""
+        bases, quotes = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(bases, dtype=object)), np.asarray(quotes, dtype=object)
+        )
+        import pandas as pd  # factorize hashes codes, far cheaper than sorting strings for np.unique
+
+        codes, unique = pd.factorize(np.concatenate([bases.reshape(-1), quotes.reshape(-1)]))
+        # Normalize once per distinct spelling, then map spellings to matrix positions
+        normalized = [_code(c) for c in unique]
+        matrix = self.matrix()
+        spelling = {c: i for i, c in enumerate(dict.fromkeys(normalized))}
+        code_ids = np.array([spelling[c] for c in normalized], dtype=np.intp)[codes]
+        positions = np.array([matrix.index.get(c, -1) for c in normalized], dtype=np.intp)[codes]
+        base_ids, quote_ids = code_ids[:bases.size], code_ids[bases.size:]
+        rates = matrix.rates[positions[:bases.size], positions[bases.size:]]
+        # The same code is always 1, even for a currency the source does not list
+        return np.where(base_ids == quote_ids, 1.0, rates).reshape(bases.shape)
+
+    def convert_batch(self, amounts, bases, quotes) -> np.ndarray:
+        """``amounts`` in ``bases`` expressed in ``quotes``, row by row (NaN where unconvertible)."""
+        return np.asarray(amounts, dtype=np.float64) * self.rate_batch(bases, quotes)
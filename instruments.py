@@ -0,0 +1,191 @@
+"""
+Instrument metadata: lot step, tick size, minimum notional and contract multiplier.
+
+The registry is a CSV file with one row per symbol:
+
+    symbol,lot_step,tick_size,min_notional,multiplier
+    BTCUSDT,0.001,0.1,100,1
+    ES,1,0.25,0,50
+
+``lot_step`` is in contracts and ``multiplier`` is units of the underlying
+per contract, so the tradable size increment in units is their product.
+``min_notional`` and ``multiplier`` may be left empty (0 and 1).
+
+Nothing is read until the first lookup, and afterwards the file is only
+re-parsed when its modification time or size changes (checked at most every
+``check_interval`` seconds), so a registry of thousands of symbols costs
+nothing at startup and lookups are a dict access.
+"""
+import csv
+import os
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+from risk_core import floor_to_step, round_to_step
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_INSTRUMENTS_FILE = Path(
+    os.environ.get("RISK_CALC_INSTRUMENTS", Path(__file__).resolve().parent / "instruments.csv")
+)
+INSTRUMENT_COLUMNS = ("symbol", "lot_step", "tick_size", "min_notional", "multiplier")
+RELOAD_CHECK_INTERVAL = 2.0  # Seconds between modification checks
+
+
+class InstrumentFileError(ValueError):
+    """The instrument file is not a usable registry."""
+
+
+class Instrument(NamedTuple):
+    symbol: str
+    lot_step: float  # Contracts
+    tick_size: float  # Price increment
+    min_notional: float  # Smallest accepted order value ($)
+    multiplier: float  # Units of the underlying per contract
+
+    @property
+    def size_step(self) -> float:
+        """Tradable size increment in units of the underlying (exact decimal product)."""
+        return float(Decimal(repr(self.lot_step)) * Decimal(repr(self.multiplier)))
+
+    def round_size(self, position_size: float) -> float:
+        """Size floored to a whole number of lots."""
+        return floor_to_step(position_size, self.size_step)
+
+    def round_price(self, price: float) -> float:
+        """Price snapped to the nearest tick."""
+        return round_to_step(price, self.tick_size)
+
+    def contracts(self, position_size: float) -> float:
+        return float(Decimal(repr(position_size)) / Decimal(repr(self.multiplier)))
+
+    def below_min_notional(self, position_size: float, price: float) -> bool:
+        """True if the exchange would reject the order as too small (including zero lots)."""
+        return position_size <= 0 or position_size * price < self.min_notional
+
+
+def _positive(row: Dict[str, str], column: str, default: Optional[str] = None) -> float:
+    text = (row.get(column) or "").strip() or default
+    try:
+        value = Decimal(text)
+    except (InvalidOperation, TypeError):
+        raise InstrumentFileError(f"{row.get('symbol')}: {column} must be a number, got {text!r}.") from None
+    if not value.is_finite() or value < 0 or (value == 0 and column != "min_notional"):
+        raise InstrumentFileError(f"{row.get('symbol')}: {column} must be positive.")
+    return float(value)
+
+
+def parse_instruments(lines: Iterable[str]) -> Dict[str, Instrument]:
+    """``{SYMBOL: Instrument}`` from CSV text lines; later rows override earlier ones."""
+    reader = csv.DictReader(lines)
+    header = [c.strip().lower() for c in reader.fieldnames or ()]
+    missing = [c for c in INSTRUMENT_COLUMNS[:3] if c not in header]
+    if missing:
+        raise InstrumentFileError(f"Instrument file is missing columns: {', '.join(missing)}.")
+    reader.fieldnames = header
+
+    instruments: Dict[str, Instrument] = {}
+    for row in reader:
+        symbol = (row.get("symbol") or "").strip().upper()
+        if not symbol:
+            continue
+        row["symbol"] = symbol
+        instruments[symbol] = Instrument(
+            symbol,
+            _positive(row, "lot_step"),
+            _positive(row, "tick_size"),
+            _positive(row, "min_notional", "0"),
+            _positive(row, "multiplier", "1"),
+        )
+    return instruments
+
+
+class InstrumentRegistry:
+    """Lazily loaded, self-refreshing ``symbol -> Instrument`` map; safe to share between threads."""
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike] = DEFAULT_INSTRUMENTS_FILE,
+        check_interval: float = RELOAD_CHECK_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._instruments: Optional[Dict[str, Instrument]] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._error: Optional[InstrumentFileError] = None  # Raised again until the file changes
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _current(self) -> Dict[str, Instrument]:
+        """
+        The parsed registry. A malformed file raises ``InstrumentFileError``,
+        and keeps raising it without being re-parsed until it changes.
+        """
+        instruments, error = self._instruments, self._error
+        if time.monotonic() - self._checked_at < self.check_interval:
+            if error is not None:
+                raise error.with_traceback(None)
+            if instruments is not None:
+                return instruments
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                self._instruments, self._signature, self._error = {}, None, None
+                return self._instruments
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature != self._signature or (self._instruments is None and self._error is None):
+                self._signature = signature
+                self.loads += 1
+                try:
+                    with open(self.path, newline="", encoding="utf-8") as f:
+                        self._instruments, self._error = parse_instruments(f), None
+                except InstrumentFileError as e:
+                    self._instruments, self._error = None, e
+            if self._error is not None:
+                raise self._error.with_traceback(None)
+            return self._instruments
+
+    def get(self, symbol: str) -> Optional[Instrument]:
+        return self._current().get(symbol.strip().upper())
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.get(symbol) is not None
+
+    def __len__(self) -> int:
+        return len(self._current())
+
+    def lookup_batch(self, symbols) -> Dict[str, "np.ndarray"]:
+        """
+        Per-row ``size_step``, ``tick_size``, ``min_notional`` and
+        ``multiplier`` arrays (NaN for unknown symbols), one dict lookup per
+        distinct symbol.
+        """
+        import numpy as np
+
+        instruments = self._current()
+        unique, inverse = np.unique(
+            np.array([str(s).strip().upper() for s in symbols], dtype=str),
+            return_inverse=True,
+        )
+        table = np.full((len(unique), 4), np.nan)
+        for i, symbol in enumerate(unique.tolist()):
+            instrument = instruments.get(symbol)
+            if instrument is not None:
+                table[i] = (
+                    instrument.size_step, instrument.tick_size,
+                    instrument.min_notional, instrument.multiplier,
+                )
+        rows = table[inverse.reshape(-1)]
+        return {
+            "size_step": rows[:, 0],
+            "tick_size": rows[:, 1],
+            "min_notional": rows[:, 2],
+            "multiplier": rows[:, 3],
+        }
@@ -0,0 +1,291 @@
+"""
+Kelly and optimal-f risk percent from a history of closed trades.
+
+Outcomes are R-multiples (P&L divided by the amount risked). A file provides
+either an ``r_multiple`` column or ``pnl`` and ``risk_amount`` columns.
+
+``TradeOutcomes`` keeps the history as a histogram of R-multiples in
+``R_BIN_WIDTH`` steps plus exact running moments, so millions of trades take
+a few kilobytes, newly closed trades are added in O(new trades), and every
+estimate costs O(occupied bins) rather than O(trades). As with
+``atr_engine.WilderATR``, a file that grows is only read from where the
+previous call stopped.
+
+The Kelly fraction maximizes the expected log growth ``Σ p·log(1 + f·r)``;
+risking ``f`` of equity per 1R makes it directly a risk percent. Optimal-f
+(Vince) is the same optimum expressed per largest loss, ``f·|r_min|``. The
+confidence interval is a bootstrap: histograms are resampled with
+multinomial draws and all of them are solved at once, in chunks spread over
+the shared process pool; each chunk gets its own child of a
+``SeedSequence``, so results depend only on the seed.
+"""
+import io
+import math
+import os
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from parquet_tail import iter_unread
+
+R_BIN_WIDTH = 0.01  # Histogram resolution (R)
+R_LIMIT = 100.0  # Outcomes beyond ±R_LIMIT are counted at the limit
+DEFAULT_RESAMPLES = 2_000
+DEFAULT_CONFIDENCE = 0.90
+DEFAULT_KELLY_MULTIPLIER = 0.5  # Half Kelly
+DEFAULT_SEED = 42
+CHUNK_RESAMPLES = 250  # Resamples per task; fixed so results don't depend on the worker count
+BISECTION_STEPS = 60
+CSV_BLOCK_BYTES = 32 * 1024 * 1024
+ROW_BLOCK = 1_000_000
+
+Source = Union[str, os.PathLike, BinaryIO]
+_BINS = int(round(2 * R_LIMIT / R_BIN_WIDTH)) + 1
+_BIN_VALUES = np.arange(_BINS) * R_BIN_WIDTH - R_LIMIT
+
+
+class TradeHistoryFormatError(ValueError):
+    """The file does not hold usable trade outcomes."""
+
+
+class KellyEstimate(NamedTuple):
+    trades: int
+    win_rate: float
+    average_r: float
+    kelly: float  # Fraction of equity risked per 1R
+    kelly_interval: Tuple[float, float]  # Bootstrap confidence interval of ``kelly``
+    fractional_kelly: float  # ``kelly_multiplier`` × kelly
+    optimal_f: float  # Kelly per largest loss (Vince)
+    growth_per_trade: float  # Expected log growth per trade at ``kelly``
+    suggested_risk_percent: float  # Multiplier × the interval's lower bound, in percent
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📐 Growth-Optimal Fraction
+# ────────────────────────────────────────────────────────────────────────────────
+def kelly_fraction(r_values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Growth-optimal fraction for each row of ``weights`` (counts or
+    probabilities over ``r_values``), capped at 1 (all equity per 1R).
+
+    The growth's derivative ``Σ w·r / (1 + f·r)`` only falls as ``f`` grows,
+    so every row is bisected at once on ``[0, min(1, 1/|r_min|))``; a row
+    whose mean R is not positive gets 0.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    r_values = np.asarray(r_values, dtype=np.float64)
+    worst = np.where(weights > 0, r_values, np.inf).min(axis=1)
+    high = np.where(worst < 0, np.minimum(1.0, -1.0 / np.minimum(worst, -1e-300)), 1.0)
+    high = np.nextafter(high, 0)  # Stay strictly inside 1 + f·r > 0
+    low = np.zeros(len(weights))
+
+    def slope(f):
+        return (weights * (r_values / (1 + f[:, None] * r_values))).sum(axis=1)
+
+    for _ in range(BISECTION_STEPS):
+        middle = (low + high) / 2
+        rising = slope(middle) > 0
+        low = np.where(rising, middle, low)
+        high = np.where(rising, high, middle)
+    # Not profitable on average: don't trade; still rising at the cap: the cap
+    return np.where(slope(np.zeros(len(weights))) <= 0, 0.0, np.where(slope(high) > 0, high, low))
+
+
+def growth_rate(r_values: np.ndarray, weights: np.ndarray, f: float) -> float:
+    """Expected log growth per trade when risking ``f`` per 1R."""
+    p = weights / weights.sum()
+    return float(p @ np.log1p(f * r_values))
+
+
+def _bootstrap_chunk(seed: np.random.SeedSequence, size: int, r_values, probabilities, n_trades: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return kelly_fraction(r_values, rng.multinomial(n_trades, probabilities, size=size))
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📚 Incremental Trade History
+# ────────────────────────────────────────────────────────────────────────────────
+class TradeOutcomes:
+    """Histogram of R-multiples plus exact running moments."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget every trade seen (e.g. when the source file was rewritten)."""
+        self.counts = np.zeros(_BINS, dtype=np.int64)
+        self.trades = 0
+        self.wins = 0
+        self.sum_r = 0.0
+        self.min_r = math.inf
+        # Where the next incremental file read starts (bytes for CSV, rows otherwise)
+        self.offset = 0
+        self.columns: Optional[List[int]] = None  # CSV positions of r_multiple, or pnl and risk_amount
+
+    def update(self, r_multiples) -> int:
+        """Add closed trades (R-multiples; NaN and infinite values are skipped); returns the count."""
+        r = np.asarray(r_multiples, dtype=np.float64).ravel()
+        r = r[np.isfinite(r)]
+        if not r.size:
+            return 0
+        bins = np.rint((np.clip(r, -R_LIMIT, R_LIMIT) + R_LIMIT) / R_BIN_WIDTH).astype(np.int64)
+        self.counts += np.bincount(bins, minlength=_BINS)
+        self.trades += r.size
+        self.wins += int((r > 0).sum())
+        self.sum_r += float(r.sum())
+        self.min_r = min(self.min_r, float(r.min()))
+        return r.size
+
+    def update_from_pnl(self, pnl, risk_amount) -> int:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.update(np.asarray(pnl, dtype=np.float64) / np.asarray(risk_amount, dtype=np.float64))
+
+    def histogram(self) -> Tuple[np.ndarray, np.ndarray]:
+        """``(r_values, counts)`` of the occupied bins."""
+        occupied = np.flatnonzero(self.counts)
+        return _BIN_VALUES[occupied], self.counts[occupied]
+
+    # ─── File Sources ─────────────────────────────────────────────────────────────
+    def update_from_file(
+        self,
+        source: Source,
+        file_format: Optional[str] = None,
+        complete_lines_only: bool = True,
+    ) -> int:
+        """
+        Add trades appended to ``source`` since the last call; returns how
+        many. CSV files are read from the last byte offset (a trailing line
+        without a newline waits for the next call unless
+        ``complete_lines_only`` is False), Parquet from the last row.
+        """
+        if file_format is None:
+            from bulk_import import detect_format
+
+            file_format = detect_format(getattr(source, "name", source))
+        if file_format == "csv":
+            return self._update_from_csv(source, complete_lines_only)
+        if file_format == "parquet":
+            return self._update_from_parquet(source)
+        raise TradeHistoryFormatError(f"Unsupported trade history format: {file_format!r}.")
+
+    def _add_columns(self, columns: List[np.ndarray]) -> int:
+        if len(columns) == 1:
+            return self.update(columns[0])
+        return self.update_from_pnl(*columns)
+
+    @staticmethod
+    def _pick_columns(names: List[str]) -> List[int]:
+        if "r_multiple" in names:
+            return [names.index("r_multiple")]
+        if "pnl" in names and "risk_amount" in names:
+            return [names.index("pnl"), names.index("risk_amount")]
+        raise TradeHistoryFormatError("Trade history needs an r_multiple column, or pnl and risk_amount.")
+
+    def _update_from_csv(self, source: Source, complete_lines_only: bool) -> int:
+        import pandas as pd
+
+        if isinstance(source, (str, os.PathLike)) and os.path.getsize(source) < self.offset:
+            self.reset()  # Truncated or replaced rather than appended to
+        handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+        added = 0
+        try:
+            if self.columns is None:
+                handle.seek(0)
+                header = handle.readline()
+                names = [n.strip().strip('"').lower() for n in header.decode("utf-8-sig").split(",")]
+                self.columns = self._pick_columns(names)
+                self.offset = len(header)
+
+            handle.seek(self.offset)
+            tail = b""
+            while True:
+                block = handle.read(CSV_BLOCK_BYTES)
+                at_eof = len(block) < CSV_BLOCK_BYTES
+                data = tail + block
+                cut = len(data) if at_eof and not complete_lines_only else data.rfind(b"\n") + 1
+                if cut > 0 and data[:cut].strip():
+                    rows = pd.read_csv(
+                        io.BytesIO(data[:cut]), header=None, usecols=self.columns, engine="c",
+                    )
+                    added += self._add_columns([
+                        pd.to_numeric(rows[c], errors="coerce").to_numpy(dtype=np.float64)
+                        for c in self.columns
+                    ])
+                self.offset += cut
+                tail = data[cut:]
+                if at_eof:
+                    break
+        finally:
+            if handle is not source:
+                handle.close()
+        return added
+
+    def _update_from_parquet(self, source: Source) -> int:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise TradeHistoryFormatError("Reading Parquet files requires pyarrow.") from e
+        parquet = pq.ParquetFile(source)
+        names = [n.lower() for n in parquet.schema_arrow.names]
+        columns = [parquet.schema_arrow.names[i] for i in self._pick_columns(names)]
+        if parquet.metadata.num_rows < self.offset:
+            self.reset()  # Rewritten with fewer rows rather than appended to
+        added = 0
+        for batch, start, rows_read in iter_unread(parquet, self.offset, ROW_BLOCK, columns):
+            added += self._add_columns([
+                batch.column(i).to_numpy(zero_copy_only=False).astype(np.float64)[start:]
+                for i in range(len(columns))
+            ])
+            self.offset = rows_read
+        return added
+
+    # ─── Estimation ───────────────────────────────────────────────────────────────
+    def estimate(
+        self,
+        kelly_multiplier: float = DEFAULT_KELLY_MULTIPLIER,
+        n_resamples: int = DEFAULT_RESAMPLES,
+        confidence: float = DEFAULT_CONFIDENCE,
+        seed: int = DEFAULT_SEED,
+        workers: Optional[int] = None,
+    ) -> KellyEstimate:
+        """
+        Kelly, fractional Kelly and optimal-f with a bootstrap interval.
+        ``workers`` defaults to the CPU count; with one worker (or one
+        chunk) everything runs in-process.
+        """
+        if not self.trades:
+            raise TradeHistoryFormatError("No closed trades to estimate from.")
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be between 0 and 1.")
+        r_values, counts = self.histogram()
+        kelly = float(kelly_fraction(r_values, counts)[0])
+
+        sizes = [CHUNK_RESAMPLES] * (n_resamples // CHUNK_RESAMPLES)
+        if n_resamples % CHUNK_RESAMPLES:
+            sizes.append(n_resamples % CHUNK_RESAMPLES)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        probabilities = counts / counts.sum()
+        args = [(s, size, r_values, probabilities, self.trades) for s, size in zip(seeds, sizes)]
+        workers = min(workers or os.cpu_count() or 1, len(args))
+        if workers <= 1:
+            chunks = [_bootstrap_chunk(*a) for a in args]
+        else:
+            from monte_carlo import _get_pool
+
+            chunks = list(_get_pool(workers).map(_bootstrap_chunk, *zip(*args)))
+        resampled = np.concatenate(chunks) if chunks else np.array([kelly])
+        tail = (1 - confidence) / 2 * 100
+        low, high = np.percentile(resampled, [tail, 100 - tail])
+
+        worst = min(self.min_r, 0.0)
+        return KellyEstimate(
+            trades=self.trades,
+            win_rate=self.wins / self.trades,
+            average_r=self.sum_r / self.trades,
+            kelly=kelly,
+            kelly_interval=(float(low), float(high)),
+            fractional_kelly=kelly_multiplier * kelly,
+            optimal_f=kelly * abs(worst),
+            growth_per_trade=growth_rate(r_values, counts, kelly),
+            suggested_risk_percent=100 * kelly_multiplier * max(float(low), 0.0),
+        )
@@ -0,0 +1,202 @@
+"""
+Liquidation prices from tiered maintenance-margin tables.
+
+Exchanges set the maintenance margin rate by position notional in brackets
+("tiers"). One table per exchange lives in a JSON file:
+
+    {
+      "exchange": "Example Perps",
+      "tiers": [
+        {"notional_cap": 50000, "maintenance_margin_rate": 0.004, "max_leverage": 125},
+        {"notional_cap": 250000, "maintenance_margin_rate": 0.005, "max_leverage": 100},
+        {"notional_cap": null, "maintenance_margin_rate": 0.5, "max_leverage": 1}
+      ]
+    }
+
+Tier ``i`` covers notionals in ``(cap[i-1], cap[i]]``; a ``null`` cap means
+unbounded and may only appear last. ``maintenance_amount`` (the exchange's
+"cum" deduction) is optional and derived so maintenance margin is continuous
+across tiers when omitted. The sorted caps are searched with ``bisect``
+(``np.searchsorted`` in the batch path) instead of scanning the tiers.
+
+Liquidation assumes an isolated position of one linear contract whose margin
+is the initial margin ``notional / leverage`` (``capital_required``):
+
+    Long:  (q·E − IM − cum) / (q·(1 − mmr))
+    Short: (q·E + IM + cum) / (q·(1 + mmr))
+
+A long whose liquidation price would be at or below zero cannot be
+liquidated and gets ``None`` (NaN in the batch path).
+"""
+import bisect
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from risk_core import Direction
+
+MARGIN_TIERS_DIR = Path(__file__).resolve().parent / "margin_tiers"
+
+
+class MarginTierError(ValueError):
+    """A maintenance-margin table is malformed."""
+
+
+class MarginTier(NamedTuple):
+    notional_cap: float  # Upper bound of the bracket (inclusive); inf for the last
+    maintenance_margin_rate: float
+    maintenance_amount: float
+    max_leverage: float
+
+
+class MarginTiers:
+    """One exchange's tier table, held as sorted parallel lists for bisection."""
+
+    def __init__(self, exchange: str, tiers: List[MarginTier]):
+        if not tiers:
+            raise MarginTierError(f"{exchange}: tier table is empty.")
+        self.exchange = exchange
+        self.tiers = tiers
+        self._caps = [t.notional_cap for t in tiers]
+        self._cap_array = np.array(self._caps, dtype=np.float64)
+        self._rate_array = np.array([t.maintenance_margin_rate for t in tiers], dtype=np.float64)
+        self._amount_array = np.array([t.maintenance_amount for t in tiers], dtype=np.float64)
+        self._max_leverage_array = np.array([t.max_leverage for t in tiers], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.tiers)
+
+    @classmethod
+    def from_dict(cls, data: Dict, exchange: Optional[str] = None) -> "MarginTiers":
+        exchange = str(data.get("exchange") or exchange or "unnamed")
+        rows = data.get("tiers")
+        if not isinstance(rows, list) or not rows:
+            raise MarginTierError(f"{exchange}: 'tiers' must be a non-empty list.")
+
+        tiers: List[MarginTier] = []
+        previous_cap, previous_rate, previous_amount = 0.0, 0.0, 0.0
+        for i, row in enumerate(rows):
+            try:
+                cap = math.inf if row.get("notional_cap") is None else float(row["notional_cap"])
+                rate = float(row["maintenance_margin_rate"])
+                max_leverage = float(row.get("max_leverage", math.inf))
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                raise MarginTierError(f"{exchange}: tier {i + 1} is invalid ({e}).") from None
+            if cap <= previous_cap:
+                raise MarginTierError(f"{exchange}: notional caps must be strictly increasing.")
+            if not 0 <= rate < 1:
+                raise MarginTierError(f"{exchange}: maintenance margin rate must be in [0, 1).")
+            if row.get("maintenance_amount") is None:
+                # Continuous at the boundary: cap·r_prev − amt_prev == cap·r − amt
+                amount = previous_amount + previous_cap * (rate - previous_rate)
+            else:
+                amount = float(row["maintenance_amount"])
+            tiers.append(MarginTier(cap, rate, amount, max_leverage))
+            previous_cap, previous_rate, previous_amount = cap, rate, amount
+        if math.isfinite(tiers[-1].notional_cap):
+            # Notionals past the last cap stay in the last tier
+            tiers[-1] = tiers[-1]._replace(notional_cap=math.inf)
+        return cls(exchange, tiers)
+
+    # ─── Tier lookup ────────────────────────────────────────────────────────────
+    def tier_index(self, notional: float) -> int:
+        """Index of the tier that ``notional`` falls in (O(log tiers))."""
+        return min(bisect.bisect_left(self._caps, notional), len(self._caps) - 1)
+
+    def tier_for(self, notional: float) -> MarginTier:
+        return self.tiers[self.tier_index(notional)]
+
+    def tier_indices(self, notional) -> np.ndarray:
+        """Vectorized ``tier_index``; NaN notionals land in the last tier."""
+        indices = np.searchsorted(self._cap_array, np.asarray(notional, dtype=np.float64), side="left")
+        return np.minimum(indices, len(self._caps) - 1)
+
+    def maintenance_margin(self, notional: float) -> float:
+        tier = self.tier_for(notional)
+        return notional * tier.maintenance_margin_rate - tier.maintenance_amount
+
+    # ─── Liquidation ────────────────────────────────────────────────────────────
+    def liquidation_price(
+        self,
+        entry_price: float,
+        direction: Direction,
+        position_size: float,
+        initial_margin: float,
+    ) -> Optional[float]:
+        """Liquidation price of one isolated position, or None if a long can't be liquidated."""
+        if position_size <= 0 or entry_price <= 0:
+            return None
+        notional = position_size * entry_price
+        tier = self.tier_for(notional)
+        mmr, cum = tier.maintenance_margin_rate, tier.maintenance_amount
+        if direction == "Long":
+            price = (notional - initial_margin - cum) / (position_size * (1 - mmr))
+            return price if price > 0 else None
+        return (notional + initial_margin + cum) / (position_size * (1 + mmr))
+
+    def liquidation_price_batch(self, entry_price, direction, position_size, initial_margin) -> np.ndarray:
+        """Vectorized ``liquidation_price``; NaN where there is none or the row is invalid."""
+        entry_price, position_size, initial_margin = np.broadcast_arrays(*(
+            np.atleast_1d(np.asarray(a, dtype=np.float64))
+            for a in (entry_price, position_size, initial_margin)
+        ))
+        direction = np.broadcast_to(np.asarray(direction, dtype=object), entry_price.shape)
+        notional = position_size * entry_price
+        tier = self.tier_indices(notional)
+        mmr, cum = self._rate_array[tier], self._amount_array[tier]
+        long = direction == "Long"
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price = np.where(
+                long,
+                (notional - initial_margin - cum) / (position_size * (1 - mmr)),
+                (notional + initial_margin + cum) / (position_size * (1 + mmr)),
+            )
+            valid = (position_size > 0) & (entry_price > 0) & (long | (direction == "Short"))
+            price[~valid | (long & (price <= 0))] = np.nan
+        return price
+
+    def max_leverage_batch(self, notional) -> np.ndarray:
+        """Highest leverage the exchange allows for each notional."""
+        return self._max_leverage_array[self.tier_indices(notional)]
+
+
+def stop_past_liquidation(direction, effective_stop_loss, liquidation_price):
+    """
+    True where the position is liquidated before its stop can fill.
+
+    Works on scalars and arrays; a missing (None/NaN) liquidation price is
+    never past the stop.
+    """
+    stop = np.asarray(effective_stop_loss, dtype=np.float64)
+    liquidation = np.asarray(np.nan if liquidation_price is None else liquidation_price, dtype=np.float64)
+    long = np.asarray(direction, dtype=object) == "Long"
+    with np.errstate(invalid="ignore"):
+        past = np.where(long, stop <= liquidation, stop >= liquidation)
+    return bool(past) if past.ndim == 0 else past
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📂 Loading
+# ────────────────────────────────────────────────────────────────────────────────
+def load_margin_tiers(path: Union[str, os.PathLike]) -> MarginTiers:
+    """Read one exchange's table; the file stem names it if the JSON doesn't."""
+    path = Path(path)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as e:
+        raise MarginTierError(f"{path.name}: not valid JSON ({e}).") from None
+    if not isinstance(data, dict):
+        raise MarginTierError(f"{path.name}: expected a JSON object.")
+    return MarginTiers.from_dict(data, exchange=path.stem)
+
+
+def available_tier_files(directory: Union[str, os.PathLike] = MARGIN_TIERS_DIR) -> Dict[str, Path]:
+    """``{file stem: path}`` of every table in ``directory``, sorted by name."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return {}
+    return {path.stem: path for path in sorted(directory.glob("*.json"))}
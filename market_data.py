@@ -0,0 +1,184 @@
+"""
+Process-wide market-data cache shared by every Streamlit session.
+
+Values are the loaded data sets themselves: NumPy arrays, dicts of arrays
+(one per column) or DataFrames. Each entry has its own time-to-live, and the
+least recently used entries are evicted once the cached bytes exceed
+``max_bytes``. Loads are single-flight: while one session loads a key, other
+sessions asking for it wait for that load instead of starting their own.
+
+``stats()`` returns the hit/miss/eviction counters for monitoring.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 600.0  # Seconds an entry is served before it is loaded again
+COUNTERS = ("hits", "misses", "coalesced", "loads", "load_errors", "evictions", "expirations", "oversize")
+
+
+class _Entry(NamedTuple):
+    value: Any
+    nbytes: int
+    expires_at: float  # time.monotonic() deadline
+
+
+class _Flight:
+    """One in-progress load that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def data_nbytes(value: Any) -> int:
+    """
+    Approximate memory held by a cached value: arrays, frames, containers of
+    them, and objects exposing ``nbytes`` or a ``counts`` array (histograms).
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, (int, np.integer)):
+        return int(nbytes)
+    counts = getattr(value, "counts", None)
+    if isinstance(counts, np.ndarray):
+        return counts.nbytes + 64
+    memory_usage = getattr(value, "memory_usage", None)
+    if memory_usage is not None:  # DataFrame or Series
+        usage = memory_usage(index=True, deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(value, dict):
+        return sum(data_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(data_nbytes(v) for v in value)
+    return 64  # Scalars and small objects
+
+
+def _freeze(value: Any):
+    """Make shared arrays read-only so no session can change another's data."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+
+
+class MarketDataCache:
+    """TTL + LRU cache under a memory ceiling, with single-flight loading; safe to share between threads."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, default_ttl: float = DEFAULT_TTL):
+        self.max_bytes = int(max_bytes)
+        self.default_ttl = float(default_ttl)
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._counters = dict.fromkeys(COUNTERS, 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.expires_at > time.monotonic()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        The cached value for ``key``, calling ``loader()`` on a miss.
+
+        Only one caller runs ``loader`` for a key at a time; the others
+        wait and get its result (or its exception, which is not cached).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self._counters["hits"] += 1
+                    self._entries.move_to_end(key)
+                    return entry.value
+                self._counters["expirations"] += 1
+                self._remove(key)
+            self._counters["misses"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+            _freeze(value)
+            flight.value = value
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._counters["load_errors"] += 1
+                del self._flights[key]
+            flight.done.set()
+            raise
+
+        nbytes = data_nbytes(value)
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._counters["loads"] += 1
+            del self._flights[key]
+            if nbytes > self.max_bytes:
+                self._counters["oversize"] += 1  # Served, never cached
+            else:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = _Entry(value, nbytes, expires_at)
+                self._bytes += nbytes
+                self._evict()
+        flight.done.set()
+        return value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Counters since start, plus current ``entries``, ``bytes`` and ``max_bytes``."""
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    # ─── Internals (lock held) ──────────────────────────────────────────────────
+    def _remove(self, key: Hashable):
+        self._bytes -= self._entries.pop(key).nbytes
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used, until under the ceiling."""
+        if self._bytes <= self.max_bytes:
+            return
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if e.expires_at <= now]:
+            self._counters["expirations"] += 1
+            self._remove(key)
+        while self._bytes > self.max_bytes and self._entries:
+            self._counters["evictions"] += 1
+            self._remove(next(iter(self._entries)))
@@ -0,0 +1,162 @@
+"""
+Monte Carlo equity curves for the fixed-fractional ("risk exactly 1%") rule.
+
+Every trade risks ``risk_percent`` of *current* equity: a win multiplies
+equity by ``1 + r * reward_to_risk`` and a loss by ``1 - r``. Paths are
+simulated in fixed-size chunks with NumPy; each chunk gets its own child of a
+``SeedSequence``, so results depend only on the seed, never on how many
+worker processes ran them.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+DEFAULT_PATHS = 100_000
+DEFAULT_TRADES = 100
+DEFAULT_SEED = 42
+CHUNK_PATHS = 12_500  # Paths per task; fixed so results don't depend on the worker count
+DRAWDOWN_THRESHOLDS = (0.10, 0.20, 0.30, 0.50)
+
+
+class SimulationResult(NamedTuple):
+    """Per-path outcomes, all relative to a starting equity of 1.0."""
+
+    final_equity: np.ndarray  # Equity after the last trade
+    max_drawdown: np.ndarray  # Worst peak-to-trough loss, as a fraction
+    time_to_recover: np.ndarray  # Longest stretch of trades spent below a prior peak
+    ended_underwater: np.ndarray  # True if the path finished below its peak
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🎲 Vectorized Path Simulation
+# ────────────────────────────────────────────────────────────────────────────────
+def _simulate_chunk(
+    seed: np.random.SeedSequence,
+    n_paths: int,
+    n_trades: int,
+    win_rate: float,
+    reward_to_risk: float,
+    risk_fraction: float,
+) -> SimulationResult:
+    rng = np.random.default_rng(seed)
+    # Trades x paths layout, so each step of the accumulations below is one
+    # contiguous row of paths
+    wins = rng.random((n_trades, n_paths)) < win_rate
+    factors = np.where(wins, 1.0 + risk_fraction * reward_to_risk, 1.0 - risk_fraction)
+
+    # Row 0 is the starting equity, so a first-trade loss counts as drawdown
+    equity = np.empty((n_trades + 1, n_paths))
+    equity[0] = 1.0
+    np.cumprod(factors, axis=0, out=equity[1:])
+    peaks = np.maximum.accumulate(equity, axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = np.where(peaks > 0, 1.0 - equity / peaks, 0.0)
+    max_drawdown = drawdown.max(axis=0)
+
+    # Longest underwater run: distance from each trade back to the last peak
+    trade_index = np.arange(n_trades + 1, dtype=np.int32)[:, None]
+    at_peak = equity >= peaks
+    last_peak = np.maximum.accumulate(np.where(at_peak, trade_index, 0), axis=0)
+    time_to_recover = (trade_index - last_peak).max(axis=0)
+
+    return SimulationResult(
+        final_equity=equity[-1].copy(),
+        max_drawdown=max_drawdown,
+        time_to_recover=time_to_recover,
+        ended_underwater=~at_peak[-1],
+    )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🏭 Shared Process Pool
+# ────────────────────────────────────────────────────────────────────────────────
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Process-wide pool, created on first use and reused by every session."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._max_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # forkserver avoids forking the (multi-threaded) Streamlit server
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def simulate_equity_paths(
+    win_rate: float,
+    reward_to_risk: float,
+    risk_percent: float,
+    n_paths: int = DEFAULT_PATHS,
+    n_trades: int = DEFAULT_TRADES,
+    seed: int = DEFAULT_SEED,
+    workers: Optional[int] = None,
+) -> SimulationResult:
+    """
+    Simulate ``n_paths`` equity curves of ``n_trades`` fixed-fractional trades.
+
+    ``win_rate`` is a probability (0-1) and ``risk_percent`` is in percent, as
+    in ``calculate_trade_metrics``. ``workers`` defaults to the CPU count;
+    with one worker (or one chunk) everything runs in-process.
+    """
+    if not 0 <= win_rate <= 1:
+        raise ValueError("Win rate must be between 0 and 1.")
+    if n_paths <= 0 or n_trades <= 0:
+        raise ValueError("Number of paths and trades must be positive.")
+
+    sizes = [CHUNK_PATHS] * (n_paths // CHUNK_PATHS)
+    if n_paths % CHUNK_PATHS:
+        sizes.append(n_paths % CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [
+        (s, size, n_trades, win_rate, reward_to_risk, risk_percent / 100)
+        for s, size in zip(seeds, sizes)
+    ]
+
+    workers = min(workers or os.cpu_count() or 1, len(args))
+    if workers <= 1:
+        chunks = [_simulate_chunk(*a) for a in args]
+    else:
+        chunks = list(_get_pool(workers).map(_simulate_chunk, *zip(*args)))
+
+    return SimulationResult(*(np.concatenate(field) for field in zip(*chunks)))
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📊 Summary Statistics
+# ────────────────────────────────────────────────────────────────────────────────
+def summarize(result: SimulationResult) -> Dict[str, float]:
+    """Headline percentiles and drawdown probabilities for display."""
+    final_p5, final_p50, final_p95 = np.percentile(result.final_equity, [5, 50, 95])
+    dd_p50, dd_p95 = np.percentile(result.max_drawdown, [50, 95])
+    ttr_p50, ttr_p95 = np.percentile(result.time_to_recover, [50, 95])
+    summary = {
+        "final_equity_p5": final_p5,
+        "final_equity_p50": final_p50,
+        "final_equity_p95": final_p95,
+        "prob_loss": float(np.mean(result.final_equity < 1.0)),
+        "max_drawdown_p50": dd_p50,
+        "max_drawdown_p95": dd_p95,
+        "time_to_recover_p50": ttr_p50,
+        "time_to_recover_p95": ttr_p95,
+        "prob_ended_underwater": float(np.mean(result.ended_underwater)),
+    }
+    for threshold in DRAWDOWN_THRESHOLDS:
+        summary[f"prob_drawdown_{threshold:.0%}"] = float(np.mean(result.max_drawdown >= threshold))
+    return summary
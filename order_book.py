@@ -0,0 +1,272 @@
+"""
+Depth-aware stop slippage from local L2 order-book snapshots.
+
+Snapshots live in one NPY file per symbol: a structured array (``LEVEL_DTYPE``)
+with one record per price level, sorted by timestamp, then side (bids before
+asks), then best level first. ``cum_size`` and ``cum_notional`` are running
+totals within each (snapshot, side), written by the converter, so walking the
+book for a fill is two binary searches on a memory-mapped file and no pass
+over the levels:
+
+    python order_book.py convert book.csv data/order_books/BTCUSDT.npy
+
+The CSV has ``timestamp,side,price,size`` columns (``side`` is ``bid``/``ask``
+or ``b``/``a``; ``timestamp`` is any integer clock, e.g. Unix milliseconds).
+
+A stop exits into the opposite side of the book (a long's stop sells into the
+bids). The book's shape relative to its best price is applied at the stop, so
+the slippage is ``|VWAP − best| / best`` of filling the whole position. As a
+larger slippage widens the effective stop, which shrinks the position, which
+lowers the slippage, ``converge_slippage`` searches for the slippage that is
+consistent with its own position size.
+"""
+import argparse
+import math
+import os
+from typing import BinaryIO, NamedTuple, Optional, Union
+
+import numpy as np
+
+from risk_core import Direction, TradeMetrics, calculate_trade_metrics
+
+LEVEL_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("side", "i1"),  # BID or ASK
+    ("price", "<f8"),
+    ("size", "<f8"),
+    ("cum_size", "<f8"),  # Running total of size within the snapshot's side
+    ("cum_notional", "<f8"),  # Running total of price·size within the snapshot's side
+])
+BID, ASK = 0, 1
+SIDE_NAMES = {"bid": BID, "b": BID, "buy": BID, "ask": ASK, "a": ASK, "sell": ASK}
+CSV_COLUMNS = ("timestamp", "side", "price", "size")
+CSV_CHUNK_ROWS = 1_000_000
+MAX_ITERATIONS = 60
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+class OrderBookFormatError(ValueError):
+    """The file is not a usable order-book snapshot file."""
+
+
+class Fill(NamedTuple):
+    average_price: float  # Size-weighted fill price
+    slippage_pct: float  # Decimal, relative to the best price
+    levels: int  # Price levels touched
+    beyond_depth: bool  # The book ran out; the rest is assumed filled at the last level
+
+
+class DepthSlippage(NamedTuple):
+    slippage_pct: float  # Decimal, as passed to calculate_trade_metrics
+    metrics: TradeMetrics  # Sized with that slippage
+    fill: Fill
+    iterations: int
+    converged: bool
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📖 Reading Snapshots
+# ────────────────────────────────────────────────────────────────────────────────
+class BookSide:
+    """Levels of one side of one snapshot, best first (views into the memory map)."""
+
+    def __init__(self, levels: np.ndarray):
+        self.price = levels["price"]
+        self.cum_size = levels["cum_size"]
+        self.cum_notional = levels["cum_notional"]
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @property
+    def depth(self) -> float:
+        return float(self.cum_size[-1]) if len(self) else 0.0
+
+    def fill(self, size: float) -> Fill:
+        """Walk the levels for ``size`` units: O(log levels) via the prefix sums."""
+        if not len(self):
+            raise OrderBookFormatError("This side of the book is empty.")
+        best = float(self.price[0])
+        if size <= 0:
+            return Fill(best, 0.0, 0, False)
+        # First level whose running total covers the order
+        k = int(np.searchsorted(self.cum_size, size, side="left"))
+        beyond_depth = k >= len(self)
+        k = min(k, len(self) - 1)
+        filled_before = float(self.cum_size[k - 1]) if k else 0.0
+        cost_before = float(self.cum_notional[k - 1]) if k else 0.0
+        average_price = (cost_before + (size - filled_before) * float(self.price[k])) / size
+        return Fill(average_price, abs(average_price - best) / best, k + 1, beyond_depth)
+
+
+class OrderBookSnapshot(NamedTuple):
+    timestamp: int
+    bids: BookSide
+    asks: BookSide
+
+    def exit_side(self, direction: Direction) -> BookSide:
+        """The side a stop fills against: bids for a long, asks for a short."""
+        return self.bids if direction == "Long" else self.asks
+
+
+class OrderBookFile:
+    """Memory-mapped snapshot file; only the pages of the levels walked are read."""
+
+    def __init__(self, source: Source):
+        levels = np.load(source, mmap_mode="r" if isinstance(source, (str, os.PathLike)) else None)
+        if levels.dtype != LEVEL_DTYPE or levels.ndim != 1:
+            raise OrderBookFormatError("Not an order-book file (convert the CSV with order_book.py convert).")
+        if not len(levels):
+            raise OrderBookFormatError("Order-book file has no levels.")
+        self.levels = levels
+        self._timestamps = levels["timestamp"]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the levels (the most the mapping can pull into memory)."""
+        return self.levels.nbytes
+
+    def snapshot(self, at: Optional[int] = None) -> OrderBookSnapshot:
+        """The latest snapshot taken at or before ``at`` (the latest overall when None)."""
+        timestamps = self._timestamps
+        if at is None:
+            at = int(timestamps[-1])
+        end = int(np.searchsorted(timestamps, at, side="right"))
+        if end == 0:
+            raise OrderBookFormatError(f"No snapshot at or before {at}.")
+        timestamp = int(timestamps[end - 1])
+        start = int(np.searchsorted(timestamps, timestamp, side="left"))
+        levels = self.levels[start:end]
+        split = int(np.searchsorted(levels["side"], ASK, side="left"))
+        return OrderBookSnapshot(timestamp, BookSide(levels[:split]), BookSide(levels[split:]))
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🔁 Size ⇄ Slippage Convergence
+# ────────────────────────────────────────────────────────────────────────────────
+def converge_slippage(
+    side: BookSide,
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: Direction,
+    target_price: float,
+    leverage: float,
+    stop_loss_price: float,
+    size_step: Optional[float] = None,
+    fx_rate: float = 1.0,
+    max_iterations: int = MAX_ITERATIONS,
+) -> DepthSlippage:
+    """
+    The slippage at which the position ``calculate_trade_metrics`` sizes
+    fills with that same slippage against ``side``.
+
+    ``g(s)`` (the book slippage of the size sized with slippage ``s``) only
+    falls as ``s`` grows, so the fixed point lies in ``[0, g(0)]`` and is
+    bisected until the sizes at both ends of the bracket round to the same
+    value. The upper end (the more conservative size) is returned.
+
+    ``fx_rate`` (account units per quote unit) is passed through to the
+    sizing, so an account in another currency walks the book with the size
+    it will actually trade.
+    """
+    def size_with(slippage_pct: float) -> TradeMetrics:
+        return calculate_trade_metrics(
+            liquid_capital, risk_percent, entry_price, direction, target_price,
+            leverage, stop_loss_price, slippage_pct, size_step, fx_rate,
+        )
+
+    low_metrics = size_with(0.0)
+    fill = side.fill(low_metrics.position_size)
+    low, high = 0.0, fill.slippage_pct
+    high_metrics, high_fill = size_with(high), None
+    iterations, converged = 1, False
+    while iterations < max_iterations:
+        if high_metrics.position_size == low_metrics.position_size or math.isclose(low, high):
+            converged = True
+            break
+        middle = (low + high) / 2
+        middle_metrics = size_with(middle)
+        middle_fill = side.fill(middle_metrics.position_size)
+        iterations += 1
+        if middle_fill.slippage_pct > middle:
+            low, low_metrics = middle, middle_metrics
+        else:
+            high, high_metrics, high_fill = middle, middle_metrics, middle_fill
+    if high_fill is None:
+        high_fill = side.fill(high_metrics.position_size)
+    return DepthSlippage(high, high_metrics, high_fill, iterations, converged)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🔄 CSV → NPY Conversion
+# ────────────────────────────────────────────────────────────────────────────────
+def convert_csv(source: Source, destination: Union[str, os.PathLike], chunk_rows: int = CSV_CHUNK_ROWS) -> int:
+    """
+    Convert a ``timestamp,side,price,size`` CSV to the NPY snapshot format.
+
+    Rows may come in any order: levels are sorted (bids by descending,
+    asks by ascending price) and the running totals computed per
+    (snapshot, side). Returns the number of levels written.
+    """
+    import pandas as pd
+
+    parts = []
+    try:
+        reader = pd.read_csv(source, chunksize=chunk_rows, skipinitialspace=True)
+        for chunk in reader:
+            chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+            missing = [c for c in CSV_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise OrderBookFormatError(f"Order-book CSV is missing columns: {', '.join(missing)}.")
+            side = chunk["side"].astype(str).str.strip().str.lower().map(SIDE_NAMES)
+            if side.isna().any():
+                raise OrderBookFormatError("Order-book side must be bid or ask.")
+            part = np.empty(len(chunk), dtype=LEVEL_DTYPE)
+            part["timestamp"] = pd.to_numeric(chunk["timestamp"], errors="raise").to_numpy(dtype=np.int64)
+            part["side"] = side.to_numpy(dtype=np.int8)
+            part["price"] = pd.to_numeric(chunk["price"], errors="raise").to_numpy(dtype=np.float64)
+            part["size"] = pd.to_numeric(chunk["size"], errors="raise").to_numpy(dtype=np.float64)
+            parts.append(part)
+    except (ValueError, pd.errors.ParserError) as e:
+        if isinstance(e, OrderBookFormatError):
+            raise
+        raise OrderBookFormatError(f"Could not read order-book CSV: {e}") from None
+    levels = np.concatenate(parts) if parts else np.empty(0, dtype=LEVEL_DTYPE)
+    if not len(levels):
+        raise OrderBookFormatError("Order-book CSV has no rows.")
+    if not (np.isfinite(levels["price"]).all() and (levels["price"] > 0).all() and (levels["size"] >= 0).all()):
+        raise OrderBookFormatError("Order-book prices must be positive and sizes non-negative.")
+
+    # Best first within each side: bids by descending price, asks by ascending
+    best_first = np.where(levels["side"] == BID, -levels["price"], levels["price"])
+    levels = levels[np.lexsort((best_first, levels["side"], levels["timestamp"]))]
+
+    # Running totals restart at each (snapshot, side): cumsum minus the total before the group
+    group_start = np.ones(len(levels), dtype=bool)
+    group_start[1:] = (np.diff(levels["timestamp"]) != 0) | (np.diff(levels["side"]) != 0)
+    group = np.cumsum(group_start) - 1
+    for field, values in (("cum_size", levels["size"]), ("cum_notional", levels["price"] * levels["size"])):
+        running = np.cumsum(values)
+        before = (running - values)[group_start]
+        levels[field] = running - before[group]
+
+    np.save(destination, levels)
+    return len(levels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="CSV snapshots to the memory-mappable NPY format")
+    convert.add_argument("source", help="timestamp,side,price,size CSV")
+    convert.add_argument("destination", help="NPY file, e.g. data/order_books/BTCUSDT.npy")
+    args = parser.parse_args()
+
+    written = convert_csv(args.source, args.destination)
+    print(f"Wrote {written:,} levels to {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Incremental reads of Parquet files that grow by appended row groups.
+
+A reader that has consumed the first ``offset`` rows resumes with
+``iter_unread``: the footer's row-group row counts locate the group holding
+row ``offset``, so earlier groups are neither read nor decoded. Used by the
+ATR engine (bar files) and the Kelly estimator (trade histories).
+"""
+from typing import TYPE_CHECKING, Iterator, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+def iter_unread(
+    parquet: "pq.ParquetFile",
+    offset: int,
+    batch_size: int,
+    columns: Optional[Sequence[str]] = None,
+) -> Iterator[Tuple["pa.RecordBatch", int, int]]:
+    """
+    ``(batch, start, rows_read)`` for every batch holding rows past ``offset``:
+    ``batch[start:]`` is new, and ``rows_read`` is the offset to store once
+    it has been consumed.
+
+    The caller resets ``offset`` when ``parquet.metadata.num_rows`` falls
+    below it (the file was rewritten rather than appended to).
+    """
+    metadata = parquet.metadata
+    first_group, rows_read = metadata.num_row_groups, 0
+    for i in range(metadata.num_row_groups):
+        group_rows = metadata.row_group(i).num_rows
+        if rows_read + group_rows > offset:
+            first_group = i
+            break
+        rows_read += group_rows
+    if first_group == metadata.num_row_groups:
+        return
+    row_groups = range(first_group, metadata.num_row_groups)
+    for batch in parquet.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=columns):
+        start = max(offset - rows_read, 0)
+        rows_read += batch.num_rows
+        if start < batch.num_rows:
+            yield batch, start, rows_read
@@ -0,0 +1,281 @@
+"""
+Book of open positions with O(1) running portfolio totals.
+
+Every position is sized with ``risk_core.calculate_trade_metrics``. The book
+keeps running totals of open risk, capital used, notional and expected
+reward, updated on each add/remove/edit instead of rescanning the book, and
+checks new trades against the aggregate open-risk cap.
+
+The book's capital and every total are in the account currency. Prices stay
+in each position's quote currency, and the position keeps the ``fx_rate``
+(account units per quote unit) it was sized with, so positions quoted in
+different currencies add up in one currency.
+"""
+import itertools
+import math
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from risk_core import (
+    DEFAULT_RISK_PERCENT,
+    MAX_PORTFOLIO_RISK_PERCENT,
+    Direction,
+    TradeMetrics,
+    TradeValidationError,
+    calculate_trade_metrics,
+)
+
+STATUS_OPEN_RISK_CAP = "open_risk_cap"
+
+
+class OpenRiskCapError(TradeValidationError):
+    """The trade would push total open risk over the portfolio cap."""
+
+    code = STATUS_OPEN_RISK_CAP
+
+
+class Position(NamedTuple):
+    position_id: int
+    symbol: str
+    direction: Direction
+    entry_price: float
+    stop_loss_price: float
+    target_price: float
+    leverage: float
+    slippage_pct: float
+    risk_percent: float
+    size_step: Optional[float]  # Instrument lot step in units; None rounds to 3 decimals
+    quote_currency: str  # Currency of the prices
+    fx_rate: float  # Account units per quote unit when sized
+    metrics: TradeMetrics  # Money amounts in the account currency
+
+    @property
+    def notional(self) -> float:
+        """Position value in the account currency."""
+        return self.metrics.position_size * self.entry_price * self.fx_rate
+
+
+class RiskCheck(NamedTuple):
+    """Outcome of checking one more trade against the open-risk cap."""
+
+    allowed: bool
+    open_risk_after: float
+    open_risk_percent_after: float  # Of total capital
+    cap_amount: float
+    headroom: float  # Risk still available before the trade
+
+
+class _RunningTotal:
+    """Neumaier-compensated running sum with O(1) add and remove."""
+
+    __slots__ = ("_sum", "_compensation")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._sum = 0.0
+        self._compensation = 0.0
+
+    def add(self, value: float):
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._compensation += (self._sum - total) + value
+        else:
+            self._compensation += (value - total) + self._sum
+        self._sum = total
+
+    def remove(self, value: float):
+        self.add(-value)
+
+    @property
+    def value(self) -> float:
+        return self._sum + self._compensation
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📚 Portfolio Book
+# ────────────────────────────────────────────────────────────────────────────────
+class PortfolioBook:
+    """Open positions plus running totals; every mutation is O(1)."""
+
+    def __init__(
+        self,
+        total_capital: float,
+        liquid_capital: float,
+        max_open_risk_percent: float = MAX_PORTFOLIO_RISK_PERCENT,
+    ):
+        self.total_capital = total_capital
+        self.liquid_capital = liquid_capital
+        self.max_open_risk_percent = max_open_risk_percent
+        self._positions: Dict[int, Position] = {}
+        self._ids = itertools.count(1)
+        self._open_risk = _RunningTotal()
+        self._capital_used = _RunningTotal()
+        self._notional = _RunningTotal()
+        self._expected_reward = _RunningTotal()
+
+    # ─── Aggregates ───────────────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[Position]:
+        return iter(self._positions.values())
+
+    def __getitem__(self, position_id: int) -> Position:
+        return self._positions[position_id]
+
+    @property
+    def open_risk(self) -> float:
+        return self._open_risk.value
+
+    @property
+    def capital_used(self) -> float:
+        return self._capital_used.value
+
+    @property
+    def notional(self) -> float:
+        return self._notional.value
+
+    @property
+    def expected_reward(self) -> float:
+        return self._expected_reward.value
+
+    @property
+    def open_risk_percent(self) -> float:
+        """Open risk as a percent of total capital."""
+        return self.open_risk / self.total_capital * 100 if self.total_capital > 0 else math.inf
+
+    @property
+    def cap_amount(self) -> float:
+        return self.total_capital * (self.max_open_risk_percent / 100)
+
+    @property
+    def effective_leverage(self) -> float:
+        """Notional exposure per dollar of margin actually posted."""
+        return self.notional / self.capital_used if self.capital_used > 0 else 0.0
+
+    @property
+    def gross_leverage(self) -> float:
+        """Notional exposure per dollar of total capital."""
+        return self.notional / self.total_capital if self.total_capital > 0 else 0.0
+
+    def check(self, risk_amount: float, replacing: Optional[int] = None) -> RiskCheck:
+        """Would adding ``risk_amount`` (optionally in place of a position) stay under the cap?"""
+        open_risk = self.open_risk
+        if replacing is not None:
+            open_risk -= self._positions[replacing].metrics.risk_amount
+        after = open_risk + risk_amount
+        cap = self.cap_amount
+        return RiskCheck(
+            allowed=after <= cap,
+            open_risk_after=after,
+            open_risk_percent_after=after / self.total_capital * 100 if self.total_capital > 0 else math.inf,
+            cap_amount=cap,
+            headroom=max(cap - open_risk, 0.0),
+        )
+
+    def _cap_error(self, check: RiskCheck) -> OpenRiskCapError:
+        return OpenRiskCapError(
+            f"🚫 Open risk would reach {check.open_risk_percent_after:.2f}% of total capital, "
+            f"above the {self.max_open_risk_percent:g}% cap."
+        )
+
+    # ─── Mutations ────────────────────────────────────────────────────────────────
+    def _size(
+        self,
+        position_id: int,
+        symbol: str,
+        direction: Direction,
+        entry_price: float,
+        stop_loss_price: float,
+        target_price: float,
+        leverage: float,
+        slippage_pct: float,
+        risk_percent: float,
+        size_step: Optional[float] = None,
+        quote_currency: str = "USD",
+        fx_rate: float = 1.0,
+    ) -> Position:
+        metrics = calculate_trade_metrics(
+            self.liquid_capital,
+            risk_percent,
+            entry_price,
+            direction,
+            target_price,
+            leverage,
+            stop_loss_price,
+            slippage_pct,
+            size_step,
+            fx_rate,
+        )
+        return Position(
+            position_id, symbol, direction, entry_price, stop_loss_price, target_price,
+            leverage, slippage_pct, risk_percent, size_step, quote_currency, fx_rate, metrics,
+        )
+
+    def _track(self, position: Position):
+        self._positions[position.position_id] = position
+        self._open_risk.add(position.metrics.risk_amount)
+        self._capital_used.add(position.metrics.capital_required)
+        self._notional.add(position.notional)
+        self._expected_reward.add(position.metrics.expected_reward)
+
+    def _untrack(self, position_id: int) -> Position:
+        position = self._positions.pop(position_id)
+        self._open_risk.remove(position.metrics.risk_amount)
+        self._capital_used.remove(position.metrics.capital_required)
+        self._notional.remove(position.notional)
+        self._expected_reward.remove(position.metrics.expected_reward)
+        return position
+
+    def add(
+        self,
+        symbol: str,
+        direction: Direction,
+        entry_price: float,
+        stop_loss_price: float,
+        target_price: float,
+        leverage: float = 1.0,
+        slippage_pct: float = 0.0,
+        risk_percent: float = DEFAULT_RISK_PERCENT,
+        enforce_cap: bool = True,
+        size_step: Optional[float] = None,
+        quote_currency: str = "USD",
+        fx_rate: float = 1.0,
+    ) -> Position:
+        """
+        Size and book a trade whose prices are in ``quote_currency`` (``fx_rate``
+        account units each); raises ``OpenRiskCapError`` if it breaches the cap.
+        """
+        position = self._size(
+            next(self._ids), symbol, direction, entry_price, stop_loss_price,
+            target_price, leverage, slippage_pct, risk_percent, size_step, quote_currency, fx_rate,
+        )
+        check = self.check(position.metrics.risk_amount)
+        if enforce_cap and not check.allowed:
+            raise self._cap_error(check)
+        self._track(position)
+        return position
+
+    def remove(self, position_id: int) -> Position:
+        """Close a position and take it out of the totals."""
+        return self._untrack(position_id)
+
+    def edit(self, position_id: int, enforce_cap: bool = True, **changes) -> Position:
+        """Re-size a position with some fields changed (e.g. a moved stop)."""
+        old = self._positions[position_id]
+        fields = old._asdict()
+        del fields["metrics"]
+        fields.update(changes)
+        position = self._size(**fields)
+        check = self.check(position.metrics.risk_amount, replacing=position_id)
+        if enforce_cap and not check.allowed:
+            raise self._cap_error(check)
+        self._untrack(position_id)
+        self._track(position)
+        return position
+
+    def clear(self):
+        self._positions.clear()
+        for total in (self._open_risk, self._capital_used, self._notional, self._expected_reward):
+            total.reset()
@@ -0,0 +1,291 @@
+"""
+Live prices for the entry field, shared by every Streamlit session.
+
+A source is either a websocket URL (``ws://127.0.0.1:8766``, the local
+stand-in below or anything speaking the same protocol) or a file that some
+other process appends price lines to. Either way a line is a tick:
+
+    {"symbol": "BTCUSDT", "price": 64012.5, "ts": 1718000000.25}
+    BTCUSDT,64012.5,1718000000.25
+
+(``ts`` is optional). Websocket clients send ``{"subscribe": "<SYMBOL>"}``
+once connected.
+
+``PriceFeedHub`` runs one asyncio loop on a background thread and keeps one
+connection per ``(source, symbol)``, however many sessions watch it. Each
+stream only remembers its latest tick, so bursts are coalesced: readers poll
+``latest()`` at their own rate and never see a backlog. A stream nobody has
+polled for ``idle_timeout`` seconds is closed.
+
+    python price_feed.py serve --symbols BTCUSDT,ETHUSDT --hz 20
+    python price_feed.py serve --file data/prices.txt --symbols BTCUSDT
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+IDLE_TIMEOUT = 30.0  # Seconds a stream survives without being polled
+FILE_POLL_INTERVAL = 0.05  # Seconds between checks for new lines in a tailed file
+RECONNECT_DELAYS = (0.5, 1.0, 2.0, 5.0)  # Backoff after a dropped connection (last one repeats)
+MAX_LINE_BYTES = 4096
+
+
+class PriceFeedError(ValueError):
+    """The price source is not usable."""
+
+
+class PriceTick(NamedTuple):
+    symbol: str
+    price: float
+    timestamp: float  # Source time if given, else arrival (time.time())
+
+
+def parse_tick(line, symbol: Optional[str] = None) -> Optional[PriceTick]:
+    """The tick in one JSON or CSV line; None for other symbols and unusable lines."""
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", errors="replace")
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        if line.startswith("{"):
+            message = json.loads(line)
+            fields = (message.get("symbol", ""), message.get("price"), message.get("ts"))
+        else:
+            fields = (line.split(",") + [None, None])[:3]
+        tick_symbol = str(fields[0]).strip().upper()
+        price = float(fields[1])
+        timestamp = float(fields[2]) if fields[2] not in (None, "") else time.time()
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if not (math.isfinite(price) and price > 0) or (symbol is not None and tick_symbol != symbol):
+        return None
+    return PriceTick(tick_symbol, price, timestamp)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📡 Sources
+# ────────────────────────────────────────────────────────────────────────────────
+def is_websocket(source: str) -> bool:
+    return source.startswith(("ws://", "wss://"))
+
+
+async def tail_file(path: Path, symbol: str) -> AsyncIterator[PriceTick]:
+    """Ticks for ``symbol`` appended to ``path`` from now on (restarts if the file is truncated)."""
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        pending = b""
+        while True:
+            chunk = f.read(64 * 1024)
+            if not chunk:
+                if path.stat().st_size < f.tell():
+                    f.seek(0)  # Truncated or replaced in place: start over
+                    pending = b""
+                await asyncio.sleep(FILE_POLL_INTERVAL)
+                continue
+            *lines, pending = (pending + chunk).split(b"\n")
+            if len(pending) > MAX_LINE_BYTES:
+                pending = b""
+            for line in lines:
+                tick = parse_tick(line, symbol)
+                if tick is not None:
+                    yield tick
+
+
+async def stream_websocket(url: str, symbol: str) -> AsyncIterator[PriceTick]:
+    """Ticks for ``symbol`` from a websocket that streams after a subscribe message."""
+    try:
+        from websockets.asyncio.client import connect
+    except ImportError as e:
+        raise PriceFeedError("Websocket price feeds require the websockets package.") from e
+
+    async with connect(url, max_size=MAX_LINE_BYTES) as connection:
+        await connection.send(json.dumps({"subscribe": symbol}))
+        async for message in connection:
+            tick = parse_tick(message, symbol)
+            if tick is not None:
+                yield tick
+
+
+def open_source(source: str, symbol: str) -> AsyncIterator[PriceTick]:
+    if is_websocket(source):
+        return stream_websocket(source, symbol)
+    return tail_file(Path(source), symbol)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🔀 Shared Streams
+# ────────────────────────────────────────────────────────────────────────────────
+class PriceStream:
+    """One connection's state; ``latest`` is overwritten by every tick (readers see the newest only)."""
+
+    def __init__(self, source: str, symbol: str):
+        self.source = source
+        self.symbol = symbol
+        self.latest: Optional[PriceTick] = None
+        self.ticks = 0  # Received, including the ones no reader saw
+        self.error: Optional[str] = None  # Last connection error, cleared by the next tick
+        self.polled_at = time.monotonic()
+        self.future: Optional[Future] = None
+
+
+class PriceFeedHub:
+    """Background asyncio loop multiplexing sessions onto one stream per ``(source, symbol)``; thread-safe."""
+
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._streams: Dict[Tuple[str, str], PriceStream] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connections = 0  # Streams ever opened
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="price-feed", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(self._reap_idle(), loop)
+            self._loop = loop
+        return self._loop
+
+    def subscribe(self, source: str, symbol: str) -> PriceStream:
+        """The shared stream for ``symbol`` on ``source``, opened on first use; polling keeps it alive."""
+        symbol = symbol.strip().upper()
+        key = (source, symbol)
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._streams[key] = PriceStream(source, symbol)
+                stream.future = asyncio.run_coroutine_threadsafe(self._run(stream), self._ensure_loop())
+                self.connections += 1
+            stream.polled_at = time.monotonic()
+        return stream
+
+    def latest(self, source: str, symbol: str) -> Optional[PriceTick]:
+        return self.subscribe(source, symbol).latest
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "streams": len(self._streams),
+                "connections": self.connections,
+                "ticks": sum(s.ticks for s in self._streams.values()),
+            }
+
+    def close(self):
+        with self._lock:
+            streams, self._streams = list(self._streams.values()), {}
+        for stream in streams:
+            stream.future.cancel()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+    async def _run(self, stream: PriceStream):
+        attempt = 0
+        while True:
+            try:
+                async for tick in open_source(stream.source, stream.symbol):
+                    stream.latest, stream.error = tick, None
+                    stream.ticks += 1
+                    attempt = 0
+                stream.error = "Source closed the stream"
+            except asyncio.CancelledError:
+                raise
+            except PriceFeedError as e:
+                stream.error = str(e)
+                return
+            except Exception as e:  # Connection refused, file missing, protocol errors
+                stream.error = f"{type(e).__name__}: {e}"
+                logger.info("Price feed %s %s: %s", stream.source, stream.symbol, stream.error)
+            await asyncio.sleep(RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)])
+            attempt += 1
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            now = time.monotonic()
+            with self._lock:
+                idle = [k for k, s in self._streams.items() if now - s.polled_at > self.idle_timeout]
+                # Finished streams are dropped too, so the next subscriber reconnects
+                idle += [k for k, s in self._streams.items() if s.future.done() and k not in idle]
+                streams = [self._streams.pop(k) for k in idle]
+            for stream in streams:
+                stream.future.cancel()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧪 Local Stand-in Feed
+# ────────────────────────────────────────────────────────────────────────────────
+def _random_walk(start: float, volatility: float):
+    price = start
+    while True:
+        price *= math.exp(random.gauss(0.0, volatility))
+        yield round(price, 2)
+
+
+async def serve_websocket(host: str, port: int, start: float, hz: float, volatility: float):
+    """Random-walk ticks at ``hz`` for whichever symbol each client subscribes to."""
+    from websockets.asyncio.server import serve
+
+    async def handler(connection):
+        request = json.loads(await connection.recv())
+        symbol = str(request.get("subscribe", "")).strip().upper()
+        for price in _random_walk(start, volatility):
+            await connection.send(json.dumps({"symbol": symbol, "price": price, "ts": time.time()}))
+            await asyncio.sleep(1 / hz)
+
+    async with serve(handler, host, port):
+        logger.info("Serving random-walk prices on ws://%s:%d", host, port)
+        await asyncio.Future()
+
+
+async def append_to_file(path: Path, symbols, start: float, hz: float, volatility: float):
+    """Append one random-walk line per symbol to ``path`` at ``hz``."""
+    walks = {symbol: _random_walk(start, volatility) for symbol in symbols}
+    logger.info("Appending random-walk prices to %s", path)
+    while True:
+        with open(path, "a", encoding="utf-8") as f:
+            for symbol, walk in walks.items():
+                f.write(f"{symbol},{next(walk)},{time.time()}\n")
+        await asyncio.sleep(1 / hz)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run a random-walk stand-in feed")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--file", type=Path, help="append lines to this file instead of serving a websocket")
+    serve.add_argument("--symbols", default="BTCUSDT", help="comma-separated (file mode)")
+    serve.add_argument("--start", type=float, default=100.0, help="starting price")
+    serve.add_argument("--hz", type=float, default=10.0, help="ticks per second")
+    serve.add_argument("--volatility", type=float, default=0.0005, help="log-return stdev per tick")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.file is not None:
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+        job = append_to_file(args.file, symbols, args.start, args.hz, args.volatility)
+    else:
+        job = serve_websocket(args.host, args.port, args.start, args.hz, args.volatility)
+    try:
+        asyncio.run(job)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
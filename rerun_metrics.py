@@ -0,0 +1,188 @@
+"""
+Opt-in per-stage rerun timing for the Streamlit page.
+
+``RerunProfiler`` times the stages of one rerun; every finished stage is also
+pushed into the process-wide ``REGISTRY``, which keeps a rolling window of
+samples per stage (shared by all sessions) and renders them in the Prometheus
+text exposition format, either to a file or on a local HTTP endpoint.
+
+Configuration (environment variables):
+    RISK_CALC_PROFILE=1              enable timing and the debug expander
+    RISK_CALC_METRICS_FILE=path      rewrite this file after every rerun
+    RISK_CALC_METRICS_PORT=9464      serve /metrics on 127.0.0.1:<port>
+"""
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+PROFILE_ENV = "RISK_CALC_PROFILE"
+METRICS_FILE_ENV = "RISK_CALC_METRICS_FILE"
+METRICS_PORT_ENV = "RISK_CALC_METRICS_PORT"
+
+METRIC_NAME = "risk_calc_rerun_stage_seconds"
+DEFAULT_WINDOW = 1024  # Samples kept per stage for rolling percentiles
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def profiling_enabled() -> bool:
+    """True when ``RISK_CALC_PROFILE`` is set to a truthy value."""
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📈 Rolling Stage Statistics (process-wide)
+# ────────────────────────────────────────────────────────────────────────────────
+class StageMetrics:
+    """Thread-safe rolling latency samples per stage plus lifetime sum/count."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._sum: Dict[str, float] = {}
+        self._count: Dict[str, int] = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._sum[stage] = 0.0
+                self._count[stage] = 0
+            samples.append(seconds)
+            self._sum[stage] += seconds
+            self._count[stage] += 1
+
+    def percentiles(
+        self, stage: str, quantiles: Sequence[float] = DEFAULT_QUANTILES
+    ) -> List[float]:
+        """Nearest-rank percentiles over the rolling window (NaN if no samples)."""
+        with self._lock:
+            ordered = sorted(self._samples.get(stage, ()))
+        if not ordered:
+            return [math.nan] * len(quantiles)
+        return [ordered[max(0, math.ceil(q * len(ordered)) - 1)] for q in quantiles]
+
+    def snapshot(
+        self, quantiles: Sequence[float] = DEFAULT_QUANTILES
+    ) -> Dict[str, Tuple[List[float], float, int]]:
+        """Per stage: (percentiles, lifetime sum, lifetime count)."""
+        with self._lock:
+            stages = list(self._samples)
+            totals = {s: (self._sum[s], self._count[s]) for s in stages}
+        return {s: (self.percentiles(s, quantiles), *totals[s]) for s in stages}
+
+    def render_prometheus(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> str:
+        """Prometheus text exposition (one ``summary`` labelled by stage)."""
+        lines = [
+            f"# HELP {METRIC_NAME} Streamlit rerun stage latency (rolling window quantiles).",
+            f"# TYPE {METRIC_NAME} summary",
+        ]
+        for stage, (values, total, count) in sorted(self.snapshot(quantiles).items()):
+            for q, value in zip(quantiles, values):
+                lines.append(f'{METRIC_NAME}{{stage="{stage}",quantile="{q:g}"}} {value:.9g}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total:.9g}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str):
+        """Atomically replace ``path`` with the current exposition text."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+REGISTRY = StageMetrics()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# ⏱️ Per-Rerun Profiler
+# ────────────────────────────────────────────────────────────────────────────────
+class RerunProfiler:
+    """Times the stages of one rerun; a no-op when disabled."""
+
+    def __init__(self, enabled: bool = False, registry: StageMetrics = REGISTRY):
+        self.enabled = enabled
+        self.registry = registry
+        self.timings: Dict[str, float] = {}
+        self.finished = False
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = elapsed
+            self.registry.observe(name, elapsed)
+
+    def stage(self, name: str):
+        """Context manager timing ``name``; recorded even if the stage raises."""
+        return self._timed(name) if self.enabled else nullcontext()
+
+    def finish(self):
+        """Record the total rerun time and export metrics if configured."""
+        self.finished = True
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - self._started
+        self.timings["total"] = elapsed
+        self.registry.observe("total", elapsed)
+
+        path = os.environ.get(METRICS_FILE_ENV)
+        if path:
+            self.registry.write_prometheus_file(path)
+        port = os.environ.get(METRICS_PORT_ENV)
+        if port:
+            serve_metrics(int(port), registry=self.registry)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🌐 Local /metrics Endpoint
+# ────────────────────────────────────────────────────────────────────────────────
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(
+    port: int, host: str = "127.0.0.1", registry: StageMetrics = REGISTRY
+) -> ThreadingHTTPServer:
+    """Start (once per process) a background HTTP server exposing ``/metrics``."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are frequent; keep them out of the app log
+
+        _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True)
+        thread.start()
+        return _server
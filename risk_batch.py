@@ -0,0 +1,345 @@
+"""
+Vectorized batch sizing on top of ``risk_core``.
+
+Kept separate from the core because NumPy/pandas dominate import time; only
+callers that size many trades at once need to pay for them.
+"""
+from decimal import Decimal
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from risk_core import (
+    HIGH_CAPITAL_USAGE,
+    MAX_LEVERAGE_WARNING,
+    MIN_REWARD_RISK_RATIO,
+    MIN_STOP_PRICE,
+    NOTICE_CAPITAL_EXCEEDED,
+    NOTICE_HIGH_CAPITAL_USAGE,
+    NOTICE_HIGH_LEVERAGE,
+    NOTICE_LOW_REWARD_RISK,
+    NOTICE_STOP_PAST_LIQUIDATION,
+    NOTICE_WIDE_STOP,
+    POSITION_SIZE_DECIMALS,
+    STATUS_INVALID_DIRECTION,
+    STATUS_INVALID_ENTRY,
+    STATUS_INVALID_FX_RATE,
+    STATUS_OK,
+    STATUS_STOP_WRONG_SIDE,
+    STATUS_ZERO_RISK,
+    WIDE_STOP_PERCENT,
+    floor_to_step,
+    round_to_step,
+)
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧮 Batch Calculations (vectorized)
+# ────────────────────────────────────────────────────────────────────────────────
+BATCH_OUTPUT_COLUMNS = [
+    "risk_amount",
+    "position_size",
+    "effective_stop_loss",
+    "capital_required",
+    "expected_reward",
+    "reward_to_risk",
+]
+
+
+def _two_product(a: np.ndarray, b: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (p, err) with p + err == a * b exactly (Dekker/Veltkamp split)."""
+    p = a * b
+    c = 134217729.0 * a  # 2**27 + 1
+    a_hi = c - (c - a)
+    a_lo = a - a_hi
+    c = 134217729.0 * b
+    b_hi = c - (c - b)
+    b_lo = b - b_hi
+    err = ((a_hi * b_hi - p) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+    return p, err
+
+
+def round_half_even(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Vectorized equivalent of Python's built-in ``round(x, ndigits)``.
+
+    ``np.round`` scales by 10**ndigits in floating point, which can land on the
+    wrong side of a tie. Here the scaled value is carried as an exact
+    (hi, lo) pair so ties are decided on the true binary value, exactly like
+    CPython's correctly-rounded ``round``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    with np.errstate(invalid="ignore", over="ignore"):
+        hi, lo = _two_product(values, scale)
+        k = np.rint(hi)
+        diff = hi - k
+        k = np.where((diff == 0.5) & (lo > 0), k + 1, k)
+        k = np.where((diff == -0.5) & (lo < 0), k - 1, k)
+        out = k / scale
+
+        # Beyond 2**52 the scaled value has no fractional part to round; defer
+        # the (practically unreachable) huge magnitudes to Python itself.
+        huge = np.isfinite(values) & (np.abs(hi) >= 2.0 ** 52)
+    if huge.any():
+        out[huge] = [round(float(v), ndigits) for v in values[huge]]
+    return out
+
+
+def _decimal_steps(step) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ``(m, scale)`` per element with ``step == m / scale`` exactly for the
+    decimal the step prints as; ``m`` is an integer and ``scale`` a power
+    of ten. NaN where the step is not a positive finite number.
+    """
+    step = np.asarray(step, dtype=np.float64)
+    unique, inverse = np.unique(step, return_inverse=True)
+    m = np.full(len(unique), np.nan)
+    scale = np.full(len(unique), np.nan)
+    for i, value in enumerate(unique.tolist()):
+        if not (np.isfinite(value) and value > 0):
+            continue
+        _, digits, exponent = Decimal(repr(value)).as_tuple()
+        mantissa = int("".join(map(str, digits)))
+        if exponent >= 0:
+            m[i], scale[i] = mantissa * 10 ** exponent, 1.0
+        else:
+            m[i], scale[i] = mantissa, 10.0 ** -exponent
+    return m[inverse].reshape(step.shape), scale[inverse].reshape(step.shape)
+
+
+def _snap_to_step(values, step, nearest: bool) -> np.ndarray:
+    """
+    Vectorized ``risk_core.floor_to_step`` / ``round_to_step``.
+
+    ``values · scale`` is carried as an exact (hi, lo) pair, so the whole
+    steps and the remainder are exact; the few values too large for that
+    fall back to the scalar functions.
+    """
+    step = np.asarray(step, dtype=np.float64)
+    m, scale = _decimal_steps(step)  # Before broadcasting: one decimal parse per distinct step
+    values, step, m, scale = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(values, dtype=np.float64)), step, m, scale
+    )
+    with np.errstate(invalid="ignore", over="ignore"):
+        hi, lo = _two_product(values, scale)
+        steps = np.floor(hi / m)
+        # hi/m is rounded, so the floor can be one off either way; the
+        # remainder (hi - steps·m) + lo is exact, so correct against it
+        steps = np.where(hi - steps * m < -lo, steps - 1, steps)
+        steps = np.where(hi - steps * m - m >= -lo, steps + 1, steps)
+        # Same rule as the scalar path: the nearest float to a multiple is that multiple
+        steps = np.where((steps + 1) * m / scale == values, steps + 1, steps)
+        if nearest:
+            half = (2 * steps + 1) * m / (2 * scale)
+            steps = np.where((values > half) | ((values == half) & (steps % 2 == 1)), steps + 1, steps)
+        out = steps * m / scale
+
+        inexact = np.isfinite(values) & np.isfinite(m) & (
+            (np.abs(hi) >= 2.0 ** 52) | (np.abs(steps * m) >= 2.0 ** 52) | (scale > 1e22)
+        )
+    if inexact.any():
+        scalar = round_to_step if nearest else floor_to_step
+        out[inexact] = [scalar(float(v), float(s)) for v, s in zip(values[inexact], step[inexact])]
+    return out
+
+
+def floor_to_step_batch(values, step) -> np.ndarray:
+    """Vectorized ``risk_core.floor_to_step``; ``step`` may vary per element."""
+    return _snap_to_step(values, step, nearest=False)
+
+
+def round_to_step_batch(values, step) -> np.ndarray:
+    """Vectorized ``risk_core.round_to_step``; ``step`` may vary per element."""
+    return _snap_to_step(values, step, nearest=True)
+
+
+def calculate_trade_metrics_batch(
+    liquid_capital,
+    risk_percent,
+    entry_price,
+    direction,
+    target_price,
+    leverage,
+    stop_loss_price,
+    slippage_pct,
+    size_step=None,
+    fx_rate=1.0,
+) -> pd.DataFrame:
+    """
+    Vectorized ``calculate_trade_metrics`` over columnar inputs.
+
+    Every argument may be a scalar or an array-like; they are broadcast
+    together. Invalid rows are not fatal: their outputs are NaN and the
+    ``status`` column says why (see the ``STATUS_*`` constants). Rows with a
+    ``size_step`` (NaN for none) are floored to it instead of rounded.
+    ``fx_rate`` converts each row's quote currency to its account currency
+    (``FxRates.rate_batch(quote, account)``; NaN for an unknown pair).
+    """
+    (
+        liquid_capital,
+        risk_percent,
+        entry_price,
+        target_price,
+        leverage,
+        stop_loss_price,
+        slippage_pct,
+        fx_rate,
+        direction,
+    ) = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(liquid_capital, dtype=np.float64)),
+        np.asarray(risk_percent, dtype=np.float64),
+        np.asarray(entry_price, dtype=np.float64),
+        np.asarray(target_price, dtype=np.float64),
+        np.asarray(leverage, dtype=np.float64),
+        np.asarray(stop_loss_price, dtype=np.float64),
+        np.asarray(slippage_pct, dtype=np.float64),
+        np.asarray(fx_rate, dtype=np.float64),
+        np.asarray(direction, dtype=object),
+    )
+    is_long = direction == "Long"
+    is_short = direction == "Short"
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1) Amount you're risking (account currency)
+        risk_amount = liquid_capital * (risk_percent / 100)
+
+        # 2) Effective stop loss with slippage
+        effective_stop_loss = np.where(
+            slippage_pct > 0,
+            np.where(
+                is_long,
+                stop_loss_price * (1 - slippage_pct),
+                stop_loss_price * (1 + slippage_pct),
+            ),
+            stop_loss_price,
+        )
+
+        actual_risk_per_unit = np.abs(entry_price - effective_stop_loss)
+
+        # Row status, first failing check wins (same order as the scalar path)
+        status = np.full(entry_price.shape, STATUS_OK, dtype=object)
+        zero_risk = actual_risk_per_unit == 0
+        status[zero_risk] = STATUS_ZERO_RISK
+        wrong_side = (is_long & (effective_stop_loss >= entry_price)) | (
+            is_short & (effective_stop_loss <= entry_price)
+        )
+        status[wrong_side] = STATUS_STOP_WRONG_SIDE
+        status[~((fx_rate > 0) & np.isfinite(fx_rate))] = STATUS_INVALID_FX_RATE
+        status[~(is_long | is_short)] = STATUS_INVALID_DIRECTION
+        status[~(entry_price > 0)] = STATUS_INVALID_ENTRY
+        valid = status == STATUS_OK
+
+        raw_size = risk_amount / fx_rate / actual_risk_per_unit
+        position_size = round_half_even(raw_size, POSITION_SIZE_DECIMALS)
+        if size_step is not None:
+            size_step = np.broadcast_to(np.asarray(size_step, dtype=np.float64), raw_size.shape)
+            stepped = np.isfinite(size_step) & (size_step > 0)
+            if stepped.any():
+                position_size[stepped] = floor_to_step_batch(raw_size[stepped], size_step[stepped])
+        position_value = position_size * entry_price
+        capital_required = np.where(leverage > 0, position_value / leverage * fx_rate, 0.0)
+
+        reward_per_unit = np.abs(target_price - entry_price)
+        expected_reward = reward_per_unit * position_size * fx_rate
+        reward_to_risk = np.where(risk_amount > 0, expected_reward / risk_amount, 0.0)
+
+    result = pd.DataFrame(
+        {
+            "risk_amount": risk_amount,
+            "position_size": position_size,
+            "effective_stop_loss": effective_stop_loss,
+            "capital_required": capital_required,
+            "expected_reward": expected_reward,
+            "reward_to_risk": reward_to_risk,
+        }
+    )
+    result.loc[~valid, BATCH_OUTPUT_COLUMNS] = np.nan
+    result["status"] = status
+    return result
+
+
+def suggest_stop_loss_batch(
+    entry_price,
+    direction,
+    liquid_capital,
+    risk_percent,
+    leverage,
+    use_atr=False,
+    atr_value=0.0,
+    atr_multiplier=0.0,
+) -> np.ndarray:
+    """Vectorized ``risk_core.suggest_stop_loss`` (ATR or fixed-risk per row)."""
+    (
+        entry_price,
+        liquid_capital,
+        risk_percent,
+        leverage,
+        atr_value,
+        atr_multiplier,
+        use_atr,
+        direction,
+    ) = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(entry_price, dtype=np.float64)),
+        np.asarray(liquid_capital, dtype=np.float64),
+        np.asarray(risk_percent, dtype=np.float64),
+        np.asarray(leverage, dtype=np.float64),
+        np.asarray(atr_value, dtype=np.float64),
+        np.asarray(atr_multiplier, dtype=np.float64),
+        np.asarray(use_atr, dtype=bool),
+        np.asarray(direction, dtype=object),
+    )
+    is_long = direction == "Long"
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # ATR mode
+        atr_distance = atr_value * atr_multiplier
+        atr_stop = np.where(is_long, entry_price - atr_distance, entry_price + atr_distance)
+
+        # Fixed-risk mode
+        risk_amount = liquid_capital * (risk_percent / 100)
+        max_units = np.where(entry_price > 0, (liquid_capital * leverage) / entry_price, 0.0)
+        risk_per_unit = np.where(max_units > 0, risk_amount / max_units, 0.0)
+        fixed_stop = np.where(is_long, entry_price - risk_per_unit, entry_price + risk_per_unit)
+
+    stop = np.where(use_atr & (atr_value > 0), atr_stop, fixed_stop)
+    # fmax (not maximum) so NaN behaves like the scalar max(MIN_STOP_PRICE, nan)
+    return np.fmax(MIN_STOP_PRICE, stop)
+
+
+def trade_notices_batch(
+    liquid_capital,
+    leverage,
+    entry_price,
+    effective_stop_loss,
+    capital_required,
+    reward_to_risk,
+    past_liquidation=None,
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized ``risk_core.trade_notices``: one boolean array per ``NOTICE_*``
+    code, in display order. Rows with NaN metrics (invalid trades) get no
+    notices other than high leverage. The liquidation notice is only
+    included when ``past_liquidation`` is given.
+    """
+    liquid_capital, leverage, entry_price, effective_stop_loss, capital_required, reward_to_risk = (
+        np.broadcast_arrays(*(np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (
+            liquid_capital, leverage, entry_price, effective_stop_loss, capital_required, reward_to_risk,
+        )))
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        capital_exceeded = capital_required > liquid_capital
+        stop_distance_pct = np.abs(entry_price - effective_stop_loss) / entry_price * 100
+    notices = {}
+    if past_liquidation is not None:
+        notices[NOTICE_STOP_PAST_LIQUIDATION] = np.broadcast_to(
+            np.asarray(past_liquidation, dtype=bool), leverage.shape
+        )
+    notices.update({
+        NOTICE_HIGH_LEVERAGE: leverage >= MAX_LEVERAGE_WARNING,
+        NOTICE_LOW_REWARD_RISK: reward_to_risk < MIN_REWARD_RISK_RATIO,
+        NOTICE_CAPITAL_EXCEEDED: capital_exceeded,
+        NOTICE_HIGH_CAPITAL_USAGE: ~capital_exceeded & (capital_required > HIGH_CAPITAL_USAGE * liquid_capital),
+        NOTICE_WIDE_STOP: stop_distance_pct > WIDE_STOP_PERCENT,
+    })
+    return notices
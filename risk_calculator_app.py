@@ -1,21 +1,72 @@
 import streamlit as st
-from PIL import Image
-from typing import Literal, Tuple
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, Optional, Tuple
+import hashlib
+import io
 import logging
-
-# ────────────────────────────────────────────────────────────────────────────────
-# Constants
-# ────────────────────────────────────────────────────────────────────────────────
-DEFAULT_RISK_PERCENT = 1.000
-MIN_LEVERAGE = 1.000
-MAX_LEVERAGE_WARNING = 10.000  # Threshold for high leverage warning
-MIN_REWARD_RISK_RATIO = 2.000
-DEFAULT_SLIPPAGE = 0.100  # 0.1% more realistic for crypto
+import math
+import os
+import sqlite3
+import tempfile
+import time
+
+from risk_core import (
+    DEFAULT_RISK_PERCENT,
+    DEFAULT_SLIPPAGE,
+    MIN_LEVERAGE,
+    MIN_REWARD_RISK_RATIO,
+    NOTICE_BELOW_MIN_NOTIONAL,
+    NOTICE_CAPITAL_EXCEEDED,
+    NOTICE_HIGH_CAPITAL_USAGE,
+    NOTICE_HIGH_LEVERAGE,
+    NOTICE_LOW_REWARD_RISK,
+    NOTICE_STOP_PAST_LIQUIDATION,
+    NOTICE_WIDE_STOP,
+    TradeMetrics,
+    TradeValidationError,
+    calculate_trade_metrics,
+    suggest_stop_loss,
+    trade_notices,
+)
+from rerun_metrics import REGISTRY, RerunProfiler, profiling_enabled
+
+if TYPE_CHECKING:
+    # Annotations only; the modules themselves are imported where they're used
+    import pandas as pd
+    from streamlit.delta_generator import DeltaGenerator
+
+    from atr_engine import WilderATR
+    from correlation_risk import CovarianceCache
+    from fx_rates import FxRates
+    from instruments import Instrument, InstrumentRegistry
+    from kelly import TradeOutcomes
+    from liquidation import MarginTiers
+    from market_data import MarketDataCache
+    from order_book import OrderBookFile
+    from portfolio_book import PortfolioBook
+    from price_feed import PriceFeedHub
+    from trade_history import TradeHistory
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+DATA_DIR = Path(os.environ.get("RISK_CALC_DATA_DIR", Path(__file__).resolve().parent / "data"))
+ORDER_BOOK_DIR = DATA_DIR / "order_books"  # <SYMBOL>.npy snapshot files (see order_book.py)
+MARKET_DATA_CACHE_MB = float(os.environ.get("RISK_CALC_MARKET_CACHE_MB", 256))
+FX_CACHE_TTL = float(os.environ.get("RISK_CALC_FX_TTL", 60))  # Seconds FX rates are reused
+CURRENCY_SYMBOLS = {"USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥"}
+QUOTE_AUTO = "Auto"  # Quote currency from the symbol's suffix (BTCUSDT -> USDT)
+PRICE_FEED_SOURCE = os.environ.get("RISK_CALC_PRICE_FEED", "ws://127.0.0.1:8766")  # Or a file in DATA_DIR
+LIVE_REFRESH_SECONDS = 1.0  # Default interval between live results refreshes
+MIN_LIVE_REFRESH_SECONDS = 0.2
+HISTORY_DB = Path(os.environ.get("RISK_CALC_HISTORY_DB", DATA_DIR / "trade_history.sqlite3"))
+STYLESHEET_NAME = "risk_calculator.css"
+LOGO_WIDTH = 150
+BOOK_ROWS_SHOWN = 20  # Most recent positions listed in the portfolio book
+CORRELATION_ROWS_SHOWN = 20  # Largest VaR contributors listed
+
 # ────────────────────────────────────────────────────────────────────────────────
 # 📄 Page Setup (must be the very first Streamlit call)
 # ────────────────────────────────────────────────────────────────────────────────
@@ -25,211 +76,39 @@ def setup_page():
         page_icon="📊",
         layout="centered"
     )
-    st.cache_data.clear()
 
     # ─── 1. Themed Custom CSS with Subtle Animations ─────────────────────────────────
-    st.markdown(
-        """
-        <style>
-            /*── Global Styling (Body Background) ──────────────────────────────────*/
-            body {
-                /* A subtle, dark geometric pattern for a futuristic feel */
-                background-image: url("data:image/svg+xml,%3Csvg width='60' height='60' viewBox='0 0 60 60' xmlns='http://www.w3.org/2000/svg'%3E%3Cg fill='none' fill-rule='evenodd'%3E%3Cg fill='%239C92B3' fill-opacity='0.08'%3E%3Cpath d='M36 34v-4h-2v4h-4v2h4v4h2v-4h4v-2h-4zm0-30V0h-2v4h-4v2h4v4h2V6h4V4h-4zm0 40v-4h-2v4h-4v2h4v4h2v-4h4v-2h-4zm0 12v-4h-2v4h-4v2h4v4h2v-4h4v-2h-4zm-30 0v-4h-2v4H0v2h4v4h2v-4h4v-2H6zm0-40V0h-2v4H0v2h4v4h2V6h4V4H6zm0 12v-4h-2v4H0v2h4v4h2v-4h4v-2H6zm0 12v-4h-2v4H0v2h4v4h2v-4h4v-2H6zm30-12v-4h-2v4h-4v2h4v4h2v-4h4v-2h-4zM24 2c3.314 0 6 2.686 6 6s-2.686 6-6 6-6-2.686-6-6 2.686-6 6-6zm0 40c3.314 0 6 2.686 6 6s-2.686 6-6 6-6-2.686-6-6 2.686-6 6-6z'/%3E%3C/g%3E%3C/g%3E%3C/svg%3E");
-                background-color: #0F0F1A; /* Even darker base background */
-            }
-
-            /*── General Spacing Improvements ─────────────────────────────────────────*/
-            .stNumberInput, .stRadio, .stCheckbox {
-                margin-bottom: 1.25rem; /* Slightly more vertical space */
-                transition: all 0.2s ease-in-out; /* Smooth transition for interaction */
-            }
-
-            /*── Number Input Specifics (Digital Readout Look) ────────────────────────*/
-            .stNumberInput > div > div > input {
-                font-family: 'Space Mono', monospace; /* Digital font */
-                background-color: #1A1A2E; /* Darker input background */
-                border: 1px solid #3A3A50; /* Subtle border */
-                border-radius: 0.5rem;
-                padding: 0.75rem 1rem;
-                color: #00FFC0; /* Neon green text for values */
-                transition: all 0.3s ease-in-out;
-            }
-            .stNumberInput > div > div > input:focus {
-                box-shadow: 0 0 0 2px #BB86FC, 0 0 10px #BB86FC; /* Highlight with glow on focus */
-                border-color: #BB86FC;
-            }
-
-            /*── Radio Button (Long/Short) as Toggle ──────────────────────────────────*/
-            .stRadio > label {
-                background-color: #28283D;
-                border-radius: 0.75rem;
-                padding: 0.5rem 0.75rem;
-                margin-right: 0.5rem; /* Space between options */
-                cursor: pointer;
-                transition: all 0.3s ease;
-                font-weight: bold;
-                color: #E0E0E0;
-            }
-            .stRadio > label:hover {
-                background-color: #3A3A50;
-                transform: translateY(-2px);
-            }
-            /* Style for the actual radio input (hidden) */
-            .stRadio > label > input[type="radio"] {
-                display: none;
-            }
-            /* Style for selected radio option */
-            .stRadio > label > input[type="radio"]:checked + div {
-                background-color: transparent; /* Remove default radio dot */
-            }
-            .stRadio > label > input[type="radio"]:checked + div > p {
-                /* Apply color to the text of the selected option */
-                color: #00FFC0; /* Default selected color */
-            }
-            /* Specific colors for Long/Short selection */
-            .stRadio > div > label:nth-of-type(1) input[type="radio"]:checked + div p {
-                color: #00FF80; /* Green for Long */
-            }
-            .stRadio > div > label:nth-of-type(2) input[type="radio"]:checked + div p {
-                color: #FF6347; /* Red for Short */
-            }
-
-
-            /*── Checkbox Hover ───────────────────────────────────────────────────────*/
-            .stCheckbox > label:hover {
-                box-shadow: 0 0 0 2px #BB86FC; /* Highlight on hover */
-                border-color: #BB86FC;
-            }
-
-            /*── Enhanced Metric Cards (Subtle Glow) ──────────────────────────────────*/
-            .stMetric {
-                background-color: #1A1A2E;     /* Darker, richer background */
-                border-radius: 0.75rem;        /* Softer rounded corners */
-                padding: 0.75rem 1.25rem;      /* More padding */
-                margin: 0.4rem 0;              /* Adjusted vertical margin */
-                box-shadow: 0 4px 12px rgba(0, 0, 0, 0.4), 0 0 5px rgba(187, 134, 252, 0.2); /* Subtle glow */
-                transition: transform 0.2s ease-in-out, box-shadow 0.3s ease; /* Smooth hover effect */
-                border: 1px solid #28283D; /* Slight border for definition */
-            }
-            .stMetric:hover {
-                transform: translateY(-3px); /* Lifts card on hover */
-                box-shadow: 0 6px 16px rgba(0, 0, 0, 0.6), 0 0 15px rgba(187, 134, 252, 0.4); /* Stronger glow on hover */
-            }
-            .stMetric > div[data-testid="stMetricValue"] {
-                color: #00FFC0; /* Neon green for metric values */
-                font-family: 'Space Mono', monospace;
-                font-size: 1.7em; /* Slightly larger value */
-            }
-            .stMetric > div[data-testid="stMetricLabel"] label {
-                color: #90CAF9; /* Lighter blue for labels */
-                font-size: 0.9em;
-            }
-
-
-            /*── Prominent Warning/Error Boxes (More Dramatic) ───────────────────────*/
-            .stWarning, .stError {
-                background-color: #262100;     /* Darker, more intense warning background */
-                border-left: 6px solid #FFD700; /* Thicker, brighter gold left border */
-                border-radius: 0.6rem;
-                padding: 1.2rem 1.5rem;
-                margin-top: 1.5rem;
-                margin-bottom: 1.5rem;
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.4), 0 0 8px rgba(255, 215, 0, 0.3); /* Warning glow */
-            }
-            .stError {
-                background-color: #260000;     /* Darker, more intense error background */
-                border-left-color: #FF4747;    /* Brighter, more aggressive red for errors */
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.4), 0 0 8px rgba(255, 71, 71, 0.4); /* Error glow */
-            }
-            /* Bold important text within warnings/errors */
-            .stWarning p strong, .stError p strong {
-                color: inherit; /* Keep existing text color */
-                text-shadow: 0 0 5px rgba(255, 255, 255, 0.5); /* Subtle text glow */
-            }
-
-
-            /*── Distinct Section Headers (h2) ────────────────────────────────────────*/
-            .stMarkdown h2 {
-                color: #90CAF9;                /* Lighter blue for headers */
-                border-bottom: 2px solid #2b3138; /* Slightly thicker border */
-                padding-bottom: 0.5rem;
-                margin-top: 2rem;
-                margin-bottom: 1.5rem;
-                font-size: 1.8em;
-            }
-
-            /*── Main Title Animation (h1) with Glow ────────────────────────────────*/
-            .stApp h1 {
-                animation: fadeInSlideUp 0.8s ease-out forwards;
-                text-shadow: 0 0 10px #BB86FC, 0 0 20px #BB86FC; /* Prominent glow */
-                color: #BB86FC; /* Matches glow color */
-            }
-
-            /*── Subheaders for input groups (h4) as Panels ──────────────────────────*/
-            .stMarkdown h4 {
-                color: #BB86FC;                /* Purple for subheaders */
-                margin-top: 1.5rem;
-                margin-bottom: 0.8rem;
-                font-size: 1.2em;
-                border-bottom: none; /* Remove previous dashed border */
-                padding-bottom: 0;
-
-                /* Panel Styling */
-                background-color: #151525; /* Slightly darker than main background */
-                border: 1px solid #28283D;
-                border-radius: 0.75rem;
-                padding: 1rem 1.25rem;
-                box-shadow: inset 0 2px 5px rgba(0, 0, 0, 0.4), 0 0 5px rgba(187, 134, 252, 0.1); /* Inset shadow for depth, subtle outer glow */
-            }
-
-            /* Apply panel styling to the direct parent of h4 for full section */
-            .stMarkdown h4 + div { /* Selects the div immediately following an h4 */
-                background-color: #1A1A2E; /* Matches metric card background */
-                border-bottom-left-radius: 0.75rem;
-                border-bottom-right-radius: 0.75rem;
-                border: 1px solid #28283D;
-                border-top: none; /* Blend with the h4 panel above */
-                padding: 1rem 1.25rem 2rem; /* More padding at bottom of section */
-                margin-top: -0.8rem; /* Pull up to join h4 */
-                box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3); /* Outer shadow for the full panel */
-            }
-
-
-            /*── Expander styling ────────────────────────────────────────────────────*/
-            .streamlit-expanderHeader {
-                background-color: #28283D; /* Darker background for expander header */
-                border-radius: 0.5rem;
-                padding: 0.75rem 1rem;
-                font-weight: bold;
-                color: #E0E0E0;             /* Lighter text for expander header */
-                box-shadow: 0 2px 5px rgba(0, 0, 0, 0.3); /* Subtle shadow for expander */
-            }
-            .streamlit-expanderContent {
-                background-color: #1A1A2E; /* Matches metric card background */
-                border-bottom-left-radius: 0.75rem;
-                border-bottom-right-radius: 0.75rem;
-                padding: 1rem;
-                box-shadow: inset 0 2px 4px rgba(0, 0, 0, 0.2);
-                border: 1px solid #28283D; /* Add border for content */
-                border-top: none;
-            }
-
-            /*── Title entrance animation ─────────────────────────────────────────────*/
-            @import url('https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&display=swap');
-            @keyframes fadeInSlideUp {
-                from {
-                    opacity: 0;
-                    transform: translateY(20px);
-                }
-                to {
-                    opacity: 1;
-                    transform: translateY(0);
-                }
-            }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    # With static serving on, the browser fetches (and caches) the stylesheet
+    # once per session; each rerun only re-sends this one-line import.
+    if st.get_option("server.enableStaticServing"):
+        st.html(f"<style>@import url('app/static/{STYLESHEET_NAME}');</style>")
+    else:
+        st.html(f"<style>{load_stylesheet()}</style>")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🖼️ Static Assets (loaded once per process)
+# ────────────────────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def load_stylesheet(name: str = STYLESHEET_NAME) -> str:
+    """Read the app stylesheet from ./static."""
+    return (STATIC_DIR / name).read_text(encoding="utf-8")
+
+
+@st.cache_resource(show_spinner=False)
+def load_logo(logo_path: str, width: int = LOGO_WIDTH) -> Optional[bytes]:
+    """Decode, downscale and PNG-encode the logo, or None if it is missing."""
+    from PIL import Image  # Imported lazily: only the first (uncached) call pays for it
+
+    try:
+        with Image.open(logo_path) as logo:
+            logo.thumbnail((width * 2, width * 2))  # 2x for HiDPI screens
+            buffer = io.BytesIO()
+            logo.save(buffer, format="PNG")
+    except FileNotFoundError:
+        logger.warning("Logo image not found, using default header")
+        return None
+    return buffer.getvalue()
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -240,15 +119,14 @@ def display_header(logo_path: str = "logo.png"):
     Show logo (if found) and the bold app title (with entrance animation),
     plus an expander explaining how to use the calculator.
     """
-    try:
-        logo = Image.open(logo_path)
+    logo = load_logo(logo_path)
+    if logo is not None:
         col1, col2 = st.columns([1, 4], gap="small")
         with col1:
-            st.image(logo, width=150)
+            st.image(logo, width=LOGO_WIDTH)
         with col2:
             st.title("📊 1% Risk Management Calculator (Quantum Ledger)")
-    except FileNotFoundError:
-        logger.warning("Logo image not found, using default header")
+    else:
         st.title("📊 1% Risk Management Calculator (Quantum Ledger)")
 
     # How-to guide expander
@@ -267,19 +145,15 @@ def display_header(logo_path: str = "logo.png"):
 # ────────────────────────────────────────────────────────────────────────────────
 # 📝 User Inputs
 # ────────────────────────────────────────────────────────────────────────────────
-def get_user_inputs() -> Tuple[
-    float, float, float, float, Literal["Long", "Short"], float, float, float, bool, float, float
-]:
-    """Gather user inputs with improved validation and defaults."""
-    col1, col2 = st.columns(2, gap="medium")
-
-    # Panel for Capital Settings
-    with col1:
+def get_capital_inputs(column: "DeltaGenerator", account_currency: str = "USD") -> Tuple[float, float, float, float]:
+    """Capital Settings panel; changing any of these reruns the whole page."""
+    currency = currency_label(account_currency)
+    with column:
         st.markdown("<h4>🏦 Capital Settings</h4>", unsafe_allow_html=True)
         st.markdown("<div>", unsafe_allow_html=True)
         
         total_capital = st.number_input(
-            "💼 Total Capital ($)",
+            f"💼 Total Capital ({currency})",
             min_value=0.000,
             value=10000.000,
             step=0.001,
@@ -288,7 +162,7 @@ def get_user_inputs() -> Tuple[
         )
 
         liquid_capital = st.number_input(
-            "💧 Liquid Capital for Trading ($)",
+            f"💧 Liquid Capital for Trading ({currency})",
             min_value=0.000,
             value=10000.000,
             step=0.001,
@@ -317,13 +191,39 @@ def get_user_inputs() -> Tuple[
         )
         st.markdown("</div>", unsafe_allow_html=True)
 
-    # Panel for Trade Settings
-    with col2:
+    return total_capital, liquid_capital, risk_percent, leverage
+
+
+def get_trade_inputs(column: "DeltaGenerator", account_currency: str = "USD") -> Tuple[
+    float, Literal["Long", "Short"], float, float, bool, float, float, str, str
+]:
+    """Trade Settings panel (in ``column``) and the ATR panel below it; prices are labelled in the quote currency."""
+    with column:
         st.markdown("<h4>📊 Trade Settings</h4>", unsafe_allow_html=True)
         st.markdown("<div>", unsafe_allow_html=True)
+
+        symbol = st.text_input(
+            "🏷️ Symbol",
+            value="",
+            key="symbol",
+            placeholder="e.g. BTCUSDT",
+            help="Known symbols (instruments.csv) are sized in whole lots with prices on the tick",
+        )
+
+        quote_currency = QUOTE_AUTO
+        currencies = fx_currencies()
+        if currencies:
+            quote_currency = st.selectbox(
+                "💱 Quote Currency",
+                [QUOTE_AUTO, *currencies],
+                key="quote_currency",
+                help="Currency the prices are in; Auto reads it from the symbol, else uses the account currency",
+            )
+        # Keyed number inputs keep their values when the label changes
+        currency = currency_label(resolve_quote_currency(symbol, quote_currency, account_currency))
         
         entry_price = st.number_input(
-            "🎯 Entry Price ($)",
+            f"🎯 Entry Price ({currency})",
             min_value=0.001,
             value=100.000,
             step=0.001,
@@ -339,7 +239,7 @@ def get_user_inputs() -> Tuple[
         )
 
         target_price = st.number_input(
-            "🎯 Target Price ($)",
+            f"🎯 Target Price ({currency})",
             min_value=0.000,
             value=105.000,
             step=0.001,
@@ -374,23 +274,32 @@ def get_user_inputs() -> Tuple[
     atr_multiplier = 0.0
 
     if use_atr:
-        atr_help = """
-        **ATR Guide:**  
-        - Find ATR(14) on your charting platform (e.g., TradingView)  
-        - Common periods: 14 bars (days/hours)  
-        - Typical values: 2.5 for stocks, 50-200 for crypto  
-        """
-        st.markdown(atr_help)
-        
-        atr_value = st.number_input(
-            "📈 Average True Range (ATR) Value",
-            min_value=0.000,
-            value=0.000,
-            step=0.001,
-            format="%g",
-            key="atr_value",
+        atr_source = st.radio(
+            "🗂️ ATR Source",
+            ["Manual", "From OHLC Bars"],
+            horizontal=True,
+            key="atr_source",
         )
+        if atr_source == "Manual":
+            atr_help = """
+            **ATR Guide:**  
+            - Find ATR(14) on your charting platform (e.g., TradingView)  
+            - Common periods: 14 bars (days/hours)  
+            - Typical values: 2.5 for stocks, 50-200 for crypto  
+            """
+            st.markdown(atr_help)
         
+            atr_value = st.number_input(
+                "📈 Average True Range (ATR) Value",
+                min_value=0.000,
+                value=0.000,
+                step=0.001,
+                format="%g",
+                key="atr_value",
+            )
+        else:
+            atr_value = get_ohlc_atr()
+
         if use_atr and atr_value <= 0:
             st.warning("⚠️ ATR value must be positive when ATR is enabled")
         
@@ -406,84 +315,398 @@ def get_user_inputs() -> Tuple[
     st.markdown("</div>", unsafe_allow_html=True)
 
     return (
-        total_capital,
-        liquid_capital,
-        risk_percent,
         entry_price,
         direction,
         target_price,
-        leverage,
         slippage_pct,
         use_atr,
         atr_value,
-        atr_multiplier
+        atr_multiplier,
+        symbol.strip().upper(),
+        quote_currency,
     )
 
 
+def get_ohlc_atr() -> float:
+    """ATR computed from an uploaded or local OHLC bar file (0.0 if unavailable)."""
+    from atr_engine import DEFAULT_ATR_PERIOD, WilderATR, detect_ohlc_format
+
+    period = int(st.number_input(
+        "⏱️ ATR Period (bars)", min_value=1, value=DEFAULT_ATR_PERIOD, step=1, key="atr_period"
+    ))
+    uploaded = st.file_uploader(
+        "📄 OHLC bars (CSV, Parquet or NPY with high/low/close)",
+        type=["csv", "parquet", "npy"],
+        key="ohlc_file",
+    )
+    local_name = st.text_input(
+        f"📁 …or a bar file in `{DATA_DIR}`",
+        key="ohlc_path",
+        help="Bars appended to a local file are picked up incrementally on the next rerun",
+    )
+
+    try:
+        if uploaded is not None:
+            # Uploads never change, so size them once per session
+            cache = st.session_state.setdefault("ohlc_atr_engines", {})
+            cache_key = (uploaded.file_id, period)
+            if cache_key not in cache:
+                engine = WilderATR(period)
+                engine.update_from_file(
+                    uploaded, detect_ohlc_format(uploaded.name), complete_lines_only=False
+                )
+                cache.clear()
+                cache[cache_key] = engine
+            engine = cache[cache_key]
+        elif local_name:
+            path = resolve_data_path(local_name)
+            engine = shared_atr_engine(str(path), period)
+            with engine.lock:
+                engine.update_from_file(path)
+        else:
+            st.info("📂 Upload bars or name a local bar file to compute ATR.")
+            return 0.0
+    except (OSError, ValueError) as e:  # OHLCFormatError is a ValueError
+        st.error(f"🚫 Could not read OHLC bars: {e}")
+        return 0.0
+
+    if not engine.ready:
+        st.warning(f"⚠️ ATR({period}) needs at least {period} bars; found {engine.bars_seen}.")
+        return 0.0
+    st.metric(f"📈 ATR({period})", f"{engine.atr:,.4f}", help=f"Wilder ATR over {engine.bars_seen:,} bars")
+    return float(engine.atr)
+
+
+@st.cache_resource(show_spinner=False)
+def shared_atr_engine(path: str, period: int) -> "WilderATR":
+    """One incremental ATR engine per local file and period, shared by all sessions."""
+    from atr_engine import WilderATR
+
+    return WilderATR(period)
+
+
+def resolve_data_path(name: str) -> Path:
+    """Resolve ``name`` inside DATA_DIR, refusing paths that escape it."""
+    path = (DATA_DIR / name).resolve()
+    if not path.is_relative_to(DATA_DIR.resolve()):
+        raise ValueError(f"{name!r} is outside the data directory.")
+    return path
+
+
+@st.cache_resource(show_spinner=False)
+def shared_market_data() -> "MarketDataCache":
+    """Price and bar data shared by all sessions: TTL, LRU under a memory ceiling, single-flight loads."""
+    from market_data import MarketDataCache
+
+    return MarketDataCache(max_bytes=int(MARKET_DATA_CACHE_MB * 1024 * 1024))
+
+
 # ────────────────────────────────────────────────────────────────────────────────
-# 🧮 Core Calculations
+# 💱 Currencies
 # ────────────────────────────────────────────────────────────────────────────────
-def calculate_trade_metrics(
+@st.cache_resource(show_spinner=False)
+def shared_fx_rates() -> "FxRates":
+    """One TTL-cached FX rate matrix per process (fx_rates.csv, see fx_rates.py)."""
+    from fx_rates import FxRates
+
+    return FxRates(ttl=FX_CACHE_TTL)
+
+
+def fx_currencies() -> Tuple[str, ...]:
+    """Currencies in the FX rate table; empty (single-currency mode) when it is missing or unreadable."""
+    from fx_rates import FxRateError
+
+    try:
+        return shared_fx_rates().currencies
+    except (OSError, FxRateError) as e:
+        logger.warning("FX rates unavailable: %s", e)
+        return ()
+
+
+def select_account_currency() -> str:
+    """Sidebar picker for the currency capital is held in; USD without an FX rate table."""
+    from fx_rates import DEFAULT_CURRENCY
+
+    currencies = fx_currencies()
+    if not currencies:
+        return DEFAULT_CURRENCY
+    return st.sidebar.selectbox(
+        "💱 Account Currency",
+        currencies,
+        index=currencies.index(DEFAULT_CURRENCY) if DEFAULT_CURRENCY in currencies else 0,
+        key="account_currency",
+        help="Capital, risk and reward are shown in this currency; prices stay in the quote currency",
+    )
+
+
+def currency_label(currency: str) -> str:
+    """``$`` for USD and the other symbols in ``CURRENCY_SYMBOLS``, else the code."""
+    return CURRENCY_SYMBOLS.get(currency, currency)
+
+
+def format_money(amount: float, currency: str = "USD", decimals: int = 2) -> str:
+    """``$1,234.50`` for currencies in ``CURRENCY_SYMBOLS``, else ``1,234.50 USDT``."""
+    symbol = CURRENCY_SYMBOLS.get(currency)
+    text = f"{amount:,.{decimals}f}"
+    return f"{symbol}{text}" if symbol else f"{text} {currency}"
+
+
+def resolve_quote_currency(symbol: str, quote_choice: str, account_currency: str) -> str:
+    """The picked quote currency, or for ``QUOTE_AUTO`` the symbol's suffix, else the account currency."""
+    from fx_rates import quote_currency_of
+
+    if quote_choice != QUOTE_AUTO:
+        return quote_choice
+    return quote_currency_of(symbol, fx_currencies()) or account_currency
+
+
+def resolve_fx_rate(symbol: str, quote_choice: str, account_currency: str) -> Tuple[str, float]:
+    """``(quote_currency, fx_rate)``, the rate being account units per quote unit; stops the page without one."""
+    from fx_rates import FxRateError
+
+    quote_currency = resolve_quote_currency(symbol, quote_choice, account_currency)
+    try:
+        return quote_currency, shared_fx_rates().rate(quote_currency, account_currency)
+    except (OSError, FxRateError) as e:
+        st.error(f"🚫 {e}")
+        st.stop()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📡 Live Prices
+# ────────────────────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def shared_price_feed() -> "PriceFeedHub":
+    """One background feed loop per process: one connection per source and symbol, whatever the session count."""
+    from price_feed import PriceFeedHub
+
+    return PriceFeedHub()
+
+
+def select_live_feed() -> Optional[Tuple[str, float]]:
+    """Sidebar live-price controls; ``(source, refresh_seconds)`` when live mode is on."""
+    from price_feed import is_websocket
+
+    if not st.sidebar.toggle("📡 Live Entry Price", key="live_entry", help="Follow a price stream for the symbol"):
+        return None
+    source = st.sidebar.text_input(
+        "Price stream",
+        value=PRICE_FEED_SOURCE,
+        key="live_source",
+        help="ws:// URL, or a file in the data directory that price lines are appended to (see price_feed.py)",
+    ).strip()
+    refresh = st.sidebar.number_input(
+        "Refresh every (s)",
+        min_value=MIN_LIVE_REFRESH_SECONDS,
+        value=LIVE_REFRESH_SECONDS,
+        step=0.1,
+        format="%g",
+        key="live_refresh",
+        help="Ticks in between are coalesced: each refresh sizes the latest price only",
+    )
+    if not is_websocket(source):
+        try:
+            source = str(resolve_data_path(source))
+        except ValueError as e:
+            st.sidebar.error(f"🚫 {e}")
+            return None
+    return source, float(refresh)
+
+
+def display_live_results(
+    live: Tuple[str, float],
+    symbol: str,
+    typed_entry_price: float,
+    direction: str,
+    target_price: float,
+    slippage_pct: float,
+    use_atr: bool,
+    atr_value: float,
+    atr_multiplier: float,
     liquid_capital: float,
     risk_percent: float,
-    entry_price: float,
-    direction: Literal["Long", "Short"],
-    target_price: float,
     leverage: float,
-    stop_loss_price: float,
-    slippage_pct: float,
-) -> Tuple[float, float, float, float, float, float]:
-    """Enhanced calculations with rounding and leverage checks."""
-    # Validate entry price
-    if entry_price <= 0:
-        st.error("Entry price must be positive.")
-        st.stop()
+    margin_tiers: Optional["MarginTiers"] = None,
+    instrument: Optional["Instrument"] = None,
+    account_currency: str = "USD",
+    quote_currency: str = "USD",
+    fx_rate: float = 1.0,
+    stop_offset: Optional[float] = None,
+):
+    """
+    Trade Summary sized at the latest streamed price, in a fragment that
+    reruns on its own every ``refresh`` seconds (nothing else on the page).
+    The stop is the suggested stop for the live price, or the typed stop's
+    ``stop_offset`` from the entry when the user has overridden the suggestion.
+    """
+    source, refresh = live
+
+    def live_panel():
+        stream = shared_price_feed().subscribe(source, symbol)
+        tick = stream.latest
+        entry_price = typed_entry_price if tick is None else tick.price
+        if instrument is not None:
+            entry_price = instrument.round_price(entry_price)
+        if stop_offset is None:
+            stop_loss_price = suggest_stop_loss(
+                entry_price, direction, liquid_capital, risk_percent, leverage, use_atr, atr_value, atr_multiplier
+            )
+            stop_rule = "The stop follows the suggested stop for the live price."
+        else:
+            stop_loss_price = entry_price + stop_offset
+            stop_rule = f"The stop keeps your typed stop's distance ({abs(stop_offset):,g}) from the live price."
+        if instrument is not None:
+            stop_loss_price = instrument.round_price(stop_loss_price)
+
+        if tick is None:
+            st.info(
+                f"📡 Waiting for **{symbol}** prices from `{source}`"
+                + (f" ({stream.error})." if stream.error else ".")
+                + " Sizing at the typed entry until the first tick."
+            )
+        else:
+            st.caption(
+                f"📡 **{symbol}** live at **{tick.price:,g}** ({max(time.time() - tick.timestamp, 0):.1f}s old, "
+                f"{stream.ticks:,} ticks received, refreshed every {refresh:g}s). "
+                f"{stop_rule} The panels below still use the typed entry ({typed_entry_price:,g})."
+            )
+        try:
+            metrics = calculate_trade_metrics(
+                liquid_capital,
+                risk_percent,
+                entry_price,
+                direction,
+                target_price,
+                leverage,
+                stop_loss_price,
+                slippage_pct,
+                instrument.size_step if instrument is not None else None,
+                fx_rate,
+            )
+        except TradeValidationError as e:
+            st.error(str(e))
+            return
+        display_results(
+            *metrics,
+            liquid_capital,
+            leverage,
+            direction,
+            entry_price,
+            margin_tiers,
+            instrument,
+            account_currency,
+            quote_currency,
+            fx_rate,
+        )
 
-    # 1) Dollar amount you're risking
-    risk_amount = liquid_capital * (risk_percent / 100)
+    st.fragment(live_panel, run_every=refresh)()
 
-    # 2) Calculate effective stop loss with slippage
-    effective_stop_loss = stop_loss_price
-    if slippage_pct > 0:
-        if direction == "Long":
-            effective_stop_loss = stop_loss_price * (1 - slippage_pct)
-        else:  # "Short"
-            effective_stop_loss = stop_loss_price * (1 + slippage_pct)
 
-    # Validate stop loss
-    if direction == "Long" and effective_stop_loss >= entry_price:
-        st.error("🚫 For Long trades, Stop Loss must be below Entry Price (accounting for slippage).")
-        st.stop()
-    if direction == "Short" and effective_stop_loss <= entry_price:
-        st.error("🚫 For Short trades, Stop Loss must be above Entry Price (accounting for slippage).")
-        st.stop()
+# ────────────────────────────────────────────────────────────────────────────────
+# 🏛️ Exchange Metadata (margin tiers, instruments)
+# ────────────────────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False, max_entries=16)
+def load_tier_table(path: str, mtime: float) -> "MarginTiers":
+    """Parse a margin-tier file once per version (``mtime`` keys edits), shared by all sessions."""
+    from liquidation import load_margin_tiers
 
-    # Calculate actual risk per unit
-    actual_risk_per_unit = abs(entry_price - effective_stop_loss)
-    if actual_risk_per_unit == 0:
-        st.error("Stop Loss too close to Entry Price. Adjust your stop or slippage.")
-        st.stop()
+    return load_margin_tiers(path)
 
-    # Position size (rounded to 3 decimal places for crypto)
-    position_size = round(risk_amount / actual_risk_per_unit, 3)
 
-    # Capital required with leverage warning
-    position_value = position_size * entry_price
-    capital_required = (position_value / leverage) if leverage > 0 else 0.0
+@st.cache_resource(show_spinner=False)
+def shared_instrument_registry() -> "InstrumentRegistry":
+    """One lazily loaded instrument registry per process; it re-reads the file when it changes."""
+    from instruments import InstrumentRegistry
 
-    # Reward calculations
-    reward_per_unit = abs(target_price - entry_price)
-    expected_reward = reward_per_unit * position_size
-    reward_to_risk = (expected_reward / risk_amount) if risk_amount > 0 else 0.0
+    return InstrumentRegistry()
 
-    return (
-        risk_amount,
-        position_size,
-        effective_stop_loss,
-        capital_required,
-        expected_reward,
-        reward_to_risk,
+
+def lookup_instrument(symbol: str) -> Optional["Instrument"]:
+    """The symbol's instrument, or None when it is unknown or instruments.csv is malformed (with a warning)."""
+    from instruments import InstrumentFileError
+
+    if not symbol:
+        return None
+    try:
+        return shared_instrument_registry().get(symbol)
+    except InstrumentFileError as e:
+        st.warning(f"⚠️ instruments.csv is unusable, so {symbol} is not rounded to a tick or lot: {e}")
+        return None
+
+
+def select_margin_tiers() -> Optional["MarginTiers"]:
+    """Sidebar picker over ./margin_tiers; None when no exchange is selected."""
+    from liquidation import MarginTierError, available_tier_files
+
+    files = available_tier_files()
+    choice = st.sidebar.selectbox(
+        "🏛️ Exchange Margin Tiers",
+        ["None", *files],
+        key="margin_tiers",
+        help="Maintenance-margin tiers used for the liquidation price (JSON files in ./margin_tiers)",
+    )
+    if choice == "None":
+        return None
+    path = files[choice]
+    try:
+        return load_tier_table(str(path), path.stat().st_mtime)
+    except (OSError, MarginTierError) as e:
+        st.sidebar.error(f"🚫 Could not load margin tiers: {e}")
+        return None
+
+
+def load_order_book(path: str, mtime: float) -> "OrderBookFile":
+    """Memory-map a snapshot file once per version (``mtime`` keys rewrites), shared by all sessions."""
+    from order_book import OrderBookFile
+
+    return shared_market_data().get_or_load(("order_book", path, mtime), lambda: OrderBookFile(path))
+
+
+def get_depth_slippage(
+    symbol: str,
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: str,
+    target_price: float,
+    leverage: float,
+    stop_loss_price: float,
+    size_step: Optional[float] = None,
+    fx_rate: float = 1.0,
+) -> Optional[float]:
+    """
+    Stop slippage walked from the symbol's order book, or None to keep the
+    flat estimate (no book, toggle off, or the trade is invalid).
+    """
+    from order_book import OrderBookFormatError, converge_slippage
+
+    path = ORDER_BOOK_DIR / f"{symbol}.npy"
+    if not symbol or not path.is_file():
+        return None
+    if not st.toggle(f"📚 Slippage from the {symbol} order book", key="depth_slippage"):
+        return None
+    try:
+        snapshot = load_order_book(str(path), path.stat().st_mtime).snapshot()
+        result = converge_slippage(
+            snapshot.exit_side(direction), liquid_capital, risk_percent, entry_price,
+            direction, target_price, leverage, stop_loss_price, size_step, fx_rate,
+        )
+    except TradeValidationError:
+        return None  # Reported by the main calculation
+    except (OSError, OrderBookFormatError) as e:
+        st.error(f"🚫 Could not read the order book: {e}")
+        return None
+
+    st.caption(
+        f"📚 Stop fill walks **{result.fill.levels}** levels: "
+        f"**{result.slippage_pct * 100:.3f}%** slippage at "
+        f"{result.metrics.position_size:,.3f} units (converged in {result.iterations} steps)."
     )
+    if result.fill.beyond_depth:
+        st.warning("⚠️ The position is larger than the book's depth; the real slippage will be worse.")
+    elif not result.converged:
+        st.warning("⚠️ Slippage did not converge; the closest estimate is used.")
+    return result.slippage_pct
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -500,11 +723,26 @@ def display_results(
     leverage: float,
     direction: str,
     entry_price: float,
+    margin_tiers: Optional["MarginTiers"] = None,
+    instrument: Optional["Instrument"] = None,
+    account_currency: str = "USD",
+    quote_currency: str = "USD",
+    fx_rate: float = 1.0,
 ):
-    """Enhanced results display with additional warnings."""
+    """
+    Enhanced results display with additional warnings.
+
+    Money amounts are in ``account_currency`` and prices in
+    ``quote_currency``; ``fx_rate`` is account units per quote unit.
+    """
     # Formatting functions
-    def format_currency(val: float) -> str:
-        return f"${val:,.3f}" if (val % 1) != 0 else f"${int(val):,}"
+    def format_currency(val: float, currency: str = account_currency) -> str:
+        amount = f"{val:,.3f}" if (val % 1) != 0 else f"{int(val):,}"
+        symbol = CURRENCY_SYMBOLS.get(currency)
+        return f"{symbol}{amount}" if symbol else f"{amount} {currency}"
+
+    def format_price(val: float) -> str:
+        return format_currency(val, quote_currency)
 
     def format_units(val: float) -> str:
         return f"{val:,.3f} units" if (val % 1) != 0 else f"{int(val):,} units"
@@ -517,43 +755,109 @@ def display_results(
     with col1:
         st.metric("💰 Max Risk Allowed", format_currency(risk_amount))
         st.metric("📦 Position Size", format_units(position_size))
-        st.metric("🛑 Effective Stop Loss", format_currency(effective_stop_loss))
+        st.metric("🛑 Effective Stop Loss", format_price(effective_stop_loss))
     with col2:
         st.metric("💸 Capital Required", format_currency(capital_required))
         st.metric("🎯 Expected Reward", format_currency(expected_reward))
         st.metric("⚖️ Reward-to-Risk", f"{reward_to_risk:.2f}:1")
+    if quote_currency != account_currency:
+        st.caption(
+            f"💱 Prices in **{quote_currency}**, amounts in **{account_currency}** "
+            f"at 1 {quote_currency} = {fx_rate:,.6g} {account_currency}."
+        )
+
+    below_min_notional = False
+    if instrument is not None:
+        below_min_notional = instrument.below_min_notional(position_size, entry_price)
+        st.caption(
+            f"🏷️ **{instrument.symbol}**: {instrument.contracts(position_size):,g} contract(s) "
+            f"(lot {instrument.lot_step:g} × {instrument.multiplier:g} units), "
+            f"tick {instrument.tick_size:g}, min notional {format_price(instrument.min_notional)}. "
+            "Prices are snapped to the tick and the size is rounded down to whole lots."
+        )
+
+    # Liquidation (only when an exchange's margin tiers are selected)
+    past_liquidation = False
+    if margin_tiers is not None:
+        from liquidation import stop_past_liquidation
+
+        liquidation_price = margin_tiers.liquidation_price(
+            entry_price, direction, position_size, capital_required / fx_rate  # Margin in the quote currency
+        )
+        past_liquidation = stop_past_liquidation(direction, effective_stop_loss, liquidation_price)
+        notional = position_size * entry_price
+        tier = margin_tiers.tier_for(notional)
+        col1, col2 = st.columns(2, gap="medium")
+        with col1:
+            st.metric(
+                "💀 Liquidation Price",
+                "None" if liquidation_price is None else format_price(round(liquidation_price, 3)),
+            )
+        with col2:
+            st.metric(
+                "🏛️ Maintenance Margin",
+                f"{tier.maintenance_margin_rate:.2%}",
+                f"tier {margin_tiers.tier_index(notional) + 1} of {len(margin_tiers)}",
+                delta_color="off",
+            )
+        if leverage > tier.max_leverage:
+            st.error(
+                f"🚫 {margin_tiers.exchange} allows at most **{tier.max_leverage:g}x** "
+                f"for a {format_price(round(notional, 3))} position."
+            )
 
     # Warnings Expander
+    notices = trade_notices(
+        liquid_capital, leverage, entry_price, effective_stop_loss, capital_required, reward_to_risk,
+        past_liquidation, below_min_notional,
+    )
     with st.expander("⚠️ Risk Notices", expanded=True):
+        # Liquidation before the stop
+        if NOTICE_STOP_PAST_LIQUIDATION in notices:
+            st.error(
+                f"💀 The position is liquidated at **{format_price(round(liquidation_price, 3))}**, "
+                f"before the effective stop (**{format_price(effective_stop_loss)}**) can fill. "
+                "Lower the leverage or tighten the stop."
+            )
+
+        # Order too small for the exchange
+        if NOTICE_BELOW_MIN_NOTIONAL in notices:
+            st.error(
+                f"🚫 The order ({format_units(position_size)}, "
+                f"{format_price(round(position_size * entry_price, 3))}) is below "
+                f"{instrument.symbol}'s minimum of one lot and "
+                f"{format_price(instrument.min_notional)} notional."
+            )
+
         # Leverage warning
-        if leverage >= MAX_LEVERAGE_WARNING:
+        if NOTICE_HIGH_LEVERAGE in notices:
             st.warning(
                 f"⚡ High leverage detected (**{leverage}x**). "
                 "This significantly increases risk of liquidation."
             )
 
         # Reward-to-risk warning
-        if reward_to_risk < MIN_REWARD_RISK_RATIO:
+        if NOTICE_LOW_REWARD_RISK in notices:
             st.warning(
                 f"⚠️ Reward-to-risk ratio (**{reward_to_risk:.2f}:1**) is below "
                 f"recommended minimum (**{MIN_REWARD_RISK_RATIO}:1**)."
             )
 
         # Capital usage warnings
-        if capital_required > liquid_capital:
+        if NOTICE_CAPITAL_EXCEEDED in notices:
             st.error(
                 f"🚫 Required capital (**{format_currency(capital_required)}**) "
                 f"exceeds your liquid capital (**{format_currency(liquid_capital)}**)."
             )
-        elif capital_required > 0.8 * liquid_capital:
+        elif NOTICE_HIGH_CAPITAL_USAGE in notices:
             st.warning(
                 f"⚠️ Using **{capital_required/liquid_capital:.0%}** of your liquid capital. "
                 "Consider smaller positions for better risk management."
             )
 
         # Volatility warning for tight stops
-        risk_percentage = abs(entry_price - effective_stop_loss) / entry_price * 100
-        if risk_percentage > 10:
+        if NOTICE_WIDE_STOP in notices:
+            risk_percentage = abs(entry_price - effective_stop_loss) / entry_price * 100
             st.warning(
                 f"🔔 Wide stop detected (**{risk_percentage:.1f}%** from entry). "
                 "Ensure this matches the asset's volatility."
@@ -573,94 +877,939 @@ def display_results(
         """)
 
 # ────────────────────────────────────────────────────────────────────────────────
-# 🚀 Main Application
+# 📂 Bulk Import (CSV/Parquet)
 # ────────────────────────────────────────────────────────────────────────────────
-def main():
-    setup_page()
-    display_header()
-
-    # Get user inputs
-    (
-        total_capital,
-        liquid_capital,
-        risk_percent,
-        entry_price,
-        direction,
-        target_price,
-        leverage,
-        slippage_pct,
-        use_atr,
-        atr_value,
-        atr_multiplier
-    ) = get_user_inputs()
-
-    # Calculate suggested stop loss
-    current_suggested_stop = 0.0
-    if use_atr and atr_value > 0:
-        atr_distance = atr_value * atr_multiplier
-        current_suggested_stop = (
-            entry_price - atr_distance if direction == "Long" 
-            else entry_price + atr_distance
-        )
-        current_suggested_stop = max(0.001, current_suggested_stop)
-    else:
-        risk_amount = liquid_capital * (risk_percent / 100)
-        max_units = (liquid_capital * leverage) / entry_price if entry_price > 0 else 0
-        risk_per_unit = (risk_amount / max_units) if max_units > 0 else 0
-        current_suggested_stop = (
-            entry_price - risk_per_unit if direction == "Long"
-            else entry_price + risk_per_unit
-        )
-        current_suggested_stop = max(0.001, current_suggested_stop)
-
-    # Stop Loss Input
-    st.markdown("<h4>🛑 Stop Loss Adjustment</h4>", unsafe_allow_html=True)
-    stop_loss_price = st.number_input(
-        "Stop Loss Price ($)",
-        min_value=0.000,
-        value=round(current_suggested_stop, 3),
-        step=0.001,
-        format="%g",
-        key="stop_loss_price",
+def session_temp_dir() -> Path:
+    """
+    Scratch directory for this session's output files. It lives in session
+    state, so it is deleted (with its files) when the session ends and its
+    state is garbage collected, or at the latest when the server exits.
+    """
+    temp_dir = st.session_state.get("session_temp_dir")
+    if temp_dir is None:
+        temp_dir = st.session_state["session_temp_dir"] = tempfile.TemporaryDirectory(prefix="risk_calc_")
+    return Path(temp_dir.name)
+
+
+def read_file_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def display_bulk_import(margin_tiers: Optional["MarginTiers"] = None):
+    """Upload a trade-plan file, size it chunk by chunk and offer the result."""
+    # pandas/NumPy are only needed here, so import them on first use
+    from bulk_import import (
+        DEFAULT_CHUNK_SIZE,
+        REQUIRED_COLUMNS,
+        TRADE_PLAN_DEFAULTS,
+        TradePlanFormatError,
+        detect_format,
+        size_trade_plan_file,
     )
 
-    # Calculate metrics
-    try:
-        (
-            risk_amount,
-            position_size,
-            effective_stop_loss,
-            capital_required,
-            expected_reward,
-            reward_to_risk,
-        ) = calculate_trade_metrics(
-            liquid_capital,
-            risk_percent,
-            entry_price,
-            direction,
-            target_price,
-            leverage,
-            stop_loss_price,
-            slippage_pct,
+    st.markdown("<h4>📂 Bulk Trade-Plan Import</h4>", unsafe_allow_html=True)
+    st.markdown(
+        f"""
+        Upload a **CSV** or **Parquet** file with one trade per row.  
+        - Required columns: {", ".join(f"`{c}`" for c in REQUIRED_COLUMNS)}  
+        - Optional columns: {", ".join(f"`{c}`" for c in TRADE_PLAN_DEFAULTS)}  
+        - `direction` is `Long` or `Short`; `slippage_pct` is in percent, as in the form  
+        - Rows without a `stop_loss_price` use the suggested stop (ATR or fixed-risk)  
+        - An optional `symbol` column rounds known instruments to their tick and lot size  
+        - Optional `account_currency` and `quote_currency` columns convert amounts to each row's account currency  
+        """
+    )
+    if margin_tiers is not None:
+        st.caption(
+            f"🏛️ Adds `liquidation_price` and `stop_past_liquidation` using **{margin_tiers.exchange}** tiers."
         )
-    except Exception as e:
-        st.error(f"Calculation error: {str(e)}")
-        st.stop()
 
-    # Display results
-    display_results(
-        risk_amount,
-        position_size,
-        effective_stop_loss,
-        capital_required,
-        expected_reward,
-        reward_to_risk,
-        liquid_capital,
-        leverage,
-        direction,
-        entry_price,
+    uploaded = st.file_uploader("📄 Trade plan file", type=["csv", "parquet"], key="bulk_file")
+    chunksize = st.number_input(
+        "🧱 Rows per chunk",
+        min_value=1_000,
+        value=DEFAULT_CHUNK_SIZE,
+        step=10_000,
+        key="bulk_chunksize",
+        help="Larger chunks are faster but use more memory",
+    )
+
+    if uploaded is not None and st.button("⚙️ Size All Trades", key="bulk_run"):
+        previous = st.session_state.pop("bulk_result", None)
+        if previous and os.path.exists(previous["path"]):
+            os.remove(previous["path"])
+
+        fd, output_path = tempfile.mkstemp(prefix="sized_trades_", suffix=".csv", dir=session_temp_dir())
+        os.close(fd)
+        progress_bar = st.progress(0.0, text="Sizing trades…")
+
+        def report(rows_done: int, fraction: float):
+            progress_bar.progress(fraction, text=f"Sized {rows_done:,} trades ({fraction:.0%})")
+
+        try:
+            status_counts = size_trade_plan_file(
+                uploaded,
+                output_path,
+                file_format=detect_format(uploaded.name),
+                chunksize=int(chunksize),
+                progress=report,
+                margin_tiers=margin_tiers,
+                instruments=shared_instrument_registry(),
+                fx_rates=shared_fx_rates(),
+            )
+        except (TradePlanFormatError, ValueError) as e:
+            os.remove(output_path)
+            progress_bar.empty()
+            st.error(f"🚫 Could not size this file: {e}")
+            return
+        progress_bar.progress(1.0, text="Done")
+        st.session_state["bulk_result"] = {
+            "path": output_path,
+            "file_name": f"{os.path.splitext(uploaded.name)[0]}_sized.csv",
+            "status_counts": status_counts,
+        }
+
+    result = st.session_state.get("bulk_result")
+    if result and os.path.exists(result["path"]):
+        counts = result["status_counts"]
+        total = sum(counts.values())
+        col1, col2 = st.columns(2, gap="medium")
+        with col1:
+            st.metric("📦 Trades Sized", f"{counts.get('ok', 0):,} / {total:,}")
+        with col2:
+            st.metric("🚫 Invalid Rows", f"{total - counts.get('ok', 0):,}")
+        if total - counts.get("ok", 0):
+            st.warning(
+                "⚠️ Some rows could not be sized; see the `status` column: "
+                + ", ".join(f"**{k}** ({v:,})" for k, v in counts.items() if k != "ok")
+            )
+
+        # Deferred: the file is only read from disk when the user clicks
+        path = result["path"]
+        st.download_button(
+            "⬇️ Download Sized Trades (CSV)",
+            data=lambda: read_file_bytes(path),
+            file_name=result["file_name"],
+            mime="text/csv",
+            key="bulk_download",
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📚 Portfolio Book
+# ────────────────────────────────────────────────────────────────────────────────
+def display_portfolio_book(
+    total_capital: float,
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: str,
+    target_price: float,
+    leverage: float,
+    slippage_pct: float,
+    stop_loss_price: float,
+    risk_amount: float,
+    symbol: str,
+    size_step: Optional[float] = None,
+    account_currency: str = "USD",
+    quote_currency: str = "USD",
+    fx_rate: float = 1.0,
+) -> "PortfolioBook":
+    """
+    Open positions for this session and the aggregate open-risk cap. Capital
+    and ``risk_amount`` are in the account currency, prices in the quote
+    currency; each account currency has its own book.
+    """
+    from portfolio_book import PortfolioBook
+
+    currency = account_currency
+    books = st.session_state.setdefault("portfolio_books", {})
+    book = books.get(account_currency)
+    if book is None:
+        book = books[account_currency] = PortfolioBook(total_capital, liquid_capital)
+    book.total_capital, book.liquid_capital = total_capital, liquid_capital
+
+    with st.expander(
+        f"📚 Portfolio Book ({len(book):,} open, {book.open_risk_percent:.2f}% at risk)",
+        expanded=False,
+    ):
+        col1, col2 = st.columns(2, gap="medium")
+        with col1:
+            st.metric(
+                "🔥 Open Risk",
+                format_money(book.open_risk, currency),
+                f"{book.open_risk_percent:.2f}% of {book.max_open_risk_percent:g}% cap",
+                delta_color="off",
+            )
+            st.metric("💸 Capital Used", format_money(book.capital_used, currency))
+        with col2:
+            st.metric("🧬 Effective Leverage", f"{book.effective_leverage:.2f}x")
+            st.metric("🎯 Expected Reward", format_money(book.expected_reward, currency))
+
+        # Check the trade on screen against the cap before booking it
+        check = book.check(risk_amount)
+        if check.allowed:
+            st.success(
+                f"✅ Booking this trade brings open risk to **{check.open_risk_percent_after:.2f}%** "
+                f"of total capital (cap **{book.max_open_risk_percent:g}%**)."
+            )
+        else:
+            st.error(
+                f"🚫 This trade would bring open risk to **{check.open_risk_percent_after:.2f}%** "
+                f"of total capital, above the **{book.max_open_risk_percent:g}%** cap. "
+                f"Remaining headroom: **{format_money(check.headroom, currency)}**."
+            )
+
+        if st.button(
+            f"➕ Book {symbol or 'Trade'}", key="book_add", disabled=not check.allowed,
+            help="The symbol is set in Trade Settings",
+        ):
+            book.add(
+                symbol or "—", direction, entry_price, stop_loss_price,
+                target_price, leverage, slippage_pct, risk_percent, size_step=size_step,
+                quote_currency=quote_currency, fx_rate=fx_rate,
+            )
+            st.rerun(scope="fragment")
+
+        if len(book):
+            recent = list(book)[-BOOK_ROWS_SHOWN:]
+            rows = [
+                "| # | Symbol | Side | Entry | Stop | Size | Risk | Capital |",
+                "|---:|---|---|---:|---:|---:|---:|---:|",
+            ]
+            for p in reversed(recent):
+                rows.append(
+                    f"| {p.position_id} | {p.symbol} | {p.direction} | {p.entry_price:,.3f} | "
+                    f"{p.stop_loss_price:,.3f} | {p.metrics.position_size:,.3f} | "
+                    f"{format_money(p.metrics.risk_amount, currency)} | "
+                    f"{format_money(p.metrics.capital_required, currency)} |"
+                )
+            st.markdown("\n".join(rows))
+            if len(book) > BOOK_ROWS_SHOWN:
+                st.caption(f"Showing the {BOOK_ROWS_SHOWN} most recent of {len(book):,} positions.")
+
+            col1, col2, col3 = st.columns([2, 1, 1], gap="small")
+            with col1:
+                close_id = st.number_input(
+                    "🔚 Position # to close", min_value=1, step=1, key="book_close_id"
+                )
+            with col2:
+                st.markdown("<div style='height: 1.8rem'></div>", unsafe_allow_html=True)
+                if st.button("✖️ Close", key="book_close"):
+                    try:
+                        book.remove(int(close_id))
+                    except KeyError:
+                        st.warning(f"⚠️ No open position #{int(close_id)}.")
+                    else:
+                        st.rerun(scope="fragment")
+            with col3:
+                st.markdown("<div style='height: 1.8rem'></div>", unsafe_allow_html=True)
+                if st.button("🧹 Clear Book", key="book_clear"):
+                    book.clear()
+                    st.rerun(scope="fragment")
+
+    return book
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🔗 Correlation Risk
+# ────────────────────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def shared_covariance_cache() -> "CovarianceCache":
+    """Covariance matrices shared by all sessions, bounded and LRU-evicted."""
+    from correlation_risk import CovarianceCache
+
+    return CovarianceCache()
+
+
+def load_return_series(source_key: tuple, source, name: str, as_prices: bool) -> "pd.DataFrame":
+    """Return table for a file; ``source_key`` changes whenever the file does."""
+    from correlation_risk import read_series_table, returns_from_prices
+
+    def load():
+        table = read_series_table(source, name)
+        return returns_from_prices(table) if as_prices else table
+
+    return shared_market_data().get_or_load(("returns", source_key, as_prices), load)
+
+
+@st.fragment
+def display_correlation_risk(
+    book: "PortfolioBook",
+    symbol: str,
+    direction: str,
+    entry_price: float,
+    position_size: float,
+    risk_amount: float,
+    currency: str = "USD",
+    fx_rate: float = 1.0,
+):
+    """
+    Parametric VaR of the book plus the current trade, with each position's
+    share. Amounts are in the book's ``currency``; ``fx_rate`` converts the
+    trade's quote-currency notional into it.
+    """
+    import numpy as np
+
+    from correlation_risk import DEFAULT_WINDOW, exposure_vector, portfolio_risk
+
+    with st.expander("🔗 Correlation Risk (VaR)", expanded=False):
+        uploaded = st.file_uploader(
+            "📄 Price or return series (CSV/Parquet: time column, then one column per symbol)",
+            type=["csv", "parquet"],
+            key="corr_file",
+        )
+        local_name = st.text_input(
+            f"📁 …or a series file in `{DATA_DIR}`",
+            key="corr_path",
+            help="Rows appended to a local file only update the cached matrix, not rebuild it",
+        )
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            kind = st.radio("📈 Series", ["Prices", "Returns"], horizontal=True, key="corr_kind")
+        with col2:
+            window = int(st.number_input(
+                "🪟 Window (rows)", min_value=20, max_value=5_000, value=DEFAULT_WINDOW, step=10,
+                key="corr_window"
+            ))
+        with col3:
+            confidence = st.selectbox(
+                "🎚️ Confidence", [0.95, 0.99], format_func=lambda c: f"{c:.0%}", key="corr_confidence"
+            )
+
+        if not st.toggle("▶️ Compute Correlation Risk", key="corr_run"):
+            return
+        if not symbol:
+            st.info("🏷️ Enter a symbol for the current trade in Trade Settings.")
+            return
+
+        try:
+            if uploaded is not None:
+                # Keyed by content, so sessions uploading the same file share it
+                digest = hashlib.blake2b(uploaded.getvalue(), digest_size=16).hexdigest()
+                source_key, source, name = (f"upload:{digest}",), uploaded, uploaded.name
+            elif local_name:
+                path = resolve_data_path(local_name)
+                stat = path.stat()
+                source_key, source, name = (str(path), stat.st_mtime_ns, stat.st_size), path, path.name
+            else:
+                st.info("📂 Upload series or name a local series file.")
+                return
+            returns = load_return_series(source_key, source, name, kind == "Prices")
+        except (OSError, ValueError) as e:
+            st.error(f"🚫 Could not read series: {e}")
+            return
+
+        # Net signed notional per symbol: the book plus the trade on screen
+        sign = {"Long": 1.0, "Short": -1.0}
+        exposures = {}
+        for p in book:
+            exposures[p.symbol] = exposures.get(p.symbol, 0.0) + sign[p.direction] * p.notional
+        exposures[symbol] = exposures.get(symbol, 0.0) + sign[direction] * position_size * entry_price * fx_rate
+        missing = sorted(s for s in exposures if s not in returns.columns)
+        if missing:
+            st.warning(f"⚠️ No series for {', '.join(missing)}; left out of VaR.")
+        if symbol in missing:
+            return
+
+        # source_key[0] names the file, so appended rows reuse the cached matrix
+        symbols, covariance = shared_covariance_cache().covariance(
+            returns, (s for s in exposures if s not in missing), window, source=source_key[0]
+        )
+        vector = exposure_vector(symbols, exposures)
+        risk = portfolio_risk(vector, covariance, confidence)
+        if not np.isfinite(risk.value_at_risk):
+            st.warning("⚠️ Not enough overlapping rows to estimate the covariance matrix.")
+            return
+        trade = symbols.index(symbol)
+
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            st.metric(f"📉 Portfolio VaR ({confidence:.0%})", format_money(risk.value_at_risk, currency))
+            st.metric("🧩 Diversification Benefit", format_money(risk.diversification_benefit, currency))
+        with col2:
+            st.metric(f"🎯 {symbol} Standalone VaR", format_money(risk.standalone_var[trade], currency))
+            st.metric(
+                f"🔗 {symbol} Contribution",
+                format_money(risk.component_var[trade], currency),
+                f"{risk.component_var[trade] / risk.value_at_risk:.1%} of VaR" if risk.value_at_risk else None,
+                delta_color="off",
+            )
+        with col3:
+            st.metric("💰 Risk to Stop (this trade)", format_money(risk_amount, currency))
+            st.metric("🧬 Symbols", f"{len(symbols):,}")
+
+        correlation = covariance[trade] / np.sqrt(covariance[trade, trade] * np.diag(covariance))
+        order = np.argsort(-np.abs(risk.component_var))[:CORRELATION_ROWS_SHOWN]
+        rows = [
+            f"| Symbol | Exposure | Standalone VaR | Marginal VaR | Contribution | ρ to {symbol} |",
+            "|---|---:|---:|---:|---:|---:|",
+        ]
+        for i in order:
+            rows.append(
+                f"| {symbols[i]} | {format_money(vector[i], currency, 0)} | "
+                f"{format_money(risk.standalone_var[i], currency)} | {risk.marginal_var[i]:.4f} | "
+                f"{format_money(risk.component_var[i], currency)} | {correlation[i]:+.2f} |"
+            )
+        st.markdown("\n".join(rows))
+        st.caption(
+            f"One-period parametric VaR over the last {window:,} rows. Marginal VaR is {currency} of VaR "
+            f"per extra {currency} of exposure; contributions add up to the portfolio VaR."
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🎲 Monte Carlo Equity Curves
+# ────────────────────────────────────────────────────────────────────────────────
+@st.cache_data(show_spinner="Simulating equity paths…", max_entries=32)
+def run_monte_carlo(
+    win_rate: float,
+    reward_to_risk: float,
+    risk_percent: float,
+    n_paths: int,
+    n_trades: int,
+    seed: int,
+) -> Tuple[dict, bytes]:
+    """Simulate, summarize and chart once per parameter set (summary, PNG)."""
+    from matplotlib.figure import Figure
+
+    from monte_carlo import simulate_equity_paths, summarize
+
+    result = simulate_equity_paths(
+        win_rate, reward_to_risk, risk_percent, n_paths=n_paths, n_trades=n_trades, seed=seed
     )
 
+    fig = Figure(figsize=(8, 3), facecolor="#0F0F1A")
+    for ax, values, title, color in zip(
+        fig.subplots(1, 3),
+        ((result.final_equity - 1) * 100, result.max_drawdown * 100, result.time_to_recover),
+        ("Final Return (%)", "Max Drawdown (%)", "Time to Recover (trades)"),
+        ("#00FFC0", "#FF6347", "#BB86FC"),
+    ):
+        ax.hist(values, bins=50, color=color, alpha=0.85)
+        ax.set_title(title, color="#E0E0E0", fontsize=9)
+        ax.set_facecolor("#1A1A2E")
+        ax.tick_params(colors="#90CAF9", labelsize=7)
+        ax.set_yticks([])
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=110)
+    return summarize(result), buffer.getvalue()
+
+
+@st.fragment
+def display_monte_carlo(reward_to_risk: float, risk_percent: float):
+    """Distribution of outcomes when this trade's R:R is repeated many times."""
+    from monte_carlo import DEFAULT_PATHS, DEFAULT_SEED, DEFAULT_TRADES
+
+    with st.expander("🎲 Monte Carlo: The 1% Rule Over Many Trades", expanded=False):
+        st.markdown(
+            f"Repeats a **{reward_to_risk:.2f}:1** trade risking **{risk_percent:g}%** "
+            "of current equity each time, across many simulated equity paths."
+        )
+        col1, col2 = st.columns(2, gap="medium")
+        with col1:
+            win_rate = st.number_input(
+                "🏆 Win Rate (%)", min_value=1.0, max_value=99.0, value=50.0, step=1.0, key="mc_win_rate"
+            )
+            n_paths = st.number_input(
+                "🧵 Equity Paths", min_value=1_000, max_value=1_000_000, value=DEFAULT_PATHS,
+                step=10_000, key="mc_paths"
+            )
+        with col2:
+            n_trades = st.number_input(
+                "🔁 Trades per Path", min_value=10, max_value=1_000, value=DEFAULT_TRADES,
+                step=10, key="mc_trades"
+            )
+            seed = st.number_input("🌱 Random Seed", min_value=0, value=DEFAULT_SEED, step=1, key="mc_seed")
+
+        if not st.toggle("▶️ Run Simulation", key="mc_run"):
+            return
+
+        summary, chart = run_monte_carlo(
+            win_rate / 100, reward_to_risk, risk_percent, int(n_paths), int(n_trades), int(seed)
+        )
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            st.metric("📈 Median Return", f"{(summary['final_equity_p50'] - 1):+.1%}")
+            st.metric("🎯 5th–95th pct", f"{summary['final_equity_p5'] - 1:+.0%} / {summary['final_equity_p95'] - 1:+.0%}")
+        with col2:
+            st.metric("📉 Median Max Drawdown", f"{summary['max_drawdown_p50']:.1%}")
+            st.metric("🌩️ 95th pct Drawdown", f"{summary['max_drawdown_p95']:.1%}")
+        with col3:
+            st.metric("⏳ Median Time to Recover", f"{summary['time_to_recover_p50']:.0f} trades")
+            st.metric("💀 Chance of Losing", f"{summary['prob_loss']:.1%}")
+        st.image(chart)
+        st.caption(
+            "Chance of a drawdown of at least "
+            + ", ".join(
+                f"{key.rsplit('_', 1)[1]}: **{value:.1%}**"
+                for key, value in summary.items()
+                if key.startswith("prob_drawdown_")
+            )
+            + ". Time to recover is the longest run of trades spent below a previous equity peak."
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📐 Kelly Risk % from Trade History
+# ────────────────────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def shared_trade_outcomes(path: str) -> "TradeOutcomes":
+    """One incremental outcome histogram per local history file, shared by all sessions."""
+    import threading
+
+    from kelly import TradeOutcomes
+
+    outcomes = TradeOutcomes()
+    outcomes.lock = threading.Lock()
+    return outcomes
+
+
+@st.fragment
+def display_kelly_estimator(risk_percent: float):
+    """Suggest a risk % from closed trades: Kelly, fractional Kelly and optimal-f with a bootstrap interval."""
+    from kelly import DEFAULT_CONFIDENCE, DEFAULT_KELLY_MULTIPLIER, TradeOutcomes
+
+    with st.expander("📐 Risk % from Your Trade History (Kelly)", expanded=False):
+        uploaded = st.file_uploader(
+            "📄 Closed trades (CSV/Parquet with r_multiple, or pnl and risk_amount)",
+            type=["csv", "parquet"],
+            key="kelly_file",
+        )
+        local_name = st.text_input(
+            f"📁 …or a trade log in `{DATA_DIR}`",
+            key="kelly_path",
+            help="Trades appended to a local log are added incrementally on the next rerun",
+        )
+        multiplier = st.slider(
+            "✂️ Kelly Multiplier", min_value=0.1, max_value=1.0,
+            value=DEFAULT_KELLY_MULTIPLIER, step=0.05, key="kelly_multiplier",
+            help="Full Kelly maximizes growth but with deep drawdowns; half Kelly is a common compromise",
+        )
+
+        try:
+            if uploaded is not None:
+                digest = hashlib.blake2b(uploaded.getvalue(), digest_size=16).hexdigest()
+
+                def load():
+                    outcomes = TradeOutcomes()
+                    outcomes.update_from_file(uploaded, complete_lines_only=False)
+                    return outcomes
+
+                outcomes = shared_market_data().get_or_load(("trade_outcomes", digest), load)
+            elif local_name:
+                path = resolve_data_path(local_name)
+                outcomes = shared_trade_outcomes(str(path))
+                with outcomes.lock:
+                    outcomes.update_from_file(path)
+            else:
+                st.info("📂 Upload closed trades or name a local trade log.")
+                return
+            if not st.toggle("📐 Estimate", key="kelly_run"):
+                return
+            estimate = outcomes.estimate(kelly_multiplier=multiplier)
+        except (OSError, ValueError) as e:  # TradeHistoryFormatError is a ValueError
+            st.error(f"🚫 Could not read the trade history: {e}")
+            return
+
+        low, high = estimate.kelly_interval
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            st.metric("🧮 Kelly", f"{estimate.kelly:.2%}", help=f"{low:.2%} – {high:.2%} ({DEFAULT_CONFIDENCE:.0%} bootstrap interval)")
+            st.metric("🏆 Win Rate", f"{estimate.win_rate:.1%}")
+        with col2:
+            st.metric(f"✂️ {multiplier:g}× Kelly", f"{estimate.fractional_kelly:.2%}")
+            st.metric("📊 Average R", f"{estimate.average_r:+.3f}R")
+        with col3:
+            st.metric(
+                "✅ Suggested Risk %", f"{estimate.suggested_risk_percent:.2f}%",
+                delta=f"{estimate.suggested_risk_percent - risk_percent:+.2f} vs current", delta_color="off",
+            )
+            st.metric("📏 Optimal f", f"{estimate.optimal_f:.3f}")
+        st.caption(
+            f"From **{estimate.trades:,}** trades. The suggestion is {multiplier:g}× the lower end of "
+            f"Kelly's {DEFAULT_CONFIDENCE:.0%} interval ({low:.2%} – {high:.2%}), so a lucky history doesn't oversize you. "
+            "Optimal f is Kelly per largest loss."
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🗺️ Sensitivity Heatmaps
+# ────────────────────────────────────────────────────────────────────────────────
+@st.fragment
+def display_sensitivity(
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: str,
+    target_price: float,
+    leverage: float,
+    slippage_pct: float,
+    stop_loss_price: float,
+    currency: str = "USD",
+):
+    """Heatmaps of the sizing outputs over a stop-distance grid (capital in ``currency``)."""
+    from sensitivity import DEFAULT_RESOLUTION, render_heatmaps
+
+    with st.expander("🗺️ Sensitivity: Stop Distance × Leverage / Risk %", expanded=False):
+        y_label = st.radio(
+            "📐 Vertical axis", ["Leverage", "Risk %"], horizontal=True, key="sens_y_axis"
+        )
+        y_axis = "leverage" if y_label == "Leverage" else "risk_percent"
+        current_y = leverage if y_axis == "leverage" else risk_percent
+
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            max_stop_pct = st.number_input(
+                "🛑 Max Stop Distance (%)", min_value=0.1, max_value=90.0, value=10.0,
+                step=0.5, format="%g", key="sens_max_stop"
+            )
+        with col2:
+            default_y_max = max(20.0 if y_axis == "leverage" else 5.0, current_y)
+            y_max = st.number_input(
+                f"⬆️ Max {y_label}", min_value=0.01, value=default_y_max,
+                step=1.0, format="%g", key=f"sens_max_{y_axis}"
+            )
+        with col3:
+            resolution = st.number_input(
+                "🔬 Grid Resolution", min_value=20, max_value=400, value=DEFAULT_RESOLUTION,
+                step=20, key="sens_resolution"
+            )
+
+        if not st.toggle("🗺️ Show Heatmaps", key="sens_run"):
+            return
+
+        y_min = MIN_LEVERAGE if y_axis == "leverage" else 0.1
+        stop_distance_pct = abs(entry_price - stop_loss_price) / entry_price * 100
+        chart = render_heatmaps(
+            liquid_capital, risk_percent, entry_price, direction, target_price,
+            leverage, slippage_pct, float(max_stop_pct), y_axis,
+            (y_min, max(float(y_max), y_min + 0.01)), int(resolution),
+            marker=(stop_distance_pct, current_y),
+            currency=currency_label(currency),
+        )
+        st.image(chart)
+        st.caption(
+            "✖️ marks your current stop. Slippage is applied to every stop, as in the "
+            "main calculation; blank cells are invalid (e.g. stop on the wrong side after slippage)."
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 💀 Risk of Ruin
+# ────────────────────────────────────────────────────────────────────────────────
+@st.fragment
+def display_risk_of_ruin(reward_to_risk: float, risk_percent: float):
+    """Chance of a drawdown (or ruin) level at this risk % and R:R, from closed forms or cached DP tables."""
+    import pandas as pd
+
+    from risk_of_ruin import METHOD_DP, MAX_TRADES, RuinParams, ruin_probability, ruin_table
+
+    with st.expander("💀 Risk of Ruin", expanded=False):
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            win_rate = st.number_input(
+                "🏆 Win Rate (%)", min_value=0.0, max_value=100.0, value=50.0, step=1.0, key="ruin_win_rate"
+            )
+        with col2:
+            level = st.number_input(
+                "📉 Ruin at Drawdown (%)", min_value=1.0, max_value=99.0, value=50.0, step=5.0, key="ruin_level"
+            )
+        with col3:
+            trades = st.number_input(
+                "🔁 Within Trades", min_value=1, max_value=MAX_TRADES, value=500, step=100, key="ruin_trades"
+            )
+        from_peak = st.toggle("⛰️ Measure the drawdown from the equity peak", key="ruin_from_peak")
+        if reward_to_risk <= 0 or risk_percent >= 100:
+            st.info("Risk of ruin needs a positive reward-to-risk and a risk below 100%.")
+            return
+
+        args = (risk_percent, win_rate / 100, reward_to_risk, level / 100)
+        curve = ruin_table(RuinParams.quantize(*args, from_peak), int(trades))
+        ever = ruin_probability(*args, from_peak=from_peak)
+        col1, col2 = st.columns(2, gap="small")
+        with col1:
+            st.metric(f"⏱️ Within {int(trades):,} Trades", f"{curve[-1]:.2%}")
+        with col2:
+            label = f"♾️ Within {ever.trades:,} Trades" if ever.method == METHOD_DP else "♾️ Ever"
+            st.metric(label, f"{ever.probability:.2%}")
+        st.line_chart(pd.DataFrame({"P(ruin)": curve}), x_label="Trades", y_label="Probability", height=200)
+        st.caption(
+            f"Chance that equity ever falls **{level:g}%** below its "
+            f"{'peak' if from_peak else 'starting value'}, risking **{risk_percent:g}%** of current "
+            f"equity on **{reward_to_risk:.2f}:1** trades. "
+            + ("\"Ever\" is exact (closed form)." if ever.method != METHOD_DP
+               else "No closed form applies, so the long-run figure is solved over a finite horizon.")
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🪜 Take-Profit Ladder
+# ────────────────────────────────────────────────────────────────────────────────
+@st.fragment
+def display_take_profit_ladder(
+    metrics: TradeMetrics,
+    entry_price: float,
+    direction: str,
+    target_price: float,
+    slippage_pct: float,
+    size_step: Optional[float] = None,
+    currency: str = "USD",
+):
+    """Scale out at several targets and compare the blended reward with the single target (in ``currency``)."""
+    import pandas as pd
+    from take_profit import STATUS_INVALID_LADDER, evaluate_ladder
+
+    label = currency_label(currency)
+    with st.expander("🪜 Take-Profit Ladder (scale out)", expanded=False):
+        midpoint = round(entry_price + (target_price - entry_price) / 2, 3)
+        legs = st.data_editor(
+            # A fixed column name, so edited legs survive a currency change
+            pd.DataFrame({"Target": [midpoint, target_price], "Close (%)": [50.0, 50.0]}),
+            num_rows="dynamic",
+            hide_index=True,
+            width="stretch",
+            key="tp_ladder_legs",
+        ).dropna()
+        breakeven = st.toggle("🔒 Move stop to breakeven after the first target", key="tp_breakeven")
+        if legs.empty:
+            st.info("Add at least one target.")
+            return
+
+        result = evaluate_ladder(
+            metrics, entry_price, direction,
+            legs["Target"].tolist(), (legs["Close (%)"] / 100).tolist(),
+            breakeven, slippage_pct, size_step,
+        )
+        if result.status == STATUS_INVALID_LADDER:
+            st.error(
+                "❌ Every target must be beyond entry in the trade's direction, and the "
+                "closed percentages must be positive and add up to at most 100%."
+            )
+            return
+
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            st.metric(
+                "💰 Blended Reward", format_money(result.blended_reward, currency),
+                delta=f"{result.blended_reward - metrics.expected_reward:,.2f} vs single target",
+            )
+        with col2:
+            st.metric("⚖️ Blended Reward:Risk", f"{result.blended_reward_to_risk:.2f}:1")
+        with col3:
+            st.metric("🎯 Average Exit", format_money(result.average_exit, currency, 3))
+
+        st.dataframe(
+            pd.DataFrame({
+                f"Target ({label})": result.leg_targets,
+                "Size (units)": result.leg_sizes,
+                f"Leg P&L ({label})": result.leg_pnl,
+                f"P&L if stopped after ({label})": result.stopped_after_pnl[1:],
+            }),
+            hide_index=True,
+            width="stretch",
+        )
+        st.caption(
+            f"Stopped before the first target: **{format_money(result.stopped_after_pnl[0], currency)}**. "
+            "Targets fill nearest first; any percentage left over closes at the last target."
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧩 Trade Solver
+# ────────────────────────────────────────────────────────────────────────────────
+SOLVER_PENDING_KEY = "solver_pending"
+
+
+def apply_pending_solution():
+    """
+    Copy an applied solver result into the leverage and stop inputs.
+
+    Must run before either widget is created in the rerun, which is why the
+    Apply button only stores the values and asks for a full rerun.
+    """
+    pending = st.session_state.pop(SOLVER_PENDING_KEY, None)
+    if pending is not None:
+        st.session_state["stop_loss_price"], st.session_state["leverage"] = pending
+
+
+@st.fragment
+def display_trade_solver(
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: str,
+    target_price: float,
+    slippage_pct: float,
+    instrument: Optional["Instrument"] = None,
+    margin_tiers: Optional["MarginTiers"] = None,
+    currency: str = "USD",
+):
+    """
+    Find a stop and leverage that trigger none of the Risk Notices (on the
+    instrument's tick and lots, and within the exchange's margin tiers).
+    Prices and amounts are in ``currency``.
+    """
+    from trade_solver import OBJECTIVES, solve_trade
+
+    with st.expander("🧩 Solve for a Compliant Trade", expanded=False):
+        objective = st.selectbox(
+            "🎯 Objective", list(OBJECTIVES), format_func=OBJECTIVES.get, key="solver_objective"
+        )
+        if not st.toggle("🧩 Solve", key="solver_run"):
+            return
+
+        region, solution = solve_trade(
+            liquid_capital, risk_percent, entry_price, direction, target_price, slippage_pct, objective,
+            instrument=instrument,
+            margin_tiers=margin_tiers,
+        )
+        if not region.feasible:
+            st.error(f"❌ No stop and leverage pass every check. {region.reason}")
+            return
+        if solution is None:
+            precision = f"{instrument.symbol}'s tick and lot size" if instrument is not None else "0.001 precision"
+            st.warning(f"⚠️ The region is too narrow for any stop at {precision}; try a wider target.")
+            return
+
+        metrics = solution.metrics
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            st.metric("🛑 Stop Loss", format_money(solution.stop_loss_price, currency, 3))
+            st.metric("🧬 Leverage", f"{solution.leverage:g}x")
+        with col2:
+            st.metric("📦 Position Size", f"{metrics.position_size:,.3f} units")
+            st.metric("⚖️ Reward:Risk", f"{metrics.reward_to_risk:.2f}:1")
+        with col3:
+            st.metric("💸 Capital Required", format_money(metrics.capital_required, currency))
+            st.metric("🔥 Risk Amount", format_money(metrics.risk_amount, currency))
+
+        max_pct = region.max_stop_distance / entry_price * 100
+        st.caption(
+            f"Every check passes for an effective stop between the capital-usage bound and "
+            f"**{max_pct:.2f}%** from entry, at **{region.min_leverage:.3f}x** to "
+            f"**{region.max_leverage:g}x** leverage."
+        )
+        if st.button("✅ Apply to Calculator", key="solver_apply"):
+            st.session_state[SOLVER_PENDING_KEY] = (solution.stop_loss_price, solution.leverage)
+            st.rerun()  # Leverage sits outside this fragment, so rerun the whole app
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🗂️ Trade History (SQLite)
+# ────────────────────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def shared_trade_history() -> "TradeHistory":
+    """One history database and background writer per process, shared by all sessions."""
+    from trade_history import TradeHistory
+
+    return TradeHistory(HISTORY_DB)
+
+
+def save_to_history(row: dict):
+    """Queue a sized trade for the history unless it is the same as this session's last one."""
+    if st.session_state.get("history_last_saved") == row:
+        st.toast("This plan is already in the history.")
+        return
+    try:
+        shared_trade_history().record(row)
+    except (OSError, sqlite3.Error) as e:  # e.g. a read-only data directory; history is best effort
+        logger.warning("Trade history unavailable: %s", e)
+        st.warning(f"⚠️ This trade was not saved to the history: {e}")
+        return
+    st.session_state["history_last_saved"] = row
+    st.toast("💾 Plan saved to the history.")
+
+
+def _reset_history_paging():
+    st.session_state["history_cursors"] = []
+
+
+def _history_older(cursor: int):
+    st.session_state.setdefault("history_cursors", []).append(cursor)
+
+
+def _history_newer():
+    cursors = st.session_state.get("history_cursors")
+    if cursors:
+        cursors.pop()
+
+
+@st.fragment
+def display_trade_history():
+    """Saved trades, newest first, one keyset-paginated page at a time."""
+    from datetime import datetime, timezone
+
+    from trade_history import DEFAULT_PAGE_SIZE
+
+    with st.expander("🗂️ Trade History", expanded=False):
+        try:
+            history = shared_trade_history()
+            symbols = history.symbols()
+        except (OSError, sqlite3.Error) as e:  # e.g. an unreadable or corrupt database file
+            st.warning(f"⚠️ Trade history unavailable: {e}")
+            return
+        col1, col2, col3 = st.columns(3, gap="small")
+        with col1:
+            symbol = st.selectbox(
+                "🏷️ Symbol", ["All", *symbols], key="history_symbol",
+                on_change=_reset_history_paging,
+            )
+        with col2:
+            direction = st.radio(
+                "📈 Side", ["All", "Long", "Short"], horizontal=True, key="history_direction",
+                on_change=_reset_history_paging,
+            )
+        with col3:
+            page_size = st.selectbox(
+                "📄 Rows per page", [25, DEFAULT_PAGE_SIZE, 100, 250], index=1, key="history_page_size",
+                on_change=_reset_history_paging,
+            )
+
+        cursors = st.session_state.setdefault("history_cursors", [])
+        try:
+            page = history.page(
+                before_id=cursors[-1] if cursors else None,
+                limit=page_size,
+                symbol=None if symbol == "All" else symbol,
+                direction=None if direction == "All" else direction,
+            )
+        except sqlite3.Error as e:
+            st.warning(f"⚠️ Trade history unavailable: {e}")
+            return
+        if not page.rows:
+            if symbol == direction == "All":
+                st.info("No saved trades yet. Every trade sized above is saved here automatically.")
+            else:
+                st.info("No saved trades match these filters.")
+            return
+
+        for row in page.rows:
+            row["created_at"] = datetime.fromtimestamp(row["created_at"], timezone.utc).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            row["use_atr"] = bool(row["use_atr"])
+        st.dataframe(page.rows, hide_index=True, width="stretch")
+
+        col1, col2, col3 = st.columns([1, 2, 1], gap="small")
+        with col1:
+            st.button("⬅️ Newer", key="history_newer", disabled=not cursors, on_click=_history_newer)
+        with col2:
+            st.caption(f"Page {len(cursors) + 1} · times in UTC")
+        with col3:
+            st.button(
+                "Older ➡️", key="history_older", disabled=page.next_cursor is None,
+                on_click=_history_older, args=(page.next_cursor,),
+            )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📢 Disclaimer and Footer
+# ────────────────────────────────────────────────────────────────────────────────
+def display_footer():
+    """Disclaimer acknowledgement and footer, shared by every mode."""
     # Disclaimer
     st.markdown("---")
     st.subheader("📢 Disclaimer")
@@ -677,5 +1826,353 @@ def main():
         unsafe_allow_html=True
     )
 
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🔁 Trade Section (fragment)
+# ────────────────────────────────────────────────────────────────────────────────
+def cached_trade_metrics(*args) -> TradeMetrics:
+    """``calculate_trade_metrics``, skipped when the inputs match the previous rerun's."""
+    last = st.session_state.get("last_trade_metrics")
+    if last is not None and last[0] == args:
+        result = last[1]
+    else:
+        try:
+            result = calculate_trade_metrics(*args)
+        except TradeValidationError as e:
+            result = e
+        st.session_state["last_trade_metrics"] = (args, result)
+    if isinstance(result, TradeValidationError):
+        raise result
+    return result
+
+
+@st.fragment
+def display_trade_section(
+    trade_column: "DeltaGenerator",
+    total_capital: float,
+    liquid_capital: float,
+    risk_percent: float,
+    leverage: float,
+    profiler: RerunProfiler,
+    margin_tiers: Optional["MarginTiers"] = None,
+    account_currency: str = "USD",
+    live: Optional[Tuple[str, float]] = None,
+):
+    """
+    Trade inputs, stop, results and everything derived from them.
+
+    With ``live`` (a price stream and refresh interval), the Trade Summary
+    follows the streamed entry price in its own timed fragment.
+
+    A fragment: a trade input or stop change reruns only this function, not
+    the page setup, header, Capital Settings or disclaimer.
+    """
+    # A fragment-only rerun gets the (finished) profiler of the last full run
+    if profiler.finished:
+        profiler = RerunProfiler(enabled=profiler.enabled)
+
+    try:
+        with profiler.stage("get_trade_inputs"):
+            (
+                entry_price,
+                direction,
+                target_price,
+                slippage_pct,
+                use_atr,
+                atr_value,
+                atr_multiplier,
+                symbol,
+                quote_choice,
+            ) = get_trade_inputs(trade_column, account_currency)
+        quote_currency, fx_rate = resolve_fx_rate(symbol, quote_choice, account_currency)
+
+        # Known instruments trade on their tick and in whole lots
+        instrument = lookup_instrument(symbol)
+        if instrument is not None:
+            entry_price = instrument.round_price(entry_price)
+            target_price = instrument.round_price(target_price)
+
+        with profiler.stage("stop_suggestion"):
+            # Calculate suggested stop loss
+            current_suggested_stop = suggest_stop_loss(
+                entry_price,
+                direction,
+                liquid_capital,
+                risk_percent,
+                leverage,
+                use_atr,
+                atr_value,
+                atr_multiplier,
+            )
+
+            if instrument is not None:
+                current_suggested_stop = instrument.round_price(current_suggested_stop)
+
+            # Stop Loss Input
+            st.markdown("<h4>🛑 Stop Loss Adjustment</h4>", unsafe_allow_html=True)
+            stop_loss_price = st.number_input(
+                f"Stop Loss Price ({currency_label(quote_currency)})",
+                min_value=0.000,
+                value=round(current_suggested_stop, 3),
+                step=0.001,
+                format="%g",
+                key="stop_loss_price",
+            )
+            if instrument is not None:
+                stop_loss_price = instrument.round_price(stop_loss_price)
+            # The input shows the suggestion to 3 decimals, so anything closer is untouched
+            stop_follows_suggestion = math.isclose(stop_loss_price, current_suggested_stop, abs_tol=0.0005)
+
+        # Large positions slip more in thin books: replace the flat estimate
+        with profiler.stage("depth_slippage"):
+            depth_slippage = get_depth_slippage(
+                symbol,
+                liquid_capital,
+                risk_percent,
+                entry_price,
+                direction,
+                target_price,
+                leverage,
+                stop_loss_price,
+                instrument.size_step if instrument is not None else None,
+                fx_rate,
+            )
+            if depth_slippage is not None:
+                slippage_pct = depth_slippage
+
+        # Calculate metrics
+        try:
+            with profiler.stage("calculate_trade_metrics"):
+                (
+                    risk_amount,
+                    position_size,
+                    effective_stop_loss,
+                    capital_required,
+                    expected_reward,
+                    reward_to_risk,
+                ) = cached_trade_metrics(
+                    liquid_capital,
+                    risk_percent,
+                    entry_price,
+                    direction,
+                    target_price,
+                    leverage,
+                    stop_loss_price,
+                    slippage_pct,
+                    instrument.size_step if instrument is not None else None,
+                    fx_rate,
+                )
+        except TradeValidationError as e:
+            st.error(str(e))
+            st.stop()
+        except Exception as e:
+            st.error(f"Calculation error: {str(e)}")
+            st.stop()
+
+        # Written only when the plan is saved, not on every rerun while it is edited
+        history_row = {
+            "symbol": symbol,
+            "direction": direction,
+            "total_capital": total_capital,
+            "liquid_capital": liquid_capital,
+            "risk_percent": risk_percent,
+            "leverage": leverage,
+            "entry_price": entry_price,
+            "target_price": target_price,
+            "stop_loss_price": stop_loss_price,
+            "slippage_pct": slippage_pct * 100,  # Percent, as typed
+            "use_atr": use_atr,
+            "atr_value": atr_value,
+            "atr_multiplier": atr_multiplier,
+            "risk_amount": risk_amount,
+            "position_size": position_size,
+            "effective_stop_loss": effective_stop_loss,
+            "capital_required": capital_required,
+            "expected_reward": expected_reward,
+            "reward_to_risk": reward_to_risk,
+            "account_currency": account_currency,
+            "quote_currency": quote_currency,
+            "fx_rate": fx_rate,
+        }
+
+        # Display results
+        with profiler.stage("display_results"):
+            if live is not None and symbol:
+                display_live_results(
+                    live,
+                    symbol,
+                    entry_price,
+                    direction,
+                    target_price,
+                    slippage_pct,
+                    use_atr,
+                    atr_value,
+                    atr_multiplier,
+                    liquid_capital,
+                    risk_percent,
+                    leverage,
+                    margin_tiers,
+                    instrument,
+                    account_currency,
+                    quote_currency,
+                    fx_rate,
+                    # A stop moved off the suggestion is kept as a distance from the entry
+                    None if stop_follows_suggestion else stop_loss_price - entry_price,
+                )
+            else:
+                display_results(
+                    risk_amount,
+                    position_size,
+                    effective_stop_loss,
+                    capital_required,
+                    expected_reward,
+                    reward_to_risk,
+                    liquid_capital,
+                    leverage,
+                    direction,
+                    entry_price,
+                    margin_tiers,
+                    instrument,
+                    account_currency,
+                    quote_currency,
+                    fx_rate,
+                )
+
+        with profiler.stage("save_history"):
+            if st.button("💾 Save Plan to History", key="history_save"):
+                save_to_history(history_row)
+
+        # The panels below work in the quote currency the prices are in
+        # (identical to the account amounts for a single-currency trade)
+        quote_liquid_capital = liquid_capital / fx_rate
+        quote_risk_amount = risk_amount / fx_rate
+        with profiler.stage("risk_of_ruin"):
+            display_risk_of_ruin(reward_to_risk, risk_percent)
+        with profiler.stage("take_profit_ladder"):
+            display_take_profit_ladder(
+                TradeMetrics(
+                    quote_risk_amount, position_size, effective_stop_loss,
+                    capital_required / fx_rate, expected_reward / fx_rate, reward_to_risk,
+                ),
+                entry_price,
+                direction,
+                target_price,
+                slippage_pct,
+                instrument.size_step if instrument is not None else None,
+                quote_currency,
+            )
+        with profiler.stage("portfolio_book"):
+            book = display_portfolio_book(
+                total_capital,
+                liquid_capital,
+                risk_percent,
+                entry_price,
+                direction,
+                target_price,
+                leverage,
+                slippage_pct,
+                stop_loss_price,
+                risk_amount,
+                symbol,
+                instrument.size_step if instrument is not None else None,
+                account_currency,
+                quote_currency,
+                fx_rate,
+            )
+        with profiler.stage("correlation_risk"):
+            display_correlation_risk(
+                book, symbol, direction, entry_price, position_size, risk_amount, account_currency, fx_rate
+            )
+        with profiler.stage("monte_carlo"):
+            display_monte_carlo(reward_to_risk, risk_percent)
+        with profiler.stage("kelly_estimator"):
+            display_kelly_estimator(risk_percent)
+        with profiler.stage("sensitivity"):
+            display_sensitivity(
+                quote_liquid_capital,
+                risk_percent,
+                entry_price,
+                direction,
+                target_price,
+                leverage,
+                slippage_pct,
+                stop_loss_price,
+                quote_currency,
+            )
+        with profiler.stage("trade_solver"):
+            display_trade_solver(
+                quote_liquid_capital, risk_percent, entry_price, direction, target_price, slippage_pct,
+                instrument, margin_tiers, quote_currency,
+            )
+    finally:
+        # Opt-in profiling (RISK_CALC_PROFILE=1); total covers everything above,
+        # including reruns cut short by st.stop() on invalid input
+        profiler.finish()
+    display_profiling_panel(profiler)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🐞 Debug Profiling Panel
+# ────────────────────────────────────────────────────────────────────────────────
+def display_profiling_panel(profiler: RerunProfiler):
+    """Collapsed expander with this rerun's stage timings and rolling percentiles."""
+    if not profiler.enabled:
+        return
+
+    rows = [
+        "| Stage | This rerun (ms) | p50 (ms) | p90 (ms) | p99 (ms) |",
+        "|---|---:|---:|---:|---:|",
+    ]
+    for stage, (percentiles, _, _) in REGISTRY.snapshot().items():
+        current = profiler.timings.get(stage)
+        current_ms = f"{current * 1000:.2f}" if current is not None else "–"
+        p50, p90, p99 = (f"{v * 1000:.2f}" for v in percentiles)
+        rows.append(f"| `{stage}` | {current_ms} | {p50} | {p90} | {p99} |")
+
+    cache = shared_market_data().stats()
+    with st.expander("🐞 Debug: Rerun Profile", expanded=False):
+        st.markdown("\n".join(rows))
+        st.caption(f"Rolling window of the last {REGISTRY.window} reruns across all sessions.")
+        st.markdown(
+            "| Market-data cache | |\n|---|---:|\n"
+            + "\n".join(f"| `{name}` | {value:,} |" for name, value in cache.items())
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🚀 Main Application
+# ────────────────────────────────────────────────────────────────────────────────
+def main():
+    profiler = RerunProfiler(enabled=profiling_enabled())
+
+    with profiler.stage("setup_page"):
+        setup_page()
+    with profiler.stage("display_header"):
+        display_header()
+
+    mode = st.sidebar.radio("🧭 Mode", ["🧮 Single Trade", "📂 Bulk Import"], key="mode")
+    margin_tiers = select_margin_tiers()
+    if mode == "📂 Bulk Import":
+        display_bulk_import(margin_tiers)
+        display_footer()
+        return
+
+    # Capital Settings sit outside the trade fragment: changing them reruns
+    # everything, while trade inputs only rerun the fragment
+    account_currency = select_account_currency()
+    live = select_live_feed()
+    apply_pending_solution()
+    col1, col2 = st.columns(2, gap="medium")
+    with profiler.stage("get_capital_inputs"):
+        total_capital, liquid_capital, risk_percent, leverage = get_capital_inputs(col1, account_currency)
+
+    display_trade_section(
+        col2, total_capital, liquid_capital, risk_percent, leverage, profiler, margin_tiers,
+        account_currency, live,
+    )
+    display_trade_history()
+
+    display_footer()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,290 @@
+"""
+Headless position-sizing core for the 1% Risk Calculator.
+
+Pure Python with no UI (Streamlit/PIL) or heavy numeric imports, so bots and
+cron jobs can import it cheaply. Invalid inputs raise ``TradeValidationError``
+subclasses instead of touching the page; the Streamlit app turns them into
+``st.error`` messages.
+"""
+import math
+from fractions import Fraction
+from functools import lru_cache
+from typing import List, Literal, NamedTuple, Optional
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Constants
+# ────────────────────────────────────────────────────────────────────────────────
+DEFAULT_RISK_PERCENT = 1.000
+MIN_LEVERAGE = 1.000
+MAX_LEVERAGE_WARNING = 10.000  # Threshold for high leverage warning
+MIN_REWARD_RISK_RATIO = 2.000
+DEFAULT_SLIPPAGE = 0.100  # 0.1% more realistic for crypto
+POSITION_SIZE_DECIMALS = 3  # Position size precision (crypto friendly)
+MIN_STOP_PRICE = 0.001  # Suggested stops are never pushed below this
+MAX_PORTFOLIO_RISK_PERCENT = 5.000  # Cap on risk across all open trades (% of total capital)
+HIGH_CAPITAL_USAGE = 0.800  # Warn above this fraction of liquid capital
+WIDE_STOP_PERCENT = 10.000  # Warn when the effective stop is further than this from entry
+
+Direction = Literal["Long", "Short"]
+
+# Row status codes, shared with the batch engine's ``status`` column
+STATUS_OK = "ok"
+STATUS_INVALID_ENTRY = "invalid_entry"
+STATUS_INVALID_DIRECTION = "invalid_direction"
+STATUS_STOP_WRONG_SIDE = "stop_wrong_side"
+STATUS_ZERO_RISK = "zero_risk"
+STATUS_INVALID_FX_RATE = "invalid_fx_rate"
+
+# Risk notices for a valid trade (the warnings shown under the results)
+NOTICE_HIGH_LEVERAGE = "high_leverage"
+NOTICE_LOW_REWARD_RISK = "low_reward_risk"
+NOTICE_CAPITAL_EXCEEDED = "capital_exceeded"
+NOTICE_HIGH_CAPITAL_USAGE = "high_capital_usage"
+NOTICE_WIDE_STOP = "wide_stop"
+NOTICE_STOP_PAST_LIQUIDATION = "stop_past_liquidation"  # Needs a margin-tier table (liquidation.py)
+NOTICE_BELOW_MIN_NOTIONAL = "below_min_notional"  # Needs instrument metadata (instruments.py)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# ⚠️ Exceptions
+# ────────────────────────────────────────────────────────────────────────────────
+class TradeValidationError(ValueError):
+    """Base class for rejected trade inputs. ``code`` matches a batch status."""
+
+    code = "invalid"
+
+
+class InvalidEntryPriceError(TradeValidationError):
+    code = STATUS_INVALID_ENTRY
+
+
+class InvalidDirectionError(TradeValidationError):
+    code = STATUS_INVALID_DIRECTION
+
+
+class StopLossSideError(TradeValidationError):
+    code = STATUS_STOP_WRONG_SIDE
+
+
+class ZeroRiskError(TradeValidationError):
+    code = STATUS_ZERO_RISK
+
+
+class InvalidFxRateError(TradeValidationError):
+    code = STATUS_INVALID_FX_RATE
+
+
+class TradeMetrics(NamedTuple):
+    risk_amount: float
+    position_size: float
+    effective_stop_loss: float
+    capital_required: float
+    expected_reward: float
+    reward_to_risk: float
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📏 Step Rounding (lot sizes and ticks)
+# ────────────────────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=1024)
+def _step_fraction(step: float) -> Fraction:
+    # The decimal the step prints as (0.001, not the binary 0.001000000000000000020…)
+    return Fraction(repr(float(step)))
+
+
+def _steps_below(value: float, step: Fraction) -> int:
+    """
+    Whole steps in ``value``. A float that is the nearest float to a multiple
+    (e.g. 0.3 for 3 × 0.1) counts as that multiple, although its binary value
+    is a hair below it.
+    """
+    steps = math.floor(Fraction(value) / step)
+    return steps + 1 if float((steps + 1) * step) == value else steps
+
+
+def floor_to_step(value: float, step: float) -> float:
+    """Largest multiple of ``step`` not above ``value``, computed exactly."""
+    fraction = _step_fraction(step)
+    return float(_steps_below(value, fraction) * fraction)
+
+
+def round_to_step(value: float, step: float) -> float:
+    """Nearest multiple of ``step`` (ties to the even multiple), computed exactly."""
+    fraction = _step_fraction(step)
+    steps = _steps_below(value, fraction)
+    half = float((2 * steps + 1) * fraction / 2)
+    if value > half or (value == half and steps % 2):
+        steps += 1
+    return float(steps * fraction)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🛑 Stop Suggestion
+# ────────────────────────────────────────────────────────────────────────────────
+def suggest_atr_stop(
+    entry_price: float,
+    direction: Direction,
+    atr_value: float,
+    atr_multiplier: float,
+) -> float:
+    """Stop placed ``atr_value * atr_multiplier`` away from entry."""
+    atr_distance = atr_value * atr_multiplier
+    stop = entry_price - atr_distance if direction == "Long" else entry_price + atr_distance
+    return max(MIN_STOP_PRICE, stop)
+
+
+def suggest_fixed_risk_stop(
+    entry_price: float,
+    direction: Direction,
+    liquid_capital: float,
+    risk_percent: float,
+    leverage: float,
+) -> float:
+    """Stop that risks exactly ``risk_percent`` when the full leveraged capital is deployed."""
+    risk_amount = liquid_capital * (risk_percent / 100)
+    max_units = (liquid_capital * leverage) / entry_price if entry_price > 0 else 0
+    risk_per_unit = (risk_amount / max_units) if max_units > 0 else 0
+    stop = entry_price - risk_per_unit if direction == "Long" else entry_price + risk_per_unit
+    return max(MIN_STOP_PRICE, stop)
+
+
+def suggest_stop_loss(
+    entry_price: float,
+    direction: Direction,
+    liquid_capital: float,
+    risk_percent: float,
+    leverage: float,
+    use_atr: bool = False,
+    atr_value: float = 0.0,
+    atr_multiplier: float = 0.0,
+) -> float:
+    """Suggested stop: ATR-based when enabled with a positive ATR, fixed-risk otherwise."""
+    if use_atr and atr_value > 0:
+        return suggest_atr_stop(entry_price, direction, atr_value, atr_multiplier)
+    return suggest_fixed_risk_stop(
+        entry_price, direction, liquid_capital, risk_percent, leverage
+    )
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧮 Core Calculations
+# ────────────────────────────────────────────────────────────────────────────────
+def calculate_trade_metrics(
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: Direction,
+    target_price: float,
+    leverage: float,
+    stop_loss_price: float,
+    slippage_pct: float,
+    size_step: Optional[float] = None,
+    fx_rate: float = 1.0,
+) -> TradeMetrics:
+    """
+    Enhanced calculations with rounding and leverage checks.
+
+    ``size_step`` is the instrument's tradable size increment in units
+    (lot step × contract multiplier, see ``instruments.Instrument``); when
+    given, the size is floored to it so the order is accepted and never
+    risks more than planned.
+
+    ``fx_rate`` is units of the account currency per unit of the quote
+    currency (see ``fx_rates.FxRates``). Capital and the returned
+    ``risk_amount``, ``capital_required`` and ``expected_reward`` are in the
+    account currency; prices and the stop are in the quote currency.
+    """
+    # Validate entry price and direction
+    if entry_price <= 0:
+        raise InvalidEntryPriceError("Entry price must be positive.")
+    if direction not in ("Long", "Short"):
+        raise InvalidDirectionError(f"Direction must be 'Long' or 'Short', got {direction!r}.")
+    if not (fx_rate > 0 and math.isfinite(fx_rate)):
+        raise InvalidFxRateError("FX rate between the account and quote currencies must be positive.")
+
+    # 1) Amount you're risking (account currency)
+    risk_amount = liquid_capital * (risk_percent / 100)
+
+    # 2) Calculate effective stop loss with slippage
+    effective_stop_loss = stop_loss_price
+    if slippage_pct > 0:
+        if direction == "Long":
+            effective_stop_loss = stop_loss_price * (1 - slippage_pct)
+        else:  # "Short"
+            effective_stop_loss = stop_loss_price * (1 + slippage_pct)
+
+    # Validate stop loss
+    if direction == "Long" and effective_stop_loss >= entry_price:
+        raise StopLossSideError(
+            "🚫 For Long trades, Stop Loss must be below Entry Price (accounting for slippage)."
+        )
+    if direction == "Short" and effective_stop_loss <= entry_price:
+        raise StopLossSideError(
+            "🚫 For Short trades, Stop Loss must be above Entry Price (accounting for slippage)."
+        )
+
+    # Calculate actual risk per unit
+    actual_risk_per_unit = abs(entry_price - effective_stop_loss)
+    if actual_risk_per_unit == 0:
+        raise ZeroRiskError("Stop Loss too close to Entry Price. Adjust your stop or slippage.")
+
+    # Position size (rounded to 3 decimal places for crypto, or down to the lot step);
+    # the risk is converted to the quote currency the prices are in
+    risk_in_quote = risk_amount / fx_rate
+    if size_step:
+        position_size = floor_to_step(risk_in_quote / actual_risk_per_unit, size_step)
+    else:
+        position_size = round(risk_in_quote / actual_risk_per_unit, POSITION_SIZE_DECIMALS)
+
+    # Capital required with leverage warning (back in the account currency)
+    position_value = position_size * entry_price
+    capital_required = (position_value / leverage * fx_rate) if leverage > 0 else 0.0
+
+    # Reward calculations
+    reward_per_unit = abs(target_price - entry_price)
+    expected_reward = reward_per_unit * position_size * fx_rate
+    reward_to_risk = (expected_reward / risk_amount) if risk_amount > 0 else 0.0
+
+    return TradeMetrics(
+        risk_amount,
+        position_size,
+        effective_stop_loss,
+        capital_required,
+        expected_reward,
+        reward_to_risk,
+    )
+
+
+def trade_notices(
+    liquid_capital: float,
+    leverage: float,
+    entry_price: float,
+    effective_stop_loss: float,
+    capital_required: float,
+    reward_to_risk: float,
+    past_liquidation: bool = False,
+    below_min_notional: bool = False,
+) -> List[str]:
+    """
+    ``NOTICE_*`` codes that apply to a sized trade, in display order.
+
+    ``past_liquidation`` comes from ``liquidation.stop_past_liquidation``
+    when the exchange's margin tiers are known; ``below_min_notional`` from
+    ``instruments.Instrument.below_min_notional`` when the symbol is.
+    """
+    notices = []
+    if past_liquidation:
+        notices.append(NOTICE_STOP_PAST_LIQUIDATION)
+    if below_min_notional:
+        notices.append(NOTICE_BELOW_MIN_NOTIONAL)
+    if leverage >= MAX_LEVERAGE_WARNING:
+        notices.append(NOTICE_HIGH_LEVERAGE)
+    if reward_to_risk < MIN_REWARD_RISK_RATIO:
+        notices.append(NOTICE_LOW_REWARD_RISK)
+    if capital_required > liquid_capital:
+        notices.append(NOTICE_CAPITAL_EXCEEDED)
+    elif capital_required > HIGH_CAPITAL_USAGE * liquid_capital:
+        notices.append(NOTICE_HIGH_CAPITAL_USAGE)
+    if abs(entry_price - effective_stop_loss) / entry_price * 100 > WIDE_STOP_PERCENT:
+        notices.append(NOTICE_WIDE_STOP)
+    return notices
@@ -0,0 +1,231 @@
+"""
+Probability of ruin or of a given drawdown under fixed-fractional risk.
+
+Every trade risks ``risk_percent`` of current equity: a win multiplies equity
+by ``1 + r·b`` and a loss by ``1 − r`` (``b`` is the reward-to-risk). In log
+equity that is a random walk with steps ``+u = log(1 + r·b)`` and
+``−d = log(1 − r)``, and "ruin" is the walk dropping ``L = −log(1 − level)``
+below its start (or, with ``from_peak``, below its running peak).
+
+Closed forms, for ruin from the start over an unlimited number of trades:
+
+- non-positive expected log growth: ruin at any level is certain;
+- a win worth a whole number ``k`` of losses in log terms: the walk only
+  steps down one loss at a time, so ``P = z^N``, where ``z`` is the root in
+  (0, 1) of ``p·z^(k+1) − z + q = 0`` and ``N`` the losses to the level.
+
+Everything else is solved by dynamic programming on a grid of log-equity
+states (a loss moves ``CELLS_PER_LOSS`` cells, a win the nearest whole
+number of cells), stepping the distribution of surviving equity forward one
+trade at a time; the absorbed mass after ``t`` trades is the probability of
+ruin within ``t`` trades, so one solve gives the whole curve.
+
+Parameters are quantized (``*_QUANTUM``) before solving; solved tables are
+kept in memory and in ``TABLE_DIR``, so a repeat lookup is a dict access
+and the first solve after a restart is a file read.
+"""
+import hashlib
+import math
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+TABLE_DIR = Path(os.environ.get(
+    "RISK_CALC_RUIN_TABLES",
+    Path(os.environ.get("RISK_CALC_DATA_DIR", Path(__file__).resolve().parent / "data")) / "ruin_tables",
+))
+RISK_QUANTUM = 0.001  # Percent
+WIN_RATE_QUANTUM = 0.001
+PAYOFF_QUANTUM = 0.01
+LEVEL_QUANTUM = 0.001
+CELLS_PER_LOSS = 32  # Grid resolution: one loss moves this many cells
+MAX_TRADES = 5_000  # Longest horizon solved (and the horizon used when no closed form applies)
+TABLE_VERSION = 1  # Bump when the solver changes, so old disk tables are ignored
+METHOD_CERTAIN, METHOD_CLOSED_FORM, METHOD_DP = "certain", "closed_form", "dp"
+
+
+class RuinParams(NamedTuple):
+    """Quantized inputs, as integer multiples of their quanta (hashable and exact)."""
+
+    risk: int  # risk_percent / RISK_QUANTUM
+    win_rate: int  # win_rate / WIN_RATE_QUANTUM
+    payoff: int  # reward_to_risk / PAYOFF_QUANTUM
+    level: int  # ruin level (fractional drawdown) / LEVEL_QUANTUM
+    from_peak: bool
+
+    @classmethod
+    def quantize(cls, risk_percent, win_rate, reward_to_risk, level, from_peak=False) -> "RuinParams":
+        if not 0 < risk_percent < 100:
+            raise ValueError("Risk % must be between 0 and 100.")
+        if not 0 <= win_rate <= 1:
+            raise ValueError("Win rate must be between 0 and 1.")
+        if reward_to_risk <= 0:
+            raise ValueError("Reward-to-risk must be positive.")
+        if not 0 < level < 1:
+            raise ValueError("Ruin level must be a drawdown between 0 and 1.")
+        return cls(
+            max(int(round(risk_percent / RISK_QUANTUM)), 1),
+            int(round(win_rate / WIN_RATE_QUANTUM)),
+            max(int(round(reward_to_risk / PAYOFF_QUANTUM)), 1),
+            max(int(round(level / LEVEL_QUANTUM)), 1),
+            bool(from_peak),
+        )
+
+    @property
+    def steps(self):
+        """``(p, u, d, L)``: win probability, log win and loss steps, log distance to ruin."""
+        r = self.risk * RISK_QUANTUM / 100
+        return (
+            self.win_rate * WIN_RATE_QUANTUM,
+            math.log1p(r * self.payoff * PAYOFF_QUANTUM),
+            -math.log1p(-r),
+            -math.log1p(-self.level * LEVEL_QUANTUM),
+        )
+
+
+class RuinResult(NamedTuple):
+    probability: float
+    method: str  # METHOD_*
+    trades: Optional[int]  # Horizon; None for unlimited
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧮 Closed Forms
+# ────────────────────────────────────────────────────────────────────────────────
+def _lattice_ratio(u: float, d: float) -> Optional[int]:
+    """``k`` when a win is (to within float error) exactly ``k`` losses in log terms."""
+    k = round(u / d)
+    return k if k >= 1 and math.isclose(u, k * d, rel_tol=1e-9) else None
+
+
+def closed_form_ruin(params: RuinParams) -> Optional[RuinResult]:
+    """Unlimited-horizon ruin from the start, when a closed form applies; None otherwise."""
+    if params.from_peak:
+        return None
+    p, u, d, L = params.steps
+    q = 1 - p
+    if p * u - q * d <= 0:
+        return RuinResult(1.0, METHOD_CERTAIN, None)
+    k = _lattice_ratio(u, d)
+    if k is None:
+        return None
+    # Root of p·z^(k+1) − z + q in (0, 1): f(0) = q > 0, f(1) = 0 with f'(1) > 0 (positive drift)
+    low, high = 0.0, 1.0 - 1e-15
+    for _ in range(200):
+        middle = (low + high) / 2
+        if p * middle ** (k + 1) - middle + q > 0:
+            low = middle
+        else:
+            high = middle
+    losses = math.ceil(L / d - 1e-12)
+    return RuinResult(low ** losses, METHOD_CLOSED_FORM, None)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🔁 Dynamic Programming over Equity States
+# ────────────────────────────────────────────────────────────────────────────────
+def _solve_from_start(p: float, win_cells: int, barrier: int, trades: int) -> np.ndarray:
+    m, q = CELLS_PER_LOSS, 1 - p
+    curve = np.zeros(trades + 1)
+    if barrier > m * trades:
+        return curve  # Too far away to reach in time
+    # Cell c is c cells above the ruin level. Mass more than m·(trades left)
+    # cells up can never be ruined in time, so it is dropped as safe and the
+    # grid shrinks by one loss every trade.
+    mass = np.zeros(m * trades + 1)
+    mass[barrier] = 1.0
+    ruined = 0.0
+    for t in range(1, trades + 1):
+        reach = m * (trades - t)
+        step = np.zeros(reach + 1)
+        ruined += q * mass[1:m + 1].sum()
+        step[1:] = q * mass[m + 1:]
+        if reach > win_cells:
+            step[1 + win_cells:] += p * mass[1:reach + 1 - win_cells]
+        mass = step
+        curve[t] = ruined
+    return curve
+
+
+def _solve_from_peak(p: float, win_cells: int, barrier: int, trades: int) -> np.ndarray:
+    m, q = CELLS_PER_LOSS, 1 - p
+    curve = np.zeros(trades + 1)
+    # Cell c is c cells below the running peak; a win never climbs past the peak
+    mass = np.zeros(barrier)
+    mass[0] = 1.0
+    ruined = 0.0
+    for t in range(1, trades + 1):
+        ruined += q * mass[max(barrier - m, 0):].sum()
+        step = np.zeros_like(mass)
+        if barrier > m:
+            step[m:] = q * mass[:barrier - m]
+        step[0] += p * mass[:win_cells + 1].sum()
+        if barrier > win_cells + 1:
+            step[1:barrier - win_cells] += p * mass[win_cells + 1:]
+        mass = step
+        curve[t] = ruined
+    return curve
+
+
+def _table_path(params: RuinParams, trades: int) -> Path:
+    key = f"{TABLE_VERSION}:{CELLS_PER_LOSS}:{tuple(params)}:{trades}".encode()
+    return TABLE_DIR / f"{hashlib.blake2b(key, digest_size=12).hexdigest()}.npy"
+
+
+@lru_cache(maxsize=256)
+def ruin_table(params: RuinParams, trades: int) -> np.ndarray:
+    """
+    Read-only ``curve[t]``: probability of ruin within ``t`` trades, ``t`` in
+    ``0..trades``. Cached in memory and on disk by the quantized parameters.
+    """
+    if not 1 <= trades <= MAX_TRADES:
+        raise ValueError(f"Horizon must be between 1 and {MAX_TRADES:,} trades.")
+    path = _table_path(params, trades)
+    try:
+        curve = np.load(path)
+    except (OSError, ValueError):
+        p, u, d, L = params.steps
+        win_cells = max(int(round(u / d * CELLS_PER_LOSS)), 1)
+        barrier = max(math.ceil(L / d * CELLS_PER_LOSS - 1e-9), 1)
+        solve = _solve_from_peak if params.from_peak else _solve_from_start
+        curve = np.minimum(solve(p, win_cells, barrier, trades), 1.0)
+        try:
+            TABLE_DIR.mkdir(parents=True, exist_ok=True)
+            # Written under a temporary name, so a reader never sees half a table
+            with tempfile.NamedTemporaryFile(dir=TABLE_DIR, suffix=".npy", delete=False) as f:
+                np.save(f, curve)
+            os.replace(f.name, path)
+        except OSError:
+            pass  # Read-only disk: the memory cache still works
+    curve.flags.writeable = False
+    return curve
+
+
+def ruin_probability(
+    risk_percent: float,
+    win_rate: float,
+    reward_to_risk: float,
+    level: float,
+    trades: Optional[int] = None,
+    from_peak: bool = False,
+) -> RuinResult:
+    """
+    Probability that equity falls ``level`` (e.g. 0.5 for a 50% drawdown)
+    below its start, or below its running peak with ``from_peak``.
+
+    ``trades=None`` asks about an unlimited horizon: answered in closed
+    form where one applies, otherwise by the DP over ``MAX_TRADES`` trades
+    (a drawdown from the peak is certain eventually, so that always uses
+    the DP horizon).
+    """
+    params = RuinParams.quantize(risk_percent, win_rate, reward_to_risk, level, from_peak)
+    if trades is None:
+        closed = closed_form_ruin(params)
+        if closed is not None:
+            return closed
+        trades = MAX_TRADES
+    return RuinResult(float(ruin_table(params, int(trades))[-1]), METHOD_DP, int(trades))
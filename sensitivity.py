@@ -0,0 +1,118 @@
+"""
+Sensitivity of the sizing math over stop-distance × leverage / risk% grids.
+
+The whole grid goes through ``calculate_trade_metrics_batch`` in one call.
+Rendered heatmaps are PNG bytes kept in an LRU cache keyed by every input,
+so flipping back to a recent view costs nothing.
+"""
+import io
+from functools import lru_cache
+from typing import Dict, Literal, Optional, Tuple
+
+import numpy as np
+
+from risk_batch import calculate_trade_metrics_batch
+
+HEATMAP_METRICS = ("position_size", "capital_required", "reward_to_risk")
+HEATMAP_TITLES = {
+    "position_size": "Position Size (units)",
+    "capital_required": "Capital Required ({currency})",
+    "reward_to_risk": "Reward-to-Risk",
+}
+DEFAULT_RESOLUTION = 200
+RENDER_CACHE_SIZE = 64
+
+YAxis = Literal["leverage", "risk_percent"]
+
+
+def sensitivity_grid(
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: str,
+    target_price: float,
+    leverage: float,
+    slippage_pct: float,
+    stop_distances: np.ndarray,
+    y_axis: YAxis,
+    y_values: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the sizing math on every (y, stop distance) pair.
+
+    ``stop_distances`` are fractions of the entry price (0.02 = 2%). Returns
+    one ``(len(y_values), len(stop_distances))`` array per metric in
+    ``HEATMAP_METRICS``; invalid cells are NaN.
+    """
+    distance, y = np.meshgrid(stop_distances, y_values)
+    stop = entry_price * (1 - distance) if direction == "Long" else entry_price * (1 + distance)
+    metrics = calculate_trade_metrics_batch(
+        liquid_capital,
+        y.ravel() if y_axis == "risk_percent" else risk_percent,
+        entry_price,
+        direction,
+        target_price,
+        y.ravel() if y_axis == "leverage" else leverage,
+        stop.ravel(),
+        slippage_pct,
+    )
+    return {m: metrics[m].to_numpy().reshape(distance.shape) for m in HEATMAP_METRICS}
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_heatmaps(
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: str,
+    target_price: float,
+    leverage: float,
+    slippage_pct: float,
+    max_stop_distance_pct: float,
+    y_axis: YAxis,
+    y_range: Tuple[float, float],
+    resolution: int = DEFAULT_RESOLUTION,
+    marker: Optional[Tuple[float, float]] = None,
+    currency: str = "$",
+) -> bytes:
+    """
+    PNG with one heatmap per metric; ``marker`` is (stop distance %, y) and
+    ``currency`` labels the money amounts.
+
+    Arguments are the cache key, so they must be hashable (tuples, not lists).
+    """
+    from matplotlib.colors import LogNorm  # Heavy; only needed on a cache miss
+    from matplotlib.figure import Figure
+
+    stop_distances = np.linspace(max_stop_distance_pct / resolution, max_stop_distance_pct, resolution) / 100
+    y_values = np.linspace(y_range[0], y_range[1], resolution)
+    grids = sensitivity_grid(
+        liquid_capital, risk_percent, entry_price, direction, target_price,
+        leverage, slippage_pct, stop_distances, y_axis, y_values,
+    )
+
+    y_label = "Leverage (x)" if y_axis == "leverage" else "Risk % per trade"
+    extent = (stop_distances[0] * 100, stop_distances[-1] * 100, y_values[0], y_values[-1])
+    fig = Figure(figsize=(10, 3.2), facecolor="#0F0F1A")
+    for ax, metric in zip(fig.subplots(1, len(HEATMAP_METRICS)), HEATMAP_METRICS):
+        values = np.ma.masked_invalid(grids[metric])
+        # Every metric scales with 1 / stop distance, so a linear colour scale
+        # is swamped by the tightest stops; use a log scale when possible
+        norm = LogNorm() if values.count() and values.min() > 0 else None
+        image = ax.imshow(
+            values, origin="lower", aspect="auto", extent=extent,
+            cmap="viridis", interpolation="nearest", norm=norm,
+        )
+        colorbar = fig.colorbar(image, ax=ax)
+        colorbar.ax.tick_params(colors="#90CAF9", labelsize=7)
+        if marker is not None:
+            ax.plot(*marker, marker="x", color="#FF6347", markersize=9, markeredgewidth=2)
+        ax.set_title(HEATMAP_TITLES[metric].format(currency=currency), color="#E0E0E0", fontsize=9)
+        ax.set_xlabel("Stop distance from entry (%)", color="#90CAF9", fontsize=8)
+        ax.set_ylabel(y_label, color="#90CAF9", fontsize=8)
+        ax.tick_params(colors="#90CAF9", labelsize=7)
+        ax.set_facecolor("#1A1A2E")
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=110)
+    return buffer.getvalue()
@@ -0,0 +1,528 @@
+"""
+Local HTTP/JSON sizing service for programs that don't go through the UI.
+
+Requests carry the same fields as a trade-plan row (see
+``bulk_import.TRADE_PLAN_DEFAULTS``; ``slippage_pct`` is in percent and a
+missing ``stop_loss_price`` is replaced by the suggested stop, as in
+``main()``). Concurrent requests arriving within ``batch_window`` seconds are
+merged into one vectorized evaluation on a worker thread, so the event loop
+keeps accepting while a batch is sized.
+
+Trades are sized like the app sizes them. A ``symbol`` found in the
+instrument registry gets prices snapped to its tick and a size floored to
+whole lots. ``account_currency`` (and ``quote_currency``, inferred from the
+symbol's suffix when missing) convert through the FX rate table, so money
+amounts come back in the account currency. Without them a trade is sized in
+raw units with capital in the quote currency.
+
+Endpoints:
+    POST /v1/size    one trade object or a list of them -> sized trade(s)
+    POST /v1/stop    same input, stop fields only (``target_price`` optional)
+    GET  /v1/stats   batching and backpressure counters
+    GET  /healthz
+
+Backpressure: at most ``max_connections`` open connections and
+``max_pending`` queued trades; beyond that requests get ``503`` with a
+``Retry-After`` header instead of queueing without bound.
+
+    python sizing_service.py --port 8765
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bulk_import import CURRENCY_COLUMNS, NUMERIC_COLUMNS, REQUIRED_COLUMNS, TRADE_PLAN_DEFAULTS
+from fx_rates import DEFAULT_CURRENCY, DEFAULT_FX_FILE, FxRateError, FxRates, quote_currency_of
+from instruments import DEFAULT_INSTRUMENTS_FILE, InstrumentFileError, InstrumentRegistry
+from risk_batch import (
+    BATCH_OUTPUT_COLUMNS,
+    calculate_trade_metrics_batch,
+    round_to_step_batch,
+    suggest_stop_loss_batch,
+    trade_notices_batch,
+)
+from risk_core import NOTICE_BELOW_MIN_NOTIONAL, STATUS_OK
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_WINDOW = 0.002  # Seconds to wait for more requests after the first
+DEFAULT_MAX_BATCH = 4096  # Trades per vectorized evaluation
+DEFAULT_MAX_PENDING = 16_384  # Queued trades before new requests get 503
+DEFAULT_MAX_CONNECTIONS = 512
+MAX_TRADES_PER_REQUEST = 1_000
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 30.0  # Seconds a keep-alive connection may sit idle
+
+STOP_FIELDS = ("suggested_stop_loss", "stop_loss_price", "effective_stop_loss", "status")
+TEXT_FIELDS = ("symbol",) + CURRENCY_COLUMNS
+KNOWN_FIELDS = frozenset(REQUIRED_COLUMNS) | frozenset(TRADE_PLAN_DEFAULTS) | frozenset(TEXT_FIELDS)
+
+
+class RequestError(ValueError):
+    """Malformed request; answered with ``status`` and a JSON error body."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceOverloaded(RequestError):
+    def __init__(self, message: str = "Service overloaded, retry shortly."):
+        super().__init__(message, status=503)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🧮 Vectorized Evaluation
+# ────────────────────────────────────────────────────────────────────────────────
+def validate_trade(trade, stop_only: bool = False) -> Dict:
+    """Check one JSON trade object; returns it with ``target_price`` filled for stop-only calls."""
+    if not isinstance(trade, dict):
+        raise RequestError("Each trade must be a JSON object.")
+    unknown = sorted(set(trade) - KNOWN_FIELDS)
+    if unknown:
+        raise RequestError(f"Unknown fields: {', '.join(unknown)}.")
+    if stop_only and trade.get("target_price") is None:
+        trade = {**trade, "target_price": trade.get("entry_price")}
+    missing = [c for c in REQUIRED_COLUMNS if trade.get(c) is None]
+    if missing:
+        raise RequestError(f"Missing required fields: {', '.join(missing)}.")
+    numbers = {}
+    for column in NUMERIC_COLUMNS:
+        value = trade.get(column)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RequestError(f"{column} must be a number.")
+        try:
+            numbers[column] = float(value)  # Huge JSON integers overflow here, not in the batch
+        except OverflowError:
+            numbers[column] = math.inf
+        if not math.isfinite(numbers[column]):
+            raise RequestError(f"{column} must be a finite number.")
+    trade = {**trade, **numbers}
+    if not isinstance(trade["direction"], str):
+        raise RequestError("direction must be 'Long' or 'Short'.")
+    for field in TEXT_FIELDS:
+        if trade.get(field) is not None and not isinstance(trade[field], str):
+            raise RequestError(f"{field} must be a string.")
+    if not isinstance(trade.get("use_atr", False), bool):
+        raise RequestError("use_atr must be true or false.")
+    return trade
+
+
+def _column(trades: List[Dict], name: str, default: float) -> np.ndarray:
+    return np.fromiter(
+        (default if (v := t.get(name)) is None else v for t in trades),
+        dtype=np.float64,
+        count=len(trades),
+    )
+
+
+def _snap(values: np.ndarray, tick_size: np.ndarray) -> np.ndarray:
+    """Prices snapped to each row's tick, leaving rows without an instrument alone."""
+    known = ~np.isnan(tick_size)
+    values = values.copy()
+    values[known] = round_to_step_batch(values[known], tick_size[known])
+    return values
+
+
+def _fx_rates(trades: List[Dict], fx_rates: Optional[FxRates]) -> np.ndarray:
+    """Per-trade account units per quote unit; NaN where no rate links the two."""
+    currencies = fx_rates.currencies if fx_rates is not None else ()
+    account = [(t.get("account_currency") or DEFAULT_CURRENCY) for t in trades]
+    quote = [
+        t.get("quote_currency") or quote_currency_of(t.get("symbol") or "", currencies) or DEFAULT_CURRENCY
+        for t in trades
+    ]
+    if fx_rates is not None:
+        return fx_rates.rate_batch(quote, account)
+    same = [q.strip().upper() == a.strip().upper() for q, a in zip(quote, account)]
+    return np.where(same, 1.0, np.nan)
+
+
+def evaluate_trades(
+    trades: List[Dict],
+    instruments: Optional[InstrumentRegistry] = None,
+    fx_rates: Optional[FxRates] = None,
+) -> List[Dict]:
+    """
+    Size validated trades in one vectorized pass.
+
+    Same defaults and units as ``bulk_import.size_trade_plan``, but built
+    straight from the request dicts: building a DataFrame costs more than the
+    sizing itself at the batch sizes the service sees. ``instruments`` and
+    ``fx_rates`` play the same part as there; without ``fx_rates`` only
+    trades whose quote and account currencies match can be sized.
+    """
+    columns = {
+        name: _column(trades, name, TRADE_PLAN_DEFAULTS.get(name, math.nan)) for name in NUMERIC_COLUMNS
+    }
+    direction = np.array([t["direction"].strip().capitalize() for t in trades], dtype=object)
+    use_atr = np.array([t.get("use_atr", TRADE_PLAN_DEFAULTS["use_atr"]) for t in trades], dtype=bool)
+
+    specs = None
+    if instruments is not None and any(t.get("symbol") for t in trades):
+        specs = instruments.lookup_batch([t.get("symbol") or "" for t in trades])
+        for name in ("entry_price", "target_price", "stop_loss_price"):
+            columns[name] = _snap(columns[name], specs["tick_size"])
+    fx_rate = 1.0
+    if any(t.get(c) for t in trades for c in CURRENCY_COLUMNS):
+        fx_rate = _fx_rates(trades, fx_rates)
+
+    suggested = suggest_stop_loss_batch(
+        columns["entry_price"], direction, columns["liquid_capital"], columns["risk_percent"],
+        columns["leverage"], use_atr, columns["atr_value"], columns["atr_multiplier"],
+    )
+    if specs is not None:
+        suggested = _snap(suggested, specs["tick_size"])
+    stop = np.where(np.isnan(columns["stop_loss_price"]), suggested, columns["stop_loss_price"])
+    metrics = calculate_trade_metrics_batch(
+        columns["liquid_capital"], columns["risk_percent"], columns["entry_price"], direction,
+        columns["target_price"], columns["leverage"], stop,
+        columns["slippage_pct"] / 100,  # Percent to decimal
+        None if specs is None else specs["size_step"],
+        fx_rate,
+    )
+    outputs = {c: metrics[c].to_numpy() for c in BATCH_OUTPUT_COLUMNS}
+    notices = trade_notices_batch(
+        columns["liquid_capital"], columns["leverage"], columns["entry_price"],
+        outputs["effective_stop_loss"], outputs["capital_required"], outputs["reward_to_risk"],
+    )
+    status = metrics["status"].to_numpy()
+    valid = status == STATUS_OK
+    fx_rate = np.broadcast_to(np.asarray(fx_rate, dtype=np.float64), (len(trades),))
+    contracts = below_min_notional = np.full(len(trades), np.nan)
+    if specs is not None:
+        with np.errstate(invalid="ignore"):
+            notional = outputs["position_size"] * columns["entry_price"]
+            contracts = outputs["position_size"] / specs["multiplier"]
+            below_min_notional = np.where(
+                np.isnan(specs["min_notional"]), np.nan, (notional <= 0) | (notional < specs["min_notional"])
+            )
+
+    results = []
+    for i in range(len(trades)):
+        result = {
+            "status": status[i],
+            "suggested_stop_loss": _json_float(suggested[i]),
+            "stop_loss_price": _json_float(stop[i]),
+        }
+        for c in BATCH_OUTPUT_COLUMNS:
+            result[c] = _json_float(outputs[c][i])
+        result["fx_rate"] = _json_float(fx_rate[i])
+        result["contracts"] = _json_float(contracts[i])
+        below = None if np.isnan(below_min_notional[i]) else bool(below_min_notional[i])
+        result["below_min_notional"] = below
+        result["notices"] = [NOTICE_BELOW_MIN_NOTIONAL] if valid[i] and below else []
+        result["notices"] += [code for code, flags in notices.items() if valid[i] and flags[i]]
+        results.append(result)
+    return results
+
+
+def _json_float(value: float) -> Optional[float]:
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 📦 Micro-Batching
+# ────────────────────────────────────────────────────────────────────────────────
+class MicroBatcher:
+    """
+    Merges trades submitted within ``batch_window`` into one evaluation.
+
+    The queue is bounded by ``max_pending`` trades; ``submit`` raises
+    ``ServiceOverloaded`` instead of waiting when it is full. ``instruments``
+    and ``fx_rates`` are passed to ``evaluate_trades``.
+    """
+
+    def __init__(
+        self,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        instruments: Optional[InstrumentRegistry] = None,
+        fx_rates: Optional[FxRates] = None,
+    ):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._evaluate = partial(evaluate_trades, instruments=instruments, fx_rates=fx_rates)
+        self._queue: "asyncio.Queue[Tuple[List[Dict], asyncio.Future]]" = asyncio.Queue()
+        self._pending = 0
+        self._task: Optional[asyncio.Task] = None
+        # Own thread, so a busy default executor can never stall the batches
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="sizing-batch")
+        self.stats = {"requests": 0, "trades": 0, "batches": 0, "rejected": 0, "max_batch_seen": 0}
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, trades: List[Dict]) -> List[Dict]:
+        if self._pending + len(trades) > self.max_pending:
+            self.stats["rejected"] += 1
+            raise ServiceOverloaded()
+        self._pending += len(trades)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((trades, future))
+        self.stats["requests"] += 1
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.batch_window
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            # Anything that queued up meanwhile rides along without waiting
+            while size < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                batch.append(item)
+                size += len(item[0])
+
+            trades = [trade for request, _ in batch for trade in request]
+            try:
+                results = await loop.run_in_executor(self._executor, self._evaluate, trades)
+            except Exception:
+                # Re-run each request on its own, so only the one that breaks
+                # the evaluation fails instead of every request merged with it
+                logger.exception("Batch evaluation failed; evaluating its %d requests separately", len(batch))
+                for request, future in batch:
+                    try:
+                        result = await loop.run_in_executor(self._executor, self._evaluate, request)
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+            else:
+                start = 0
+                for request, future in batch:
+                    if not future.done():  # Client may have gone away
+                        future.set_result(results[start:start + len(request)])
+                    start += len(request)
+            finally:
+                self._pending -= size
+            self.stats["trades"] += size
+            self.stats["batches"] += 1
+            self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], size)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 🌐 HTTP/1.1 Server
+# ────────────────────────────────────────────────────────────────────────────────
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class SizingService:
+    """asyncio HTTP server in front of a ``MicroBatcher``."""
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        **batcher_options,
+    ):
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self._batcher_options = batcher_options
+        self.batcher: Optional[MicroBatcher] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = 0
+        self.started = time.time()
+
+    async def start(self):
+        self.batcher = MicroBatcher(**self._batcher_options)
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolves port 0
+        logger.info("Sizing service listening on http://%s:%d", self.host, self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.batcher is not None:
+            await self.batcher.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections += 1
+        try:
+            if self._connections > self.max_connections:
+                self.batcher.stats["rejected"] += 1
+                await self._respond(writer, 503, {"error": "Too many connections."}, keep_alive=False)
+                return
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except RequestError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, payload = 200, await self._dispatch(method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception:
+                    logger.exception("Request failed")
+                    status, payload = 500, {"error": "Internal error."}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            self._connections -= 1
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes):
+        if path == "/healthz":
+            return {"status": "ok"}
+        if path == "/v1/stats":
+            return {
+                **self.batcher.stats,
+                "pending": self.batcher._pending,
+                "connections": self._connections,
+                "uptime_seconds": time.time() - self.started,
+            }
+        if path not in ("/v1/size", "/v1/stop"):
+            raise RequestError(f"No such endpoint: {path}", status=404)
+        if method != "POST":
+            raise RequestError("Use POST.", status=405)
+
+        try:
+            payload = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            raise RequestError("Body is not valid JSON.") from None
+        single = not isinstance(payload, list)
+        trades = [payload] if single else payload
+        if not trades or len(trades) > MAX_TRADES_PER_REQUEST:
+            raise RequestError(f"Send between 1 and {MAX_TRADES_PER_REQUEST} trades per request.")
+        stop_only = path == "/v1/stop"
+        trades = [validate_trade(t, stop_only) for t in trades]
+
+        try:
+            results = await self.batcher.submit(trades)
+        except (InstrumentFileError, FxRateError) as e:
+            raise RequestError(str(e), status=500) from None
+        if stop_only:
+            results = [{k: r[k] for k in STOP_FIELDS} for r in results]
+        return results[0] if single else results
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool):
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """(method, path, headers, body), or None when the client closed the connection."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _version = line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError("Malformed request line.") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError("Bad Content-Length.") from None
+    if length > MAX_BODY_BYTES:
+        raise RequestError("Request body too large.", status=413)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW, help="seconds")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING)
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS)
+    parser.add_argument("--instruments", default=DEFAULT_INSTRUMENTS_FILE, help="instrument registry CSV")
+    parser.add_argument("--fx-rates", default=DEFAULT_FX_FILE, help="FX rate CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    service = SizingService(
+        args.host,
+        args.port,
+        args.max_connections,
+        batch_window=args.batch_window,
+        max_batch=args.max_batch,
+        max_pending=args.max_pending,
+        instruments=InstrumentRegistry(args.instruments),
+        fx_rates=FxRates(args.fx_rates),
+    )
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Scale-out take-profit ladders on top of the sizing math.
+
+A ladder is a set of legs, each closing ``fraction`` of the position at a
+target price. Legs fill in order of distance from entry; whatever fraction
+the legs leave open closes at the furthest target. Optionally the stop moves
+to breakeven (entry, still subject to slippage) once the first leg fills.
+
+Batches use compact 2-D arrays, one row per trade and one column per leg,
+padded with NaN for trades with fewer legs, so thousands of trades with up
+to N legs each are evaluated in one vectorized pass.
+"""
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from risk_batch import floor_to_step_batch, round_half_even
+from risk_core import POSITION_SIZE_DECIMALS, STATUS_OK, Direction, TradeMetrics
+
+STATUS_INVALID_LADDER = "invalid_ladder"
+FRACTION_TOLERANCE = 1e-9  # Fractions may sum to 1 + this (typed percentages rarely add up exactly)
+
+
+class LadderResult(NamedTuple):
+    status: str
+    leg_targets: np.ndarray  # Sorted nearest first
+    leg_sizes: np.ndarray  # Units closed at each leg; the last includes any remainder
+    leg_pnl: np.ndarray  # P&L realised by each leg ($)
+    stopped_after_pnl: np.ndarray  # Total P&L if stopped out after 0, 1, … legs filled ($)
+    blended_reward: float  # P&L if every leg fills ($)
+    blended_reward_to_risk: float
+    average_exit: float  # Size-weighted exit price when every leg fills
+
+
+def _pad(rows: Sequence[Sequence[float]]) -> np.ndarray:
+    width = max((len(r) for r in rows), default=0)
+    out = np.full((len(rows), max(width, 1)), np.nan)
+    for i, row in enumerate(rows):
+        out[i, :len(row)] = row
+    return out
+
+
+def evaluate_ladders_batch(
+    entry_price,
+    direction,
+    position_size,
+    effective_stop_loss,
+    risk_amount,
+    targets,
+    fractions,
+    breakeven_after_first=False,
+    slippage_pct=0.0,
+    size_step=None,
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate one ladder per trade.
+
+    Per-trade arguments are scalars or length-n arrays (e.g. columns of
+    ``calculate_trade_metrics_batch``); ``targets`` and ``fractions`` are
+    (n, legs) arrays padded with NaN. Leg sizes are rounded like the
+    position size (floored to ``size_step`` where it is given and not NaN)
+    and the last leg takes the rounding remainder, so the legs always add
+    up to the position.
+
+    Returns per-trade ``status``, ``blended_reward``,
+    ``blended_reward_to_risk`` and ``average_exit``, and (n, legs) arrays
+    ``leg_targets``, ``leg_sizes`` and ``leg_pnl`` plus (n, legs + 1)
+    ``stopped_after_pnl``; rows with status ``invalid_ladder`` (or any
+    invalid input) are NaN.
+    """
+    targets = np.atleast_2d(np.asarray(targets, dtype=np.float64))
+    fractions = np.atleast_2d(np.asarray(fractions, dtype=np.float64))
+    if targets.shape != fractions.shape:
+        raise ValueError("targets and fractions must have the same shape.")
+    n, legs = targets.shape
+    entry_price, position_size, effective_stop_loss, risk_amount, breakeven, slippage_pct = (
+        np.broadcast_to(np.asarray(a, dtype=np.float64 if i != 4 else bool), (n,)).copy()
+        for i, a in enumerate((
+            entry_price, position_size, effective_stop_loss, risk_amount,
+            breakeven_after_first, slippage_pct,
+        ))
+    )
+    direction = np.broadcast_to(np.asarray(direction, dtype=object), (n,))
+    sign = np.where(direction == "Long", 1.0, np.where(direction == "Short", -1.0, np.nan))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Nearest target first; padding (NaN) sorts last
+        distance = (targets - entry_price[:, None]) * sign[:, None]
+        order = np.argsort(np.where(np.isnan(distance), np.inf, distance), axis=1, kind="stable")
+        targets = np.take_along_axis(targets, order, axis=1)
+        fractions = np.take_along_axis(fractions, order, axis=1)
+        distance = np.take_along_axis(distance, order, axis=1)
+        used = ~np.isnan(targets)
+        count = used.sum(axis=1)
+
+        total_fraction = np.where(used, fractions, 0.0).sum(axis=1)
+        valid = (
+            (count > 0)
+            & ~np.isnan(sign)
+            & np.isfinite(position_size)
+            & np.all(~used | (distance > 0), axis=1)  # Every target beyond entry
+            & np.all(~used | (fractions > 0), axis=1)
+            & (total_fraction <= 1 + FRACTION_TOLERANCE)
+        )
+
+        # Leg sizes, rounded; the last leg closes whatever is left
+        raw = np.where(used, fractions, 0.0) * position_size[:, None]
+        leg_sizes = round_half_even(raw, POSITION_SIZE_DECIMALS)
+        if size_step is not None:
+            step = np.broadcast_to(np.asarray(size_step, dtype=np.float64), (n,))
+            stepped = np.isfinite(step) & (step > 0)  # NaN means no instrument: default rounding
+            if stepped.any():
+                leg_sizes[stepped] = floor_to_step_batch(raw[stepped], step[stepped, None])
+        last = np.maximum(count - 1, 0)
+        rows = np.arange(n)
+        leg_sizes[rows, last] = 0.0
+        leg_sizes[rows, last] = position_size - leg_sizes.sum(axis=1)
+        leg_sizes[~used] = np.nan
+
+        leg_pnl = leg_sizes * distance
+        cumulative_pnl = np.cumsum(np.where(used, leg_pnl, 0.0), axis=1)
+        open_after = position_size[:, None] - np.cumsum(np.where(used, leg_sizes, 0.0), axis=1)
+
+        # Loss per unit still open when stopped: the original stop, or
+        # breakeven (entry with slippage) once a leg has filled
+        stop_loss_per_unit = np.abs(entry_price - effective_stop_loss)
+        breakeven_exit = entry_price * (1 - sign * slippage_pct)
+        breakeven_loss_per_unit = (entry_price - breakeven_exit) * sign
+        later_loss = np.where(breakeven, breakeven_loss_per_unit, stop_loss_per_unit)
+        stopped_after = np.empty((n, legs + 1))
+        stopped_after[:, 0] = -position_size * stop_loss_per_unit
+        stopped_after[:, 1:] = cumulative_pnl - open_after * later_loss[:, None]
+        stopped_after[:, 1:][~used] = np.nan
+
+        blended_reward = cumulative_pnl[:, -1]
+        blended_reward_to_risk = np.where(risk_amount > 0, blended_reward / risk_amount, 0.0)
+        average_exit = np.where(used, leg_sizes * targets, 0.0).sum(axis=1) / position_size
+
+    status = np.where(valid, STATUS_OK, STATUS_INVALID_LADDER).astype(object)
+    for array in (blended_reward, blended_reward_to_risk, average_exit):
+        array[~valid] = np.nan
+    for array in (leg_sizes, leg_pnl, stopped_after):
+        array[~valid] = np.nan
+    return {
+        "status": status,
+        "leg_targets": targets,
+        "leg_sizes": leg_sizes,
+        "leg_pnl": leg_pnl,
+        "stopped_after_pnl": stopped_after,
+        "blended_reward": blended_reward,
+        "blended_reward_to_risk": blended_reward_to_risk,
+        "average_exit": average_exit,
+    }
+
+
+def evaluate_ladder(
+    metrics: TradeMetrics,
+    entry_price: float,
+    direction: Direction,
+    targets: Sequence[float],
+    fractions: Sequence[float],
+    breakeven_after_first: bool = False,
+    slippage_pct: float = 0.0,
+    size_step: Optional[float] = None,
+) -> LadderResult:
+    """One trade's ladder, from its ``calculate_trade_metrics`` result."""
+    result = evaluate_ladders_batch(
+        entry_price, direction, metrics.position_size, metrics.effective_stop_loss,
+        metrics.risk_amount, _pad([targets]), _pad([fractions]),
+        breakeven_after_first, slippage_pct, size_step,
+    )
+    legs = len(targets)
+    return LadderResult(
+        status=result["status"][0],
+        leg_targets=result["leg_targets"][0, :legs],
+        leg_sizes=result["leg_sizes"][0, :legs],
+        leg_pnl=result["leg_pnl"][0, :legs],
+        stopped_after_pnl=result["stopped_after_pnl"][0, :legs + 1],
+        blended_reward=float(result["blended_reward"][0]),
+        blended_reward_to_risk=float(result["blended_reward_to_risk"][0]),
+        average_exit=float(result["average_exit"][0]),
+    )
+
+
+def parse_ladder_column(values, width: Optional[int] = None) -> np.ndarray:
+    """
+    (n, legs) float array from a column of ``;``-separated numbers (e.g.
+    ``"110;120;130"``), padded with NaN; ``width`` fixes the number of legs.
+    """
+    import pandas as pd
+
+    split = pd.Series(values, dtype=object).fillna("").astype(str).str.split(";", expand=True)
+    parsed = split.apply(lambda column: pd.to_numeric(column.str.strip(), errors="coerce"))
+    array = parsed.to_numpy(dtype=np.float64, copy=True)  # Writable even under copy-on-write
+    if width is not None and array.shape[1] < width:
+        array = np.pad(array, ((0, 0), (0, width - array.shape[1])), constant_values=np.nan)
+    return array
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from atr_engine import OHLCFormatError, WilderATR, compute_atr, true_range
+
+
+def _bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.uniform(0, 2, n)
+    low = close - rng.uniform(0, 2, n)
+    return high, low, close
+
+
+def _naive_atr(high, low, close, period):
+    atr = None
+    ranges = []
+    for i in range(len(close)):
+        if i == 0:
+            tr = high[0] - low[0]
+        else:
+            tr = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        ranges.append(tr)
+        if len(ranges) == period:
+            atr = sum(ranges) / period
+        elif len(ranges) > period:
+            atr = (atr * (period - 1) + tr) / period
+    return atr
+
+
+def test_first_true_range_is_the_bar_range():
+    high, low, close = _bars(5)
+    tr = true_range(high, low, close, np.nan)
+    assert tr[0] == high[0] - low[0]
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 14, 100, 1_000])
+def test_chunked_updates_match_the_textbook_recursion(chunk):
+    high, low, close = _bars(1_000)
+    engine = WilderATR(14)
+    for start in range(0, len(close), chunk):
+        engine.update(high[start:start + chunk], low[start:start + chunk], close[start:start + chunk])
+
+    assert engine.bars_seen == 1_000
+    assert engine.atr == pytest.approx(_naive_atr(high, low, close, 14), rel=1e-10)
+
+
+def test_not_ready_until_a_full_period():
+    high, low, close = _bars(13)
+    engine = WilderATR(14)
+    assert np.isnan(engine.update(high, low, close))
+    assert not engine.ready
+    engine.update([close[-1] + 1], [close[-1] - 1], [close[-1]])
+    assert engine.ready
+
+
+def test_growing_csv_only_reads_new_bars(tmp_path):
+    high, low, close = _bars(300)
+    frame = pd.DataFrame({"Open": close, "High": high, "Low": low, "Close": close})
+    path = tmp_path / "bars.csv"
+    frame.iloc[:200].to_csv(path, index=False)
+
+    engine = WilderATR(14)
+    engine.update_from_file(path)
+    offset = engine.offset
+    with open(path, "a") as f:
+        frame.iloc[200:].to_csv(f, index=False, header=False)
+    engine.update_from_file(path)
+
+    assert engine.offset > offset
+    assert engine.atr == pytest.approx(_naive_atr(high, low, close, 14), rel=1e-10)
+
+
+def test_state_round_trips_through_json(tmp_path):
+    high, low, close = _bars(50)
+    engine = WilderATR(10)
+    engine.update(high[:30], low[:30], close[:30])
+    engine.save(tmp_path / "atr.json")
+
+    restored = WilderATR.load(tmp_path / "atr.json")
+    assert restored.update(high[30:], low[30:], close[30:]) == pytest.approx(engine.update(high[30:], low[30:], close[30:]))
+
+
+def test_npy_and_parquet_agree_with_csv(tmp_path):
+    pytest.importorskip("pyarrow")
+    high, low, close = _bars(500)
+    frame = pd.DataFrame({"high": high, "low": low, "close": close})
+    frame.to_csv(tmp_path / "bars.csv", index=False)
+    frame.to_parquet(tmp_path / "bars.parquet", row_group_size=64)
+    np.save(tmp_path / "bars.npy", frame.to_numpy())
+
+    expected = compute_atr(tmp_path / "bars.csv")
+    assert compute_atr(tmp_path / "bars.parquet") == pytest.approx(expected, rel=1e-12)
+    assert compute_atr(tmp_path / "bars.npy") == pytest.approx(expected, rel=1e-12)
+
+
+def test_missing_column_is_a_format_error(tmp_path):
+    path = tmp_path / "bars.csv"
+    path.write_text("open,high,close\n1,2,1.5\n")
+    with pytest.raises(OHLCFormatError):
+        compute_atr(path)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from atr_engine import WilderATR
+from backtest import (
+    EXIT_STOP,
+    EXIT_TARGET,
+    BacktestConfig,
+    BacktestFormatError,
+    run_backtest,
+    synthetic_bars,
+    wilder_atr_series,
+)
+
+
+def test_atr_series_matches_the_streaming_engine():
+    frame = synthetic_bars(1, 300)["SYN1"]
+    high, low, close = (frame[c].to_numpy() for c in ("high", "low", "close"))
+    series = wilder_atr_series(high, low, close, 14)
+    engine = WilderATR(14)
+
+    assert np.isnan(series[:13]).all()
+    for i in range(len(close)):
+        engine.update(high[i:i + 1], low[i:i + 1], close[i:i + 1])
+        if engine.ready:
+            assert series[i] == pytest.approx(engine.atr, rel=1e-12)
+
+
+def test_equity_is_the_sum_of_trade_pnl():
+    result = run_backtest(synthetic_bars(3, 3_000), workers=1)
+    trades = result.trades
+
+    assert len(trades) > 10
+    assert result.summary["final_equity"] == pytest.approx(10_000 + trades["pnl"].sum())
+    assert result.equity.iloc[0] == 10_000
+    for _, symbol_trades in trades.groupby("symbol"):
+        # One position per symbol at a time
+        assert (symbol_trades["entry_time"].iloc[1:].to_numpy() >= symbol_trades["exit_time"].iloc[:-1].to_numpy()).all()
+
+
+def test_worker_count_does_not_change_the_result():
+    bars = synthetic_bars(3, 2_000, seed=7)
+    one, many = run_backtest(bars, workers=1), run_backtest(bars, workers=2)
+    pd.testing.assert_frame_equal(one.trades, many.trades)
+
+
+def _bars(prices, signal_at):
+    prices = np.asarray(prices, dtype=np.float64)
+    signal = np.zeros(len(prices))
+    signal[signal_at] = 1
+    return pd.DataFrame({
+        "open": prices, "high": prices + 0.5, "low": prices - 0.5, "close": prices, "signal": signal,
+    })
+
+
+def test_fixed_stop_and_target_exits():
+    # Fixed-risk stop: 1% of equity over the size at 1x is 1% of the entry price
+    config = BacktestConfig(use_atr=False, slippage_pct=0, reward_to_risk=2)
+    up = run_backtest({"UP": _bars([100, 100, 101, 102, 103], 0)}, config)
+    down = run_backtest({"DOWN": _bars([100, 100, 99.8, 99, 98], 0)}, config)
+
+    assert up.trades["exit_reason"].tolist() == [EXIT_TARGET]
+    assert up.trades["pnl"].iloc[0] == pytest.approx(200)
+    assert down.trades["exit_reason"].tolist() == [EXIT_STOP]
+    assert down.trades["pnl"].iloc[0] == pytest.approx(-100)
+
+
+def test_missing_columns():
+    with pytest.raises(BacktestFormatError):
+        run_backtest({"X": pd.DataFrame({"open": [1.0], "close": [1.0]})}, workers=1)
+    with pytest.raises(BacktestFormatError):
+        run_backtest({})
@@ -0,0 +1,20 @@
+import pandas as pd
+
+from bulk_import import size_trade_plan_file
+from instruments import InstrumentRegistry
+
+
+def test_optional_text_column_filled_after_empty_first_chunk(tmp_path):
+    # ``symbol`` is empty in the first chunk (read as float64) and filled in the second
+    header = "liquid_capital,entry_price,direction,target_price,symbol\n"
+    rows = "10000,100,Long,110,\n" * 3 + "10000,100,Long,110,BTCUSDT\n" * 3
+    source = tmp_path / "plan.csv"
+    source.write_text(header + rows)
+    destination = tmp_path / "sized.csv"
+
+    counts = size_trade_plan_file(source, destination, chunksize=3, instruments=InstrumentRegistry())
+
+    sized = pd.read_csv(destination)
+    assert counts == {"ok": 6}
+    assert sized["symbol"].isna().sum() == 3
+    assert (sized["symbol"].iloc[3:] == "BTCUSDT").all()
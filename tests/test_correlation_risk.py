@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation_risk import CovarianceCache, RollingCovariance, portfolio_risk
+
+
+def _returns(n, k=4, seed=0):
+    rng = np.random.default_rng(seed)
+    mixing = rng.normal(size=(k, k))
+    return rng.normal(0, 0.01, (n, k)) @ mixing + 0.001
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 50, 250])
+def test_rolling_window_matches_np_cov(chunk):
+    returns = _returns(1_000)
+    rolling = RollingCovariance(list("ABCD"), window=120)
+    for start in range(0, len(returns), chunk):
+        end = min(start + chunk, len(returns))
+        rolling.extend(returns[start:end])
+        window = returns[max(end - 120, 0):end]
+        if len(window) >= 2:
+            np.testing.assert_allclose(rolling.covariance(), np.cov(window, rowvar=False), rtol=1e-9, atol=1e-15)
+
+
+def test_correlation_is_clipped_and_has_a_unit_diagonal():
+    rolling = RollingCovariance(["A", "B", "C"], window=30)
+    rolling.extend(_returns(30, k=3))
+    correlation = rolling.correlation()
+
+    np.testing.assert_allclose(np.diag(correlation), 1.0)
+    np.testing.assert_allclose(correlation, np.corrcoef(_returns(30, k=3), rowvar=False), atol=1e-12)
+
+
+def test_fewer_than_two_rows_is_nan():
+    rolling = RollingCovariance(["A", "B"], window=10)
+    rolling.push([0.01, 0.02])
+    assert np.isnan(rolling.covariance()).all()
+
+
+def test_cache_catches_up_on_appended_rows():
+    returns = pd.DataFrame(_returns(300), columns=list("ABCD"))
+    cache = CovarianceCache()
+
+    cache.covariance(returns.iloc[:200], ["A", "C"], window=60)
+    symbols, covariance = cache.covariance(returns, ["A", "C"], window=60)
+
+    assert symbols == ("A", "C")
+    assert (cache.misses, cache.hits) == (1, 1)
+    np.testing.assert_allclose(covariance, np.cov(returns[["A", "C"]].iloc[-60:], rowvar=False), rtol=1e-9)
+
+
+def test_offsetting_positions_diversify():
+    covariance = np.array([[1.0, -0.9], [-0.9, 1.0]]) * 1e-4
+    risk = portfolio_risk(np.array([10_000.0, 10_000.0]), covariance)
+
+    assert risk.value_at_risk < risk.standalone_var.sum()
+    assert risk.diversification_benefit > 0
+    assert risk.component_var.sum() == pytest.approx(risk.value_at_risk)
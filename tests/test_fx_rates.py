@@ -0,0 +1,61 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from fx_rates import FxRateError, FxRates, build_rate_matrix, parse_rates, quote_currency_of
+
+PAIRS = {("EUR", "USD"): 1.08, ("USD", "JPY"): 151.2, ("GBP", "CHF"): 1.12}
+
+
+def test_crosses_are_triangulated_and_quoted_pairs_kept():
+    matrix = build_rate_matrix(PAIRS)
+    rate = lambda a, b: matrix.rates[matrix.index[a], matrix.index[b]]
+
+    assert rate("EUR", "USD") == 1.08
+    assert rate("USD", "EUR") == 1 / 1.08
+    assert rate("EUR", "JPY") == pytest.approx(1.08 * 151.2)
+    assert rate("JPY", "EUR") == pytest.approx(1 / (1.08 * 151.2))
+    assert np.isnan(rate("EUR", "GBP"))  # Not connected
+    assert not matrix.rates.flags.writeable
+
+
+def test_rate_and_batches():
+    fx = FxRates(feed=lambda: PAIRS)
+    assert fx.rate("eur", " usd ") == 1.08
+    assert fx.rate("XYZ", "xyz") == 1.0
+    with pytest.raises(FxRateError):
+        fx.rate("EUR", "GBP")
+
+    rates = fx.rate_batch(["EUR", "usd", "EUR", "ABC"], ["USD", "EUR", "GBP", "abc"])
+    np.testing.assert_array_equal(rates, [1.08, 1 / 1.08, np.nan, 1.0])
+    np.testing.assert_allclose(fx.convert_batch([100, 200], "EUR", ["JPY", "EUR"]), [100 * 1.08 * 151.2, 200])
+
+
+def test_file_is_reparsed_only_when_it_changes(tmp_path):
+    path = tmp_path / "fx.csv"
+    path.write_text("base,quote,rate\nEUR,USD,1.08\n")
+    fx = FxRates(path, ttl=0)
+    assert fx.rate("EUR", "USD") == 1.08
+    fx.rate("EUR", "USD")
+    assert fx.loads == 1
+
+    path.write_text("base,quote,rate\nEUR,USD,1.10\n")
+    os.utime(path, ns=(1, 1))
+    assert fx.rate("EUR", "USD") == 1.10
+    assert fx.loads == 2
+
+    assert FxRates(tmp_path / "missing.csv").currencies == ()
+
+
+@pytest.mark.parametrize("text", ["base,quote\nEUR,USD\n", "base,quote,rate\nEUR,USD,x\n", "base,quote,rate\nEUR,USD,0\n"])
+def test_bad_rate_files(text):
+    with pytest.raises(FxRateError):
+        parse_rates(io.StringIO(text))
+
+
+def test_quote_currency_of_prefers_the_longest_code():
+    assert quote_currency_of("btcusdt", ["USD", "USDT", "BTC"]) == "USDT"
+    assert quote_currency_of("EURUSD", ["USD"]) == "USD"
+    assert quote_currency_of("USD", ["USD"]) is None
@@ -0,0 +1,70 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from instruments import Instrument, InstrumentFileError, InstrumentRegistry, parse_instruments
+
+BTC = Instrument("BTCUSDT", lot_step=0.001, tick_size=0.1, min_notional=5, multiplier=1)
+ES = Instrument("ES", lot_step=1, tick_size=0.25, min_notional=0, multiplier=50)
+MICRO = Instrument("MICRO", lot_step=3, tick_size=0.01, min_notional=0, multiplier=0.1)
+
+
+def test_sizes_floor_to_whole_lots():
+    assert BTC.round_size(0.12399) == 0.123
+    assert ES.round_size(149.9) == 100
+    assert MICRO.size_step == 0.3  # Exact decimal product, not 0.30000000000000004
+    assert MICRO.round_size(0.9) == 0.9
+    assert ES.contracts(150) == 3
+
+
+def test_prices_snap_to_the_nearest_tick():
+    assert BTC.round_price(64_000.04) == 64_000.0
+    assert BTC.round_price(64_000.06) == 64_000.1
+    assert ES.round_price(5_000.13) == 5_000.25
+
+
+def test_min_notional():
+    assert BTC.below_min_notional(0.0, 64_000)
+    assert BTC.below_min_notional(0.00007, 64_000)
+    assert not BTC.below_min_notional(0.001, 64_000)
+
+
+def test_parse_uppercases_symbols_and_fills_defaults():
+    instruments = parse_instruments(io.StringIO("Symbol,Lot_Step,Tick_Size\n eurusd ,1000,0.00001\n"))
+    assert instruments["EURUSD"] == Instrument("EURUSD", 1000.0, 0.00001, 0.0, 1.0)
+
+
+@pytest.mark.parametrize("text", [
+    "symbol,lot_step\nX,1\n",
+    "symbol,lot_step,tick_size\nX,0,0.1\n",
+    "symbol,lot_step,tick_size\nX,abc,0.1\n",
+])
+def test_bad_files_are_rejected(text):
+    with pytest.raises(InstrumentFileError):
+        parse_instruments(io.StringIO(text))
+
+
+def test_registry_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / "instruments.csv"
+    path.write_text("symbol,lot_step,tick_size\nBTCUSDT,0.001,0.1\n")
+    registry = InstrumentRegistry(path, check_interval=0)
+    assert registry.get("btcusdt").tick_size == 0.1
+    assert registry.get("BTCUSDT") is registry.get("BTCUSDT")
+    assert registry.loads == 1
+
+    path.write_text("symbol,lot_step,tick_size\nBTCUSDT,0.001,0.5\nETHUSDT,0.01,0.01\n")
+    os.utime(path, ns=(1, 1))  # Force a new signature even within the mtime resolution
+    assert registry.get("BTCUSDT").tick_size == 0.5
+    assert "ETHUSDT" in registry
+    assert registry.loads == 2
+
+
+def test_lookup_batch_is_nan_for_unknown_symbols(tmp_path):
+    path = tmp_path / "instruments.csv"
+    path.write_text("symbol,lot_step,tick_size,min_notional,multiplier\nES,1,0.25,0,50\n")
+    table = InstrumentRegistry(path).lookup_batch(["es", "NOPE", "ES"])
+
+    np.testing.assert_array_equal(table["size_step"], [50, np.nan, 50])
+    np.testing.assert_array_equal(table["tick_size"], [0.25, np.nan, 0.25])
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kelly import TradeHistoryFormatError, TradeOutcomes, growth_rate, kelly_fraction
+
+
+@pytest.mark.parametrize("p, b", [(0.5, 2), (0.6, 1), (0.35, 3)])
+def test_binary_bets_match_the_kelly_formula(p, b):
+    f = kelly_fraction(np.array([-1.0, b]), np.array([1 - p, p]))[0]
+    assert f == pytest.approx(p - (1 - p) / b, abs=1e-12)
+
+
+def test_kelly_maximizes_growth():
+    r = np.array([-1.0, -0.5, 0.5, 2.0, 4.0])
+    w = np.array([30, 10, 20, 25, 15])
+    f = kelly_fraction(r, w)[0]
+    assert growth_rate(r, w, f) >= max(growth_rate(r, w, f * 0.9), growth_rate(r, w, min(f * 1.1, 0.99)))
+
+
+def test_losing_and_lossless_histories():
+    assert kelly_fraction(np.array([-1.0, 1.0]), np.array([[3, 1], [1, 3]]))[0] == 0
+    assert kelly_fraction(np.array([0.5, 1.0]), np.array([1, 1]))[0] == pytest.approx(1.0)
+
+
+def test_outcomes_keep_exact_moments():
+    outcomes = TradeOutcomes()
+    assert outcomes.update([1.234, -1.0, np.nan, 2.0]) == 3
+    assert outcomes.update_from_pnl([50, 0], [100, 0]) == 1  # 0 / 0 is skipped
+
+    r_values, counts = outcomes.histogram()
+    assert outcomes.trades == 4 and outcomes.wins == 3
+    assert outcomes.sum_r == pytest.approx(2.734)
+    assert counts.sum() == 4 and r_values[-1] == pytest.approx(2.0)
+
+
+def test_growing_csv_reads_only_new_trades(tmp_path):
+    path = tmp_path / "trades.csv"
+    pd.DataFrame({"pnl": [100, -50], "risk_amount": [50, 50]}).to_csv(path, index=False)
+    outcomes = TradeOutcomes()
+    assert outcomes.update_from_file(path) == 2
+    with open(path, "a") as f:
+        f.write("30,60\n-10,")  # Second line still being written
+    assert outcomes.update_from_file(path) == 1
+    with open(path, "a") as f:
+        f.write("20\n")
+    assert outcomes.update_from_file(path) == 1
+    assert outcomes.sum_r == pytest.approx(2 - 1 + 0.5 - 0.5)
+
+
+def test_estimate_is_reproducible_and_brackets_kelly():
+    rng = np.random.default_rng(0)
+    outcomes = TradeOutcomes()
+    outcomes.update(np.where(rng.random(2_000) < 0.45, 2.0, -1.0))
+    estimate = outcomes.estimate(n_resamples=500, workers=1)
+
+    assert estimate == outcomes.estimate(n_resamples=500, workers=1)
+    low, high = estimate.kelly_interval
+    assert low <= estimate.kelly <= high
+    assert estimate.fractional_kelly == pytest.approx(estimate.kelly / 2)
+
+
+def test_missing_columns_and_empty_history(tmp_path):
+    path = tmp_path / "trades.csv"
+    path.write_text("pnl\n1\n")
+    with pytest.raises(TradeHistoryFormatError):
+        TradeOutcomes().update_from_file(path)
+    with pytest.raises(TradeHistoryFormatError):
+        TradeOutcomes().estimate()
@@ -0,0 +1,94 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from liquidation import MARGIN_TIERS_DIR, MarginTierError, MarginTiers, load_margin_tiers, stop_past_liquidation
+
+TIERS = MarginTiers.from_dict({
+    "exchange": "Test",
+    "tiers": [
+        {"notional_cap": 50_000, "maintenance_margin_rate": 0.004, "max_leverage": 125},
+        {"notional_cap": 250_000, "maintenance_margin_rate": 0.005, "max_leverage": 100},
+        {"notional_cap": 1_000_000, "maintenance_margin_rate": 0.01, "max_leverage": 50},
+    ],
+})
+
+
+def test_maintenance_amounts_keep_the_margin_continuous_at_caps():
+    for lower, upper in zip(TIERS.tiers, TIERS.tiers[1:]):
+        cap = lower.notional_cap
+        assert cap * lower.maintenance_margin_rate - lower.maintenance_amount == pytest.approx(
+            cap * upper.maintenance_margin_rate - upper.maintenance_amount
+        )
+    assert math.isinf(TIERS.tiers[-1].notional_cap)
+
+
+def test_caps_are_inclusive_and_the_last_tier_is_open():
+    assert TIERS.tier_index(50_000) == 0
+    assert TIERS.tier_index(50_000.01) == 1
+    assert TIERS.tier_index(5e9) == 2
+    np.testing.assert_array_equal(TIERS.tier_indices([1, 50_000, 50_001, 5e9]), [0, 0, 1, 2])
+    np.testing.assert_array_equal(TIERS.max_leverage_batch([1, 300_000]), [125, 50])
+
+
+@pytest.mark.parametrize("direction", ["Long", "Short"])
+@pytest.mark.parametrize("size, margin", [(1, 10), (1_000, 5_000), (5_000, 20_000)])
+def test_equity_equals_maintenance_margin_at_liquidation(direction, size, margin):
+    entry = 100.0
+    price = TIERS.liquidation_price(entry, direction, size, margin)
+    sign = 1 if direction == "Long" else -1
+    equity = margin + sign * size * (price - entry)
+    tier = TIERS.tier_for(size * entry)
+
+    assert equity == pytest.approx(size * price * tier.maintenance_margin_rate - tier.maintenance_amount)
+
+
+def test_batch_matches_scalar():
+    rng = np.random.default_rng(0)
+    size = rng.uniform(0.1, 20_000, 500)
+    margin = size * 100 / rng.uniform(1, 125, 500)
+    direction = rng.choice(["Long", "Short"], 500)
+
+    batch = TIERS.liquidation_price_batch(100.0, direction, size, margin)
+    for i in range(500):
+        expected = TIERS.liquidation_price(100.0, direction[i], size[i], margin[i])
+        if expected is None:
+            assert np.isnan(batch[i])
+        else:
+            assert batch[i] == pytest.approx(expected, rel=1e-12)
+
+
+def test_fully_funded_long_is_never_liquidated():
+    assert TIERS.liquidation_price(100.0, "Long", 1, 100) is None
+    assert not stop_past_liquidation("Long", 90.0, None)
+
+
+def test_stop_past_liquidation():
+    assert stop_past_liquidation("Long", 90.0, 91.0)
+    assert not stop_past_liquidation("Long", 92.0, 91.0)
+    assert stop_past_liquidation("Short", 110.0, 109.0)
+    np.testing.assert_array_equal(
+        stop_past_liquidation(["Long", "Short"], [90.0, 108.0], [91.0, np.nan]), [True, False]
+    )
+
+
+@pytest.mark.parametrize("tiers", [
+    [],
+    [{"notional_cap": 10, "maintenance_margin_rate": 0.01}, {"notional_cap": 5, "maintenance_margin_rate": 0.02}],
+    [{"notional_cap": 10, "maintenance_margin_rate": 1.5}],
+    [{"notional_cap": 10}],
+])
+def test_malformed_tables_are_rejected(tiers):
+    with pytest.raises(MarginTierError):
+        MarginTiers.from_dict({"tiers": tiers})
+
+
+def test_shipped_tables_load(tmp_path):
+    for path in MARGIN_TIERS_DIR.glob("*.json"):
+        assert len(load_margin_tiers(path)) > 0
+
+    (tmp_path / "bad.json").write_text(json.dumps([1, 2]))
+    with pytest.raises(MarginTierError):
+        load_margin_tiers(tmp_path / "bad.json")
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import MarketDataCache, data_nbytes
+
+
+def test_hits_skip_the_loader_and_values_are_read_only():
+    cache = MarketDataCache()
+    calls = []
+    load = lambda: calls.append(1) or np.arange(10.0)
+
+    first = cache.get_or_load("a", load)
+    assert cache.get_or_load("a", load) is first
+    assert len(calls) == 1
+    assert not first.flags.writeable
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_is_evicted_over_the_ceiling():
+    cache = MarketDataCache(max_bytes=2 * 800)
+    for key in "abc":
+        cache.get_or_load(key, lambda: np.zeros(100))  # 800 bytes each
+        cache.get_or_load("a", lambda: pytest.fail("a should stay cached"))
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 1_600
+
+
+def test_expired_entries_are_loaded_again():
+    cache = MarketDataCache()
+    cache.get_or_load("a", lambda: 1, ttl=0)
+    assert cache.get_or_load("a", lambda: 2) == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_oversize_values_are_served_but_not_cached():
+    cache = MarketDataCache(max_bytes=100)
+    assert len(cache.get_or_load("big", lambda: np.zeros(100))) == 100
+    assert "big" not in cache and cache.stats()["oversize"] == 1
+
+
+def test_concurrent_misses_share_one_load():
+    cache = MarketDataCache()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return np.ones(3)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["coalesced"] < 7:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_errors_are_raised_and_not_cached():
+    cache = MarketDataCache()
+    with pytest.raises(OSError):
+        cache.get_or_load("k", lambda: (_ for _ in ()).throw(OSError("gone")))
+    assert cache.get_or_load("k", lambda: 5) == 5
+    assert cache.stats()["load_errors"] == 1
+
+
+def test_nbytes_of_containers_and_frames():
+    frame = pd.DataFrame({"x": np.zeros(10)})
+    assert data_nbytes({"a": np.zeros(10), "b": [np.zeros(5)]}) == 120
+    assert data_nbytes(frame) == frame.memory_usage(index=True, deep=True).sum()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from monte_carlo import CHUNK_PATHS, simulate_equity_paths, summarize
+
+
+def test_result_does_not_depend_on_the_worker_count():
+    one = simulate_equity_paths(0.5, 2, 1, n_paths=CHUNK_PATHS + 100, n_trades=20, workers=1)
+    many = simulate_equity_paths(0.5, 2, 1, n_paths=CHUNK_PATHS + 100, n_trades=20, workers=2)
+    for a, b in zip(one, many):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_final_equity_is_the_product_of_trade_factors():
+    result = simulate_equity_paths(0.4, 3, 2, n_paths=1_000, n_trades=10, workers=1)
+    # Every path is some mix of wins (x1.06) and losses (x0.98)
+    wins = np.round(np.log(result.final_equity / 0.98 ** 10) / np.log(1.06 / 0.98), 9)
+    assert np.all(wins == np.round(wins)) and wins.min() >= 0 and wins.max() <= 10
+
+
+def test_certain_outcomes():
+    always_win = simulate_equity_paths(1.0, 2, 1, n_paths=100, n_trades=5, workers=1)
+    assert np.allclose(always_win.final_equity, 1.02 ** 5)
+    assert not always_win.max_drawdown.any() and not always_win.ended_underwater.any()
+
+    always_lose = simulate_equity_paths(0.0, 2, 1, n_paths=100, n_trades=5, workers=1)
+    assert np.allclose(always_lose.max_drawdown, 1 - 0.99 ** 5)
+    assert (always_lose.time_to_recover == 5).all()
+
+
+def test_summary_probabilities():
+    summary = summarize(simulate_equity_paths(0.0, 2, 10, n_paths=100, n_trades=5, workers=1))
+    assert summary["prob_loss"] == 1.0
+    assert summary["prob_ended_underwater"] == 1.0
+    assert summary["final_equity_p50"] == pytest.approx(0.9 ** 5)
+
+
+def test_invalid_inputs():
+    with pytest.raises(ValueError):
+        simulate_equity_paths(1.5, 2, 1)
+    with pytest.raises(ValueError):
+        simulate_equity_paths(0.5, 2, 1, n_paths=0)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from order_book import OrderBookFile, OrderBookFormatError, converge_slippage, convert_csv
+from risk_core import calculate_trade_metrics
+
+CSV = """timestamp,side,price,size
+1,bid,99,5
+1,ask,101,5
+1,bid,100,2
+1,ask,100.5,1
+2,b,99.5,10
+2,a,100.5,10
+2,b,99,100
+"""
+
+
+@pytest.fixture
+def book(tmp_path):
+    (tmp_path / "book.csv").write_text(CSV)
+    assert convert_csv(tmp_path / "book.csv", tmp_path / "book.npy") == 7
+    return OrderBookFile(tmp_path / "book.npy")
+
+
+def test_levels_are_sorted_best_first_per_snapshot(book):
+    first = book.snapshot(1)
+    np.testing.assert_array_equal(first.bids.price, [100, 99])
+    np.testing.assert_array_equal(first.asks.price, [100.5, 101])
+    np.testing.assert_array_equal(first.bids.cum_size, [2, 7])
+    assert book.snapshot().timestamp == 2
+    assert book.snapshot(5).bids.depth == 110
+    with pytest.raises(OrderBookFormatError):
+        book.snapshot(0)
+
+
+def test_fill_walks_the_levels(book):
+    bids = book.snapshot(1).bids
+    fill = bids.fill(4)  # 2 @ 100 + 2 @ 99
+
+    assert fill.average_price == pytest.approx(99.5)
+    assert fill.slippage_pct == pytest.approx(0.005)
+    assert (fill.levels, fill.beyond_depth) == (2, False)
+    assert bids.fill(8).beyond_depth
+    assert bids.fill(1).slippage_pct == 0
+
+
+def test_converged_slippage_is_self_consistent(book):
+    side = book.snapshot(1).bids
+    result = converge_slippage(side, 100_000, 1, 100, "Long", 120, 10, 99.8)
+
+    assert result.converged
+    assert result.metrics == calculate_trade_metrics(100_000, 1, 100, "Long", 120, 10, 99.8, result.slippage_pct)
+    assert result.fill == side.fill(result.metrics.position_size)
+    # A slightly smaller slippage would size a position that slips more
+    smaller = calculate_trade_metrics(100_000, 1, 100, "Long", 120, 10, 99.8, result.slippage_pct * 0.9)
+    assert side.fill(smaller.position_size).slippage_pct >= result.slippage_pct * 0.9
+
+
+@pytest.mark.parametrize("text", [
+    "timestamp,side,price\n1,bid,100\n",
+    "timestamp,side,price,size\n1,middle,100,1\n",
+    "timestamp,side,price,size\n1,bid,-100,1\n",
+])
+def test_bad_csv(tmp_path, text):
+    (tmp_path / "book.csv").write_text(text)
+    with pytest.raises(OrderBookFormatError):
+        convert_csv(tmp_path / "book.csv", tmp_path / "book.npy")
+
+
+def test_rejects_other_npy_files(tmp_path):
+    np.save(tmp_path / "x.npy", np.zeros(3))
+    with pytest.raises(OrderBookFormatError):
+        OrderBookFile(tmp_path / "x.npy")
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from parquet_tail import iter_unread  # noqa: E402
+
+
+@pytest.fixture
+def parquet(tmp_path):
+    path = tmp_path / "rows.parquet"
+    pq.write_table(pa.table({"x": np.arange(100), "y": np.arange(100) * 2}), path, row_group_size=16)
+    return pq.ParquetFile(path)
+
+
+def _unread(parquet, offset, batch_size=5, columns=None):
+    rows, last = [], offset
+    for batch, start, rows_read in iter_unread(parquet, offset, batch_size, columns):
+        rows.extend(batch.column(0).to_pylist()[start:])
+        assert rows_read > last
+        last = rows_read
+    return rows, last
+
+
+@pytest.mark.parametrize("offset", [0, 1, 15, 16, 17, 50, 99])
+def test_yields_exactly_the_rows_past_the_offset(parquet, offset):
+    rows, rows_read = _unread(parquet, offset)
+    assert rows == list(range(offset, 100))
+    assert rows_read == 100
+
+
+def test_earlier_row_groups_are_not_read(parquet, monkeypatch):
+    groups = []
+    original = parquet.iter_batches
+
+    def spy(*args, row_groups=None, **kwargs):
+        groups.extend(row_groups)
+        return original(*args, row_groups=row_groups, **kwargs)
+
+    monkeypatch.setattr(parquet, "iter_batches", spy)
+    _unread(parquet, 50)
+    assert min(groups) == 3  # Rows 48-63
+
+
+def test_nothing_left_to_read(parquet):
+    assert _unread(parquet, 100) == ([], 100)
+
+
+def test_selected_columns(parquet):
+    batch, start, _ = next(iter_unread(parquet, 3, 10, ["y"]))
+    assert batch.schema.names == ["y"]
+    assert batch.column(0).to_pylist()[start] == 6
@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from portfolio_book import OpenRiskCapError, PortfolioBook
+from risk_core import calculate_trade_metrics
+
+
+def test_totals_follow_add_edit_and_remove():
+    book = PortfolioBook(20_000, 10_000, max_open_risk_percent=3)
+    a = book.add("AAA", "Long", 100, 95, 120, leverage=2, risk_percent=1)
+    b = book.add("BBB", "Short", 50, 52, 40, risk_percent=1)
+
+    assert len(book) == 2
+    assert book.open_risk == 200
+    assert book.capital_used == a.metrics.capital_required + b.metrics.capital_required
+    assert book.notional == a.notional + b.notional
+    assert book.open_risk_percent == 1
+
+    moved = book.edit(a.position_id, stop_loss_price=98)
+    assert moved.metrics == calculate_trade_metrics(10_000, 1, 100, "Long", 120, 2, 98, 0)
+    assert book.notional == pytest.approx(moved.notional + b.notional)
+
+    book.remove(b.position_id)
+    assert book.open_risk == 100 and book.notional == pytest.approx(moved.notional)
+
+
+def test_open_risk_cap():
+    book = PortfolioBook(10_000, 10_000, max_open_risk_percent=2)
+    book.add("AAA", "Long", 100, 95, 120, risk_percent=1.5)
+
+    assert not book.check(100).allowed
+    assert book.check(100).headroom == 50
+    with pytest.raises(OpenRiskCapError):
+        book.add("BBB", "Long", 100, 95, 120, risk_percent=1)
+    assert len(book) == 1
+    book.add("BBB", "Long", 100, 95, 120, risk_percent=1, enforce_cap=False)
+    assert book.open_risk_percent == 2.5
+
+
+def test_positions_in_other_currencies_add_up_in_the_account_currency():
+    book = PortfolioBook(100_000, 100_000, max_open_risk_percent=10)
+    usd = book.add("AAPL", "Long", 200, 190, 230, risk_percent=1, quote_currency="USD", fx_rate=0.9)
+    jpy = book.add("7203", "Long", 3_000, 2_900, 3_300, risk_percent=1, quote_currency="JPY", fx_rate=0.006)
+
+    assert book.open_risk == pytest.approx(2_000)
+    assert usd.notional == pytest.approx(usd.metrics.position_size * 200 * 0.9)
+    assert book.notional == pytest.approx(usd.notional + jpy.notional)
+
+
+def test_running_totals_do_not_drift():
+    book = PortfolioBook(1e9, 1e9, max_open_risk_percent=100)
+    ids = [book.add("X", "Long", 100 + i % 7, 90, 150, risk_percent=0.001).position_id for i in range(2_000)]
+    for position_id in ids[::2]:
+        book.remove(position_id)
+
+    # Compensated totals stay within an ulp or two of the exact sum
+    assert book.open_risk == pytest.approx(math.fsum(p.metrics.risk_amount for p in book), rel=1e-15)
+    assert book.notional == pytest.approx(math.fsum(p.notional for p in book), rel=1e-15)
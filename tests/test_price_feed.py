@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from price_feed import PriceFeedHub, PriceTick, parse_tick
+
+
+@pytest.mark.parametrize("line, expected", [
+    ('{"symbol": "btcusdt", "price": 64012.5, "ts": 1718000000.25}', PriceTick("BTCUSDT", 64012.5, 1718000000.25)),
+    (b"ETHUSDT,3100,1718000000\n", PriceTick("ETHUSDT", 3100.0, 1718000000.0)),
+])
+def test_json_and_csv_ticks(line, expected):
+    assert parse_tick(line) == expected
+
+
+@pytest.mark.parametrize("line", ["", "BTCUSDT,abc", "BTCUSDT,-1", "BTCUSDT,nan", '{"symbol": "BTCUSDT"}', "{broken"])
+def test_unusable_lines_are_skipped(line):
+    assert parse_tick(line) is None
+
+
+def test_other_symbols_are_filtered_out():
+    assert parse_tick("ETHUSDT,3100", symbol="BTCUSDT") is None
+    tick = parse_tick("BTCUSDT,64000", symbol="BTCUSDT")
+    assert tick.price == 64000 and tick.timestamp == pytest.approx(time.time(), abs=5)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_sessions_share_one_stream_per_symbol(tmp_path):
+    path = tmp_path / "prices.txt"
+    path.write_text("BTCUSDT,1\n")  # Already there before subscribing: not replayed
+    hub = PriceFeedHub()
+    try:
+        first = hub.subscribe(str(path), "btcusdt")
+        assert hub.subscribe(str(path), "BTCUSDT") is first
+        time.sleep(0.1)  # Let the tail start at the current end
+        with open(path, "a") as f:
+            f.write("ETHUSDT,3000\nBTCUSDT,64000\nBTCUSDT,64001\n")
+
+        _wait_for(lambda: first.ticks == 2)
+        assert hub.latest(str(path), "BTCUSDT").price == 64001
+        assert hub.stats() == {"streams": 1, "connections": 1, "ticks": 2}
+    finally:
+        hub.close()
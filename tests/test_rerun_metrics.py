@@ -0,0 +1,52 @@
+import math
+
+import pytest
+
+from rerun_metrics import METRIC_NAME, METRICS_FILE_ENV, METRICS_PORT_ENV, RerunProfiler, StageMetrics
+
+
+def test_nearest_rank_percentiles_over_the_window():
+    metrics = StageMetrics(window=100)
+    for i in range(1, 201):
+        metrics.observe("render", i / 1000)
+
+    assert metrics.percentiles("render", (0.5, 0.9, 1.0)) == [0.15, 0.19, 0.2]
+    assert all(math.isnan(v) for v in metrics.percentiles("missing"))
+    _, total, count = metrics.snapshot()["render"]
+    assert count == 200 and total == pytest.approx(20.1)  # Lifetime, not just the window
+
+
+def test_prometheus_text():
+    metrics = StageMetrics()
+    metrics.observe("solve", 0.25)
+    text = metrics.render_prometheus((0.5,))
+
+    assert f"# TYPE {METRIC_NAME} summary" in text
+    assert f'{METRIC_NAME}{{stage="solve",quantile="0.5"}} 0.25' in text
+    assert f'{METRIC_NAME}_count{{stage="solve"}} 1' in text
+
+
+def test_disabled_profiler_records_nothing():
+    metrics = StageMetrics()
+    profiler = RerunProfiler(enabled=False, registry=metrics)
+    with profiler.stage("inputs"):
+        pass
+    profiler.finish()
+
+    assert profiler.finished and profiler.timings == {}
+    assert metrics.snapshot() == {}
+
+
+def test_stage_is_recorded_even_when_it_raises(tmp_path, monkeypatch):
+    path = tmp_path / "metrics.prom"
+    monkeypatch.setenv(METRICS_FILE_ENV, str(path))
+    monkeypatch.delenv(METRICS_PORT_ENV, raising=False)
+    metrics = StageMetrics()
+    profiler = RerunProfiler(enabled=True, registry=metrics)
+    with pytest.raises(RuntimeError):
+        with profiler.stage("inputs"):
+            raise RuntimeError
+    profiler.finish()
+
+    assert set(profiler.timings) == {"inputs", "total"}
+    assert 'stage="inputs"' in path.read_text()
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from risk_batch import (
+    calculate_trade_metrics_batch,
+    floor_to_step_batch,
+    round_to_step_batch,
+    suggest_stop_loss_batch,
+    trade_notices_batch,
+)
+from risk_core import (
+    STATUS_OK,
+    TradeMetrics,
+    TradeValidationError,
+    calculate_trade_metrics,
+    floor_to_step,
+    round_to_step,
+    suggest_stop_loss,
+    trade_notices,
+)
+
+
+def _random_trades(n, seed=0):
+    rng = np.random.default_rng(seed)
+    entry = rng.uniform(0.5, 1_000, n)
+    direction = np.where(rng.random(n) < 0.5, "Long", "Short").astype(object)
+    direction[rng.random(n) < 0.02] = "Flat"
+    distance = entry * rng.uniform(-0.02, 0.1, n)  # Some stops on the wrong side
+    stop = np.where(direction == "Long", entry - distance, entry + distance)
+    target = np.where(direction == "Long", entry + 2 * distance, entry - 2 * distance)
+    return {
+        "liquid_capital": rng.uniform(100, 100_000, n),
+        "risk_percent": rng.uniform(0.1, 5, n),
+        "entry_price": entry,
+        "direction": direction,
+        "target_price": target,
+        "leverage": rng.uniform(1, 20, n),
+        "stop_loss_price": stop,
+        "slippage_pct": rng.choice([0.0, 0.001, 0.005], n),
+        "size_step": rng.choice([np.nan, 0.001, 0.1, 1.0], n),
+        "fx_rate": rng.choice([1.0, 0.92, 151.2, 0.0], n),
+    }
+
+
+def test_batch_matches_scalar_row_by_row():
+    trades = _random_trades(2_000)
+    batch = calculate_trade_metrics_batch(**trades)
+
+    for i, row in batch.iterrows():
+        args = {k: v[i] for k, v in trades.items()}
+        args["size_step"] = None if np.isnan(args["size_step"]) else args["size_step"]
+        try:
+            expected = calculate_trade_metrics(**args)
+        except TradeValidationError as e:
+            assert row["status"] == e.code
+            continue
+        assert row["status"] == STATUS_OK
+        for field in TradeMetrics._fields:
+            assert row[field] == pytest.approx(getattr(expected, field), rel=1e-12), (i, field)
+
+
+def test_step_rounding_matches_scalar():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(0, 10_000, 5_000)
+    steps = rng.choice([0.001, 0.01, 0.25, 0.5, 5.0], values.size)
+
+    floors = floor_to_step_batch(values, steps)
+    rounds = round_to_step_batch(values, steps)
+    assert floors.tolist() == [floor_to_step(v, s) for v, s in zip(values, steps)]
+    assert rounds.tolist() == [round_to_step(v, s) for v, s in zip(values, steps)]
+
+
+def test_suggested_stops_match_scalar():
+    rng = np.random.default_rng(2)
+    entry = rng.uniform(1, 500, 500)
+    direction = np.where(rng.random(500) < 0.5, "Long", "Short")
+    use_atr = rng.random(500) < 0.5
+    atr = rng.uniform(0, 5, 500)
+
+    stops = suggest_stop_loss_batch(entry, direction, 10_000, 1, 3, use_atr, atr, 1.5)
+    assert stops.tolist() == [
+        suggest_stop_loss(e, d, 10_000, 1, 3, u, a, 1.5) for e, d, u, a in zip(entry, direction, use_atr, atr)
+    ]
+
+
+def test_notices_match_scalar():
+    capital = np.array([1_000, 20_000, 9_000, 500])
+    stops = np.array([95, 80, 99, 95])
+    notices = trade_notices_batch(10_000, [1, 10, 2, 1], 100, stops, capital, [4, 1, 2.5, 3])
+
+    for i in range(4):
+        expected = trade_notices(10_000, [1, 10, 2, 1][i], 100, stops[i], capital[i], [4, 1, 2.5, 3][i])
+        assert [code for code, flags in notices.items() if flags[i]] == expected
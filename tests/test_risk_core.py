@@ -0,0 +1,89 @@
+import math
+
+import pytest
+
+from risk_core import (
+    NOTICE_CAPITAL_EXCEEDED,
+    NOTICE_HIGH_LEVERAGE,
+    NOTICE_LOW_REWARD_RISK,
+    InvalidDirectionError,
+    InvalidEntryPriceError,
+    InvalidFxRateError,
+    StopLossSideError,
+    calculate_trade_metrics,
+    floor_to_step,
+    round_to_step,
+    suggest_stop_loss,
+    trade_notices,
+)
+
+
+def test_long_trade_risks_the_planned_amount():
+    metrics = calculate_trade_metrics(10_000, 1, 100, "Long", 120, 2, 95, 0)
+
+    assert metrics.risk_amount == 100
+    assert metrics.position_size == 20
+    assert metrics.capital_required == 1_000
+    assert metrics.expected_reward == 400
+    assert metrics.reward_to_risk == 4
+
+
+def test_slippage_widens_the_stop_and_shrinks_the_size():
+    metrics = calculate_trade_metrics(10_000, 1, 100, "Short", 80, 1, 105, 0.01)
+
+    assert metrics.effective_stop_loss == pytest.approx(106.05)
+    assert metrics.position_size == round(100 / 6.05, 3)
+
+
+@pytest.mark.parametrize(
+    "entry, direction, stop, fx_rate, error",
+    [
+        (0, "Long", 95, 1.0, InvalidEntryPriceError),
+        (100, "Sideways", 95, 1.0, InvalidDirectionError),
+        (100, "Long", 105, 1.0, StopLossSideError),
+        (100, "Short", 95, 1.0, StopLossSideError),
+        (100, "Long", 95, 0.0, InvalidFxRateError),
+        (100, "Long", 95, math.inf, InvalidFxRateError),
+    ],
+)
+def test_invalid_trades_are_rejected(entry, direction, stop, fx_rate, error):
+    with pytest.raises(error):
+        calculate_trade_metrics(10_000, 1, entry, direction, 120, 1, stop, 0, fx_rate=fx_rate)
+
+
+def test_size_step_floors_to_whole_lots():
+    metrics = calculate_trade_metrics(10_000, 1, 100, "Long", 120, 1, 97, 0, size_step=5)
+
+    assert metrics.position_size == 30  # 33.3 units floored to lots of 5
+    assert metrics.risk_amount == 100
+
+
+def test_fx_rate_sizes_in_quote_and_reports_in_account_currency():
+    # EUR account, JPY-quoted instrument: 1 JPY = 0.0062 EUR
+    plain = calculate_trade_metrics(10_000, 1, 150, "Long", 160, 1, 149, 0)
+    converted = calculate_trade_metrics(10_000, 1, 150, "Long", 160, 1, 149, 0, fx_rate=0.0062)
+
+    assert converted.position_size == pytest.approx(plain.position_size / 0.0062, abs=1e-3)
+    assert converted.risk_amount == plain.risk_amount
+    assert converted.reward_to_risk == pytest.approx(plain.reward_to_risk, rel=1e-6)
+
+
+def test_step_rounding_is_exact_for_decimal_steps():
+    assert floor_to_step(0.3, 0.1) == 0.3
+    assert floor_to_step(1.0999999, 0.001) == 1.099
+    assert round_to_step(100.125, 0.25) == 100.0  # Tie goes to the even multiple
+    assert round_to_step(100.13, 0.25) == 100.25
+
+
+def test_suggested_stop_uses_atr_only_when_positive():
+    assert suggest_stop_loss(100, "Long", 10_000, 1, 1, True, 2, 1.5) == 97
+    assert suggest_stop_loss(100, "Short", 10_000, 1, 1, True, 2, 1.5) == 103
+    # Fixed risk: 1% of 10,000 over 100 units at 1x is 1 per unit
+    assert suggest_stop_loss(100, "Long", 10_000, 1, 1, True, 0, 1.5) == 99
+
+
+def test_notices():
+    assert trade_notices(10_000, 1, 100, 95, 1_000, 4) == []
+    assert trade_notices(10_000, 10, 100, 95, 20_000, 1) == [
+        NOTICE_HIGH_LEVERAGE, NOTICE_LOW_REWARD_RISK, NOTICE_CAPITAL_EXCEEDED,
+    ]
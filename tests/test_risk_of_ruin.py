@@ -0,0 +1,73 @@
+import pytest
+
+import risk_of_ruin
+from risk_of_ruin import (
+    METHOD_CERTAIN,
+    METHOD_CLOSED_FORM,
+    METHOD_DP,
+    MAX_TRADES,
+    RuinParams,
+    closed_form_ruin,
+    ruin_probability,
+    ruin_table,
+)
+
+
+@pytest.fixture(autouse=True)
+def table_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(risk_of_ruin, "TABLE_DIR", tmp_path)
+    ruin_table.cache_clear()
+    yield tmp_path
+    ruin_table.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "risk_percent, reward_to_risk, win_rate, level",
+    [
+        (50, 2, 0.6, 0.75),  # A win doubles, a loss halves: k = 1
+        (20, 1.25, 0.55, 0.5),  # 1.25 = 0.8⁻¹: k = 1
+        (50, 6, 0.4, 0.9),  # 4 = 0.5⁻²: k = 2
+    ],
+)
+def test_closed_form_matches_the_dp(risk_percent, reward_to_risk, win_rate, level):
+    params = RuinParams.quantize(risk_percent, win_rate, reward_to_risk, level)
+    closed = closed_form_ruin(params)
+
+    assert closed.method == METHOD_CLOSED_FORM
+    assert ruin_table(params, MAX_TRADES)[-1] == pytest.approx(closed.probability, abs=1e-6)
+
+
+def test_gamblers_ruin_value():
+    # Symmetric ±log 2 walk, two losses to ruin: P = (q/p)²
+    result = ruin_probability(50, 0.6, 2, 0.75)
+    assert result.probability == pytest.approx((0.4 / 0.6) ** 2)
+
+
+def test_negative_drift_is_certain_ruin():
+    result = ruin_probability(2, 0.3, 1, 0.2)
+    assert (result.probability, result.method) == (1.0, METHOD_CERTAIN)
+
+
+def test_curve_is_monotone_and_cached_on_disk(table_dir):
+    params = RuinParams.quantize(2, 0.45, 1.7, 0.3, from_peak=True)
+    curve = ruin_table(params, 500)
+
+    assert curve[0] == 0
+    assert (curve[1:] >= curve[:-1]).all()
+    assert not curve.flags.writeable
+    assert len(list(table_dir.glob("*.npy"))) == 1
+
+    ruin_table.cache_clear()
+    assert (ruin_table(params, 500) == curve).all()
+
+
+def test_finite_horizon_uses_the_dp():
+    result = ruin_probability(2, 0.45, 1.7, 0.3, trades=200)
+    assert result.method == METHOD_DP and result.trades == 200
+    assert result.probability <= ruin_probability(2, 0.45, 1.7, 0.3, trades=400).probability
+
+
+@pytest.mark.parametrize("args", [(0, 0.5, 1, 0.5), (1, 1.5, 1, 0.5), (1, 0.5, 0, 0.5), (1, 0.5, 1, 1)])
+def test_invalid_inputs(args):
+    with pytest.raises(ValueError):
+        RuinParams.quantize(*args)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from risk_core import TradeValidationError, calculate_trade_metrics
+from sensitivity import HEATMAP_METRICS, render_heatmaps, sensitivity_grid
+
+
+def test_grid_cells_match_the_scalar_calculation():
+    distances = np.array([0.01, 0.02, 0.05])
+    leverage = np.array([1.0, 5.0])
+    grids = sensitivity_grid(10_000, 1, 100, "Short", 80, 3, 0.001, distances, "leverage", leverage)
+
+    for i, lev in enumerate(leverage):
+        for j, distance in enumerate(distances):
+            expected = calculate_trade_metrics(10_000, 1, 100, "Short", 80, lev, 100 * (1 + distance), 0.001)
+            for metric in HEATMAP_METRICS:
+                assert grids[metric][i, j] == pytest.approx(getattr(expected, metric))
+
+
+def test_invalid_cells_are_nan():
+    # A negative distance puts a long's stop above the entry
+    grids = sensitivity_grid(10_000, 1, 100, "Long", 120, 1, 0, np.array([-0.01, 0.01]), "leverage", np.array([1.0]))
+    with pytest.raises(TradeValidationError):
+        calculate_trade_metrics(10_000, 1, 100, "Long", 120, 1, 101, 0)
+
+    assert np.isnan(grids["position_size"][0, 0])
+    assert grids["position_size"][0, 1] == 100
+
+
+def test_render_is_a_cached_png():
+    pytest.importorskip("matplotlib")
+    args = (10_000, 1, 100, "Long", 120, 2, 0.001, 10.0, "leverage", (1.0, 10.0), 20, (2.0, 2.0), "€")
+    png = render_heatmaps(*args)
+
+    assert png.startswith(b"\x89PNG")
+    assert render_heatmaps(*args) is png
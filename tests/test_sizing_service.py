@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import pytest
+
+from fx_rates import FxRates
+from instruments import InstrumentRegistry
+from risk_core import NOTICE_BELOW_MIN_NOTIONAL, STATUS_INVALID_FX_RATE, STATUS_OK, calculate_trade_metrics
+from sizing_service import (
+    STOP_FIELDS,
+    MicroBatcher,
+    RequestError,
+    ServiceOverloaded,
+    SizingService,
+    evaluate_trades,
+    validate_trade,
+)
+
+TRADE = {
+    "liquid_capital": 10_000,
+    "entry_price": 100,
+    "direction": "Long",
+    "target_price": 120,
+    "stop_loss_price": 95,
+    "risk_percent": 1,
+    "leverage": 2,
+    "slippage_pct": 0,
+}
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def _with_service(exchange, **options):
+    async def run():
+        service = SizingService(port=0, **options)
+        await service.start()
+        try:
+            return await exchange(service.port)
+        finally:
+            await service.close()
+
+    return asyncio.run(run())
+
+
+def test_size_matches_the_scalar_calculation():
+    status, result = _with_service(lambda port: _request(port, "POST", "/v1/size", TRADE))
+    expected = calculate_trade_metrics(10_000, 1, 100, "Long", 120, 2, 95, 0)
+
+    assert status == 200
+    assert result["status"] == STATUS_OK
+    assert result["position_size"] == expected.position_size
+    assert result["capital_required"] == expected.capital_required
+    assert result["notices"] == []
+
+
+def test_concurrent_requests_share_a_batch_and_keep_their_order():
+    trades = [{**TRADE, "entry_price": 100 + i, "target_price": 130 + i} for i in range(20)]
+
+    async def exchange(port):
+        responses = await asyncio.gather(*(_request(port, "POST", "/v1/size", t) for t in trades))
+        stats = (await _request(port, "GET", "/v1/stats"))[1]
+        return responses, stats
+
+    responses, stats = _with_service(exchange, batch_window=0.05)
+    for trade, (status, result) in zip(trades, responses):
+        expected = calculate_trade_metrics(10_000, 1, trade["entry_price"], "Long", trade["target_price"], 2, 95, 0)
+        assert status == 200 and result["position_size"] == expected.position_size
+    assert stats["trades"] == 20
+    assert stats["batches"] < 20
+
+
+def test_stop_endpoint_fills_a_missing_stop():
+    trade = {k: v for k, v in TRADE.items() if k not in ("stop_loss_price", "target_price")}
+    status, results = _with_service(lambda port: _request(port, "POST", "/v1/stop", [trade]))
+
+    assert status == 200
+    assert set(results[0]) == set(STOP_FIELDS)
+    assert results[0]["stop_loss_price"] == results[0]["suggested_stop_loss"] < 100
+
+
+@pytest.mark.parametrize("method, path, payload, expected", [
+    ("POST", "/v1/size", {**TRADE, "bogus": 1}, 400),
+    ("POST", "/v1/size", [], 400),
+    ("GET", "/v1/size", None, 405),
+    ("GET", "/v2/size", None, 404),
+])
+def test_errors_are_json(method, path, payload, expected):
+    status, body = _with_service(lambda port: _request(port, method, path, payload))
+    assert status == expected
+    assert "error" in body
+
+
+def test_invalid_rows_report_a_status_instead_of_failing():
+    status, result = _with_service(lambda port: _request(port, "POST", "/v1/size", {**TRADE, "stop_loss_price": 105}))
+    assert status == 200
+    assert result["status"] != STATUS_OK
+    assert result["position_size"] is None
+
+
+@pytest.mark.parametrize("trade", [
+    {**TRADE, "entry_price": "100"},
+    {**TRADE, "entry_price": True},
+    {**TRADE, "use_atr": "yes"},
+    {**TRADE, "symbol": 42},
+    {k: v for k, v in TRADE.items() if k != "direction"},
+    [TRADE],
+])
+def test_validate_trade_rejects_bad_fields(trade):
+    with pytest.raises(RequestError):
+        validate_trade(trade)
+
+
+def test_batcher_rejects_beyond_max_pending():
+    async def run():
+        batcher = MicroBatcher(max_pending=3)
+        with pytest.raises(ServiceOverloaded):
+            await batcher.submit([validate_trade(TRADE)] * 4)
+        return batcher.stats["rejected"]
+
+    assert asyncio.run(run()) == 1
+
+
+def test_symbols_are_sized_on_the_instrument_and_in_the_account_currency(tmp_path):
+    (tmp_path / "instruments.csv").write_text(
+        "symbol,lot_step,tick_size,min_notional,multiplier\nBTCEUR,0.01,0.5,5000,1\n"
+    )
+    (tmp_path / "fx.csv").write_text("base,quote,rate\nEUR,USD,1.1\n")
+    instruments = InstrumentRegistry(tmp_path / "instruments.csv", check_interval=0)
+    fx_rates = FxRates(tmp_path / "fx.csv")
+    trade = {**TRADE, "symbol": "BTCEUR", "account_currency": "USD", "stop_loss_price": 95.2}
+
+    sized, unknown, no_rate = evaluate_trades(
+        [trade, {**TRADE, "symbol": "XYZ"}, {**TRADE, "account_currency": "JPY"}], instruments, fx_rates
+    )
+    expected = calculate_trade_metrics(10_000, 1, 100, "Long", 120, 2, 95.0, 0, 0.01, 1.1)
+
+    assert sized["stop_loss_price"] == 95.0
+    assert sized["fx_rate"] == 1.1
+    assert sized["position_size"] == expected.position_size
+    assert sized["contracts"] == expected.position_size
+    assert sized["below_min_notional"] is True
+    assert sized["notices"][0] == NOTICE_BELOW_MIN_NOTIONAL
+    assert unknown["contracts"] is None and unknown["below_min_notional"] is None
+    assert unknown["position_size"] == calculate_trade_metrics(10_000, 1, 100, "Long", 120, 2, 95, 0).position_size
+    assert no_rate["status"] == STATUS_INVALID_FX_RATE
+
+
+def test_without_fx_rates_only_matching_currencies_are_sized():
+    same, other = evaluate_trades([{**TRADE, "account_currency": "usd"}, {**TRADE, "account_currency": "EUR"}])
+
+    assert same["status"] == STATUS_OK and same["fx_rate"] == 1.0
+    assert other["status"] == STATUS_INVALID_FX_RATE
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from risk_core import STATUS_OK, calculate_trade_metrics
+from take_profit import STATUS_INVALID_LADDER, evaluate_ladder, evaluate_ladders_batch, parse_ladder_column
+
+METRICS = calculate_trade_metrics(10_000, 1, 100, "Long", 130, 1, 95, 0)  # 20 units, 100 at risk
+
+
+def test_legs_fill_nearest_first_and_add_up_to_the_position():
+    result = evaluate_ladder(METRICS, 100, "Long", [130, 110, 120], [0.2, 0.5, 0.3])
+
+    assert result.status == STATUS_OK
+    np.testing.assert_array_equal(result.leg_targets, [110, 120, 130])
+    np.testing.assert_array_equal(result.leg_sizes, [10, 6, 4])
+    np.testing.assert_array_equal(result.leg_pnl, [100, 120, 120])
+    assert result.blended_reward == 340
+    assert result.blended_reward_to_risk == 3.4
+    assert result.average_exit == pytest.approx(117)
+
+
+def test_unclosed_fraction_exits_at_the_last_target():
+    result = evaluate_ladder(METRICS, 100, "Long", [110, 120], [0.25, 0.25])
+    np.testing.assert_array_equal(result.leg_sizes, [5, 15])
+
+
+def test_stopped_after_each_leg():
+    plain = evaluate_ladder(METRICS, 100, "Long", [110, 120], [0.5, 0.5])
+    breakeven = evaluate_ladder(METRICS, 100, "Long", [110, 120], [0.5, 0.5], breakeven_after_first=True)
+
+    np.testing.assert_array_equal(plain.stopped_after_pnl, [-100, 50, 300])
+    np.testing.assert_array_equal(breakeven.stopped_after_pnl, [-100, 100, 300])
+
+
+def test_short_ladder():
+    metrics = calculate_trade_metrics(10_000, 1, 100, "Short", 80, 1, 105, 0)
+    result = evaluate_ladder(metrics, 100, "Short", [90, 80], [0.5, 0.5])
+    assert result.blended_reward == 300
+
+
+@pytest.mark.parametrize("targets, fractions", [
+    ([90, 120], [0.5, 0.5]),  # Target behind entry
+    ([110, 120], [0.7, 0.7]),  # Closes more than the position
+    ([110, 120], [0.5, 0.0]),
+])
+def test_invalid_ladders(targets, fractions):
+    result = evaluate_ladder(METRICS, 100, "Long", targets, fractions)
+    assert result.status == STATUS_INVALID_LADDER
+    assert np.isnan(result.blended_reward)
+
+
+def test_lot_step_floors_legs_and_the_last_takes_the_rest():
+    metrics = calculate_trade_metrics(10_000, 1, 100, "Long", 130, 1, 97, 0, size_step=1)  # 33 units
+    result = evaluate_ladder(metrics, 100, "Long", [110, 120, 130], [1 / 3, 1 / 3, 1 / 3], size_step=1)
+    np.testing.assert_array_equal(result.leg_sizes, [11, 11, 11])
+
+
+def test_batch_rows_are_independent():
+    targets = parse_ladder_column(["110;120", "90", "110;120;130"])
+    fractions = parse_ladder_column(["50;50", "100", ""], width=3) / 100
+    fractions[2] = 1 / 3
+    result = evaluate_ladders_batch(100, ["Long", "Short", "Long"], 20, [95, 105, 95], 100, targets, fractions)
+
+    assert targets.shape == (3, 3) and np.isnan(targets[1, 1:]).all()
+    assert list(result["status"]) == [STATUS_OK] * 3
+    assert result["blended_reward"][1] == 200
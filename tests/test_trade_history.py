@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from trade_history import TradeHistory
+
+
+def _row(i, symbol="BTCUSDT", direction="Long"):
+    return {
+        "symbol": symbol, "direction": direction, "liquid_capital": 10_000.0, "risk_percent": 1.0,
+        "entry_price": 100.0 + i, "stop_loss_price": 95.0, "use_atr": i % 2, "position_size": 20.0,
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = TradeHistory(tmp_path / "history.sqlite3", flush_interval=0.01)
+    yield history
+    history.close()
+
+
+def test_pages_walk_backwards_without_gaps(history):
+    for i in range(23):
+        history.record(_row(i), created_at=1_000 + i)
+    history.flush(5)
+
+    seen, cursor = [], None
+    while True:
+        page = history.page(before_id=cursor, limit=10)
+        seen.extend(row["entry_price"] for row in page.rows)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == [100.0 + i for i in reversed(range(23))]
+    assert history.stats["written"] == 23
+
+
+def test_filters(history):
+    for i in range(10):
+        history.record(_row(i, symbol="ETHUSDT" if i % 3 else "BTCUSDT", direction="Short" if i % 2 else "Long"),
+                       created_at=1_000 + i)
+    history.flush(5)
+
+    assert [r["entry_price"] for r in history.page(symbol="BTCUSDT").rows] == [109, 106, 103, 100]
+    assert [r["entry_price"] for r in history.page(symbol="BTCUSDT", direction="Long").rows] == [106, 100]
+    assert [r["created_at"] for r in history.page(since=1_007, until=1_008).rows] == [1_008, 1_007]
+    assert history.symbols() == ["BTCUSDT", "ETHUSDT"]
+
+
+def test_defaults_and_currency_columns(history):
+    history.record({"direction": "Long", "use_atr": True, "fx_rate": 0.5, "account_currency": "EUR"})
+    history.flush(5)
+    row = history.page().rows[0]
+
+    assert (row["symbol"], row["use_atr"], row["fx_rate"]) == ("", 1, 0.5)
+    assert (row["account_currency"], row["quote_currency"]) == ("EUR", "USD")
+
+
+def test_old_databases_gain_the_currency_columns(tmp_path):
+    path = tmp_path / "old.sqlite3"
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE trades (id INTEGER PRIMARY KEY, created_at REAL NOT NULL, "
+                       "symbol TEXT NOT NULL DEFAULT '', direction TEXT NOT NULL)")
+    connection.execute("INSERT INTO trades (created_at, direction) VALUES (1, 'Long')")
+    connection.commit()
+    connection.close()
+
+    TradeHistory(path).close()
+    columns = {row[1] for row in sqlite3.connect(path).execute("PRAGMA table_info(trades)")}
+    assert {"account_currency", "quote_currency", "fx_rate"} <= columns
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    history = TradeHistory(tmp_path / "h.sqlite3", queue_size=1, flush_interval=10)
+    try:
+        for i in range(50):
+            history.record(_row(i))
+        assert history.stats["dropped"] > 0
+        assert history.stats["recorded"] + history.stats["dropped"] == 50
+    finally:
+        history.close()
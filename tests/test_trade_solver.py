@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from instruments import Instrument
+from liquidation import MARGIN_TIERS_DIR, load_margin_tiers, stop_past_liquidation
+from risk_core import calculate_trade_metrics, trade_notices
+from trade_solver import OBJECTIVES, feasible_region, solve_trade
+
+TIERS = load_margin_tiers(MARGIN_TIERS_DIR / "example_perps.json")
+
+
+def _cases(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        entry = float(np.round(rng.uniform(1, 50_000), 2))
+        direction = str(rng.choice(["Long", "Short"]))
+        move = entry * rng.uniform(0.005, 0.3) * (1 if direction == "Long" else -1)
+        yield (
+            float(rng.uniform(500, 500_000)),  # liquid capital
+            float(rng.uniform(0.1, 5)),  # risk %
+            entry,
+            direction,
+            round(entry + move, 2),  # target
+            float(rng.choice([0.0, 0.001, 0.005])),  # slippage fraction
+        )
+
+
+@pytest.mark.parametrize("objective", list(OBJECTIVES))
+def test_every_solution_triggers_no_notices(objective):
+    solved = 0
+    for liquid, risk, entry, direction, target, slippage in _cases(40):
+        region, solution = solve_trade(liquid, risk, entry, direction, target, slippage, objective, resolution=40)
+        if solution is None:
+            continue
+        solved += 1
+        assert region.feasible
+        metrics = calculate_trade_metrics(
+            liquid, risk, entry, direction, target, solution.leverage, solution.stop_loss_price, slippage
+        )
+        assert metrics == pytest.approx(solution.metrics)
+        assert trade_notices(
+            liquid, solution.leverage, entry, metrics.effective_stop_loss,
+            metrics.capital_required, metrics.reward_to_risk,
+        ) == []
+    assert solved > 20
+
+
+def test_solutions_respect_the_instrument():
+    instrument = Instrument("X", lot_step=0.01, tick_size=0.5, min_notional=100, multiplier=1)
+    for liquid, risk, entry, direction, target, slippage in _cases(30, seed=1):
+        _, solution = solve_trade(
+            liquid, risk, entry, direction, target, slippage, resolution=40, instrument=instrument
+        )
+        if solution is None:
+            continue
+        assert solution.stop_loss_price == instrument.round_price(solution.stop_loss_price)
+        size = solution.metrics.position_size
+        assert size == instrument.round_size(size)
+        assert not instrument.below_min_notional(size, entry)
+
+
+def test_solutions_respect_margin_tiers():
+    for liquid, risk, entry, direction, target, slippage in _cases(30, seed=2):
+        _, solution = solve_trade(
+            liquid, risk, entry, direction, target, slippage, "least_capital", resolution=40, margin_tiers=TIERS
+        )
+        if solution is None:
+            continue
+        metrics = solution.metrics
+        liquidation = TIERS.liquidation_price(entry, direction, metrics.position_size, metrics.capital_required)
+        assert not stop_past_liquidation(direction, metrics.effective_stop_loss, liquidation)
+        assert solution.leverage <= TIERS.tier_for(metrics.position_size * entry).max_leverage
+
+
+def test_unreachable_targets_are_infeasible():
+    region, solution = solve_trade(10_000, 1, 100, "Long", 100, 0)
+    assert not region.feasible and solution is None
+    assert region.reason
+
+    # 5% risk with a target 0.2% away cannot keep capital under the cap below 10x
+    assert not feasible_region(10_000, 5, 100, 100.2).feasible
+
+
+def test_unknown_objective():
+    with pytest.raises(ValueError):
+        solve_trade(10_000, 1, 100, "Long", 120, 0, objective="cheapest")
@@ -0,0 +1,260 @@
+"""
+Persistent history of sized trades in a local SQLite database.
+
+``TradeHistory.record`` only puts the row on an in-memory queue, so the
+caller (the Streamlit rerun) never waits on disk. A single writer thread
+drains the queue and inserts whatever has accumulated in one transaction
+(up to ``batch_size`` rows, or after ``flush_interval`` seconds).
+
+Reads use keyset pagination: a page is "the ``limit`` newest rows with an
+id below the cursor", answered from the (filter column, id) indexes without
+counting or skipping rows, so page N costs the same as page 1 on a table of
+millions.
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 2_000
+DEFAULT_FLUSH_INTERVAL = 0.5  # Seconds a recorded row may wait before being written
+DEFAULT_QUEUE_SIZE = 100_000  # Rows held in memory before new ones are dropped
+DEFAULT_PAGE_SIZE = 50
+
+# Inputs of get_capital_inputs/get_trade_inputs and outputs of calculate_trade_metrics
+INPUT_COLUMNS = (
+    "symbol",
+    "direction",
+    "total_capital",
+    "liquid_capital",
+    "risk_percent",
+    "leverage",
+    "entry_price",
+    "target_price",
+    "stop_loss_price",
+    "slippage_pct",
+    "use_atr",
+    "atr_value",
+    "atr_multiplier",
+)
+OUTPUT_COLUMNS = (
+    "risk_amount",
+    "position_size",
+    "effective_stop_loss",
+    "capital_required",
+    "expected_reward",
+    "reward_to_risk",
+)
+# Money amounts are in the account currency and prices in the quote currency;
+# fx_rate is account units per quote unit (see fx_rates.py)
+CURRENCY_COLUMNS = ("account_currency", "quote_currency", "fx_rate")
+HISTORY_COLUMNS = ("id", "created_at") + INPUT_COLUMNS + OUTPUT_COLUMNS + CURRENCY_COLUMNS
+
+# Added after the first release; ALTERed into older databases on open
+_ADDED_COLUMNS = {
+    "account_currency": "TEXT NOT NULL DEFAULT 'USD'",
+    "quote_currency": "TEXT NOT NULL DEFAULT 'USD'",
+    "fx_rate": "REAL NOT NULL DEFAULT 1.0",
+}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,  -- Unix seconds (UTC)
+    symbol TEXT NOT NULL DEFAULT '',
+    direction TEXT NOT NULL,
+    {", ".join(f"{c} REAL" for c in INPUT_COLUMNS[2:] if c != "use_atr")},
+    use_atr INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"{c} REAL" for c in OUTPUT_COLUMNS)},
+    {", ".join(f"{c} {definition}" for c, definition in _ADDED_COLUMNS.items())}
+);
+CREATE INDEX IF NOT EXISTS trades_symbol_id ON trades (symbol, id);
+CREATE INDEX IF NOT EXISTS trades_direction_id ON trades (direction, id);
+CREATE INDEX IF NOT EXISTS trades_created_at ON trades (created_at);
+"""
+_INSERT = (
+    f"INSERT INTO trades (created_at, {', '.join(INPUT_COLUMNS + OUTPUT_COLUMNS + CURRENCY_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (1 + len(INPUT_COLUMNS) + len(OUTPUT_COLUMNS) + len(CURRENCY_COLUMNS)))})"
+)
+_STOP = object()
+
+
+class HistoryPage(NamedTuple):
+    rows: List[Dict]  # Newest first
+    next_cursor: Optional[int]  # Pass as ``before_id`` for the next (older) page; None at the end
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")  # Readers never wait for the writer
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class TradeHistory:
+    """SQLite-backed trade history with a background batch writer; safe to share between threads."""
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        connection = _connect(self.path)
+        try:
+            connection.executescript(_SCHEMA)
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(trades)")}
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE trades ADD COLUMN {column} {definition}")
+            connection.commit()
+        finally:
+            connection.close()
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self.stats = {"recorded": 0, "written": 0, "batches": 0, "dropped": 0}
+        self._writer = threading.Thread(target=self._write_loop, name="trade-history-writer", daemon=True)
+        self._writer.start()
+
+    # ─── Writing ────────────────────────────────────────────────────────────────
+    def record(self, row: Dict, created_at: Optional[float] = None):
+        """Queue one sized trade for writing; never blocks (rows are dropped if the queue is full)."""
+        values = (
+            created_at if created_at is not None else time.time(),
+            row.get("symbol") or "",
+            row["direction"],
+            *(row.get(c) for c in INPUT_COLUMNS[2:10]),
+            int(bool(row.get("use_atr"))),
+            *(row.get(c) for c in INPUT_COLUMNS[11:] + OUTPUT_COLUMNS),
+            row.get("account_currency") or "USD",
+            row.get("quote_currency") or "USD",
+            row.get("fx_rate", 1.0),
+        )
+        try:
+            self._queue.put_nowait(values)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return
+        self.stats["recorded"] += 1
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every row recorded so far has been written."""
+        done = threading.Event()
+        self._queue.put(done, timeout=timeout)
+        done.wait(timeout)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+        try:
+            while True:
+                batch, markers = [], []
+                item = self._queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        self._write(connection, batch)
+                        return
+                    if isinstance(item, threading.Event):
+                        markers.append(item)
+                        break  # A flush request writes what is there right away
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                self._write(connection, batch)
+                for marker in markers:
+                    marker.set()
+        finally:
+            connection.close()
+
+    def _write(self, connection: sqlite3.Connection, batch: List[Tuple]):
+        if not batch:
+            return
+        try:
+            with connection:
+                connection.executemany(_INSERT, batch)
+        except sqlite3.Error:
+            logger.exception("Could not write %d trades to %s", len(batch), self.path)
+            self.stats["dropped"] += len(batch)
+            return
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+
+    # ─── Reading ────────────────────────────────────────────────────────────────
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = _connect(self.path)
+            connection.row_factory = sqlite3.Row
+        return connection
+
+    def page(
+        self,
+        before_id: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        symbol: Optional[str] = None,
+        direction: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> HistoryPage:
+        """
+        The ``limit`` newest trades with ``id < before_id`` matching every
+        given filter (``since``/``until`` are Unix seconds, inclusive).
+        """
+        clauses, params = [], []
+        for column, value in (("symbol", symbol), ("direction", direction)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at <= ?")
+            params.append(until)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # One extra row tells whether an older page exists without a COUNT(*)
+        rows = self._reader().execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM trades {where} ORDER BY id DESC LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        rows = [dict(row) for row in rows]
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return HistoryPage(rows[:limit], next_cursor)
+
+    def symbols(self, limit: int = 1_000) -> List[str]:
+        """
+        Distinct symbols in order. Each step is one seek on the symbol index
+        (a skip scan), so the cost grows with the number of symbols, not rows.
+        """
+        connection = self._reader()
+        symbols: List[str] = []
+        last = ""
+        while len(symbols) < limit:
+            (last,) = connection.execute("SELECT MIN(symbol) FROM trades WHERE symbol > ?", (last,)).fetchone()
+            if last is None:
+                break
+            symbols.append(last)
+        return symbols
@@ -0,0 +1,224 @@
+"""
+Solve for a stop and leverage that trigger none of the Risk Notices.
+
+With capital, risk %, entry, target, direction and slippage fixed, the risk
+amount R is fixed and every rule is a bound on the effective stop distance
+``d = |entry - effective stop|`` or on leverage ``L``:
+
+- reward-to-risk ≥ ``MIN_REWARD_RISK_RATIO``  →  d ≤ |target - entry| / MIN_RR
+- stop no wider than ``WIDE_STOP_PERCENT``     →  d ≤ entry × WIDE% / 100
+- capital ≤ ``HIGH_CAPITAL_USAGE`` × liquid    →  d ≥ R × entry / (USAGE × liquid × L)
+- leverage below ``MAX_LEVERAGE_WARNING``
+
+so the feasible region is known in closed form. Because position size is
+rounded and stops/leverage are entered in 0.001 steps, the final choice is
+made by evaluating a grid over that region with the vectorized batch math
+and keeping only candidates whose exact metrics pass every check. For a
+known instrument the stops are snapped to its tick, sizes are floored to
+whole lots and orders below its minimum notional are left out. With an
+exchange's margin tiers, candidates above the tier's maximum leverage or
+liquidated before their stop fills are left out too.
+"""
+from typing import TYPE_CHECKING, Dict, Literal, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from risk_batch import calculate_trade_metrics_batch, round_half_even, round_to_step_batch, trade_notices_batch
+from risk_core import (
+    HIGH_CAPITAL_USAGE,
+    MAX_LEVERAGE_WARNING,
+    MIN_LEVERAGE,
+    MIN_REWARD_RISK_RATIO,
+    MIN_STOP_PRICE,
+    STATUS_OK,
+    WIDE_STOP_PERCENT,
+    Direction,
+    TradeMetrics,
+)
+
+if TYPE_CHECKING:
+    from instruments import Instrument
+    from liquidation import MarginTiers
+
+PRICE_STEP = 0.001  # Input precision of the stop and leverage fields
+DEFAULT_RESOLUTION = 200
+
+Objective = Literal["safest", "max_reward_to_risk", "least_capital"]
+OBJECTIVES: Dict[str, str] = {
+    "safest": "Widest stop at the lowest leverage",
+    "max_reward_to_risk": "Tightest stop (highest reward-to-risk)",
+    "least_capital": "Least capital tied up",
+}
+
+
+class FeasibleRegion(NamedTuple):
+    """Closed-form bounds; stop distances are effective (after slippage), in $."""
+
+    feasible: bool
+    reason: str  # Why nothing works; empty when feasible
+    risk_amount: float
+    max_stop_distance: float  # Same at every leverage
+    min_leverage: float  # Lowest leverage at which some stop passes
+    max_leverage: float
+
+    def min_stop_distance(self, leverage, entry_price: float, liquid_capital: float):
+        """Tightest stop distance that keeps capital within the usage cap at ``leverage``."""
+        return self.risk_amount * entry_price / (HIGH_CAPITAL_USAGE * liquid_capital * np.asarray(leverage))
+
+
+class Solution(NamedTuple):
+    stop_loss_price: float
+    leverage: float
+    metrics: TradeMetrics
+
+
+def stop_for_distance(entry_price: float, direction: Direction, distance, slippage_pct: float):
+    """Stop price whose effective (slipped) stop sits ``distance`` from entry."""
+    if direction == "Long":
+        return (entry_price - np.asarray(distance)) / (1 - slippage_pct)
+    return (entry_price + np.asarray(distance)) / (1 + slippage_pct)
+
+
+def feasible_region(
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    target_price: float,
+    max_leverage: float = MAX_LEVERAGE_WARNING - PRICE_STEP,
+) -> FeasibleRegion:
+    """Closed-form bounds of the no-warning region (``slippage_pct`` is a fraction)."""
+    risk_amount = liquid_capital * (risk_percent / 100)
+    max_distance = min(
+        abs(target_price - entry_price) / MIN_REWARD_RISK_RATIO,
+        entry_price * WIDE_STOP_PERCENT / 100,
+    )
+    max_leverage = min(max_leverage, MAX_LEVERAGE_WARNING - PRICE_STEP)
+
+    def infeasible(reason: str) -> FeasibleRegion:
+        return FeasibleRegion(False, reason, risk_amount, max_distance, np.nan, max_leverage)
+
+    if entry_price <= 0 or liquid_capital <= 0 or risk_amount <= 0:
+        return infeasible("Entry price, liquid capital and risk must all be positive.")
+    if max_distance <= 0:
+        return infeasible("Target equals entry, so no stop reaches the minimum reward-to-risk.")
+    if max_leverage < MIN_LEVERAGE:
+        return infeasible(f"Maximum leverage is below {MIN_LEVERAGE:g}x.")
+
+    # Lowest leverage at which the widest allowed stop keeps capital under the cap
+    min_leverage = max(
+        MIN_LEVERAGE, risk_amount * entry_price / (HIGH_CAPITAL_USAGE * liquid_capital * max_distance)
+    )
+    if min_leverage > max_leverage:
+        return infeasible(
+            f"Even at {max_leverage:g}x the widest allowed stop needs over "
+            f"{HIGH_CAPITAL_USAGE:.0%} of liquid capital; lower the risk % or raise the target."
+        )
+    return FeasibleRegion(True, "", risk_amount, max_distance, min_leverage, max_leverage)
+
+
+def solve_trade(
+    liquid_capital: float,
+    risk_percent: float,
+    entry_price: float,
+    direction: Direction,
+    target_price: float,
+    slippage_pct: float,
+    objective: Objective = "safest",
+    max_leverage: float = MAX_LEVERAGE_WARNING - PRICE_STEP,
+    resolution: int = DEFAULT_RESOLUTION,
+    instrument: Optional["Instrument"] = None,
+    margin_tiers: Optional["MarginTiers"] = None,
+) -> Tuple[FeasibleRegion, Optional[Solution]]:
+    """
+    Feasible region plus the best passing stop/leverage under ``objective``.
+
+    ``slippage_pct`` is a fraction, as in ``calculate_trade_metrics``. The
+    solution is ``None`` when the region is empty or no rounded candidate
+    passes. With ``instrument``, stops are on its tick and sizes in whole lots;
+    with ``margin_tiers``, the stop fills before liquidation and leverage is
+    within the notional's tier.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {', '.join(OBJECTIVES)}.")
+    if margin_tiers is not None:
+        max_leverage = min(max_leverage, max(t.max_leverage for t in margin_tiers.tiers))
+    region = feasible_region(liquid_capital, risk_percent, entry_price, target_price, max_leverage)
+    if not region.feasible:
+        return region, None
+
+    # Candidate grid over the region, snapped to the input precision. The
+    # closed-form optimum is a corner, so the corners are always included.
+    leverage = np.unique(np.round(np.linspace(region.min_leverage, region.max_leverage, resolution), 3))
+    leverage = np.unique(np.concatenate([leverage, [np.ceil(region.min_leverage * 1000) / 1000]]))
+    leverage = leverage[(leverage >= region.min_leverage - PRICE_STEP) & (leverage <= region.max_leverage)]
+    lowest_distance = float(region.min_stop_distance(leverage.max(), entry_price, liquid_capital))
+    distance = np.linspace(lowest_distance, region.max_stop_distance, resolution)
+    distance_grid, leverage_grid = np.meshgrid(distance, leverage)
+    stops = stop_for_distance(entry_price, direction, distance_grid.ravel(), slippage_pct)
+    if instrument is not None:
+        tick = instrument.tick_size
+        stops = round_to_step_batch(stops, tick)
+    else:
+        tick = PRICE_STEP
+        stops = round_half_even(stops, 3)
+    # Nudge each stop one tick in both directions so rounding can't hide the edge
+    stops = np.concatenate([stops, stops - tick, stops + tick])
+    if instrument is not None:
+        stops = round_to_step_batch(stops, tick)  # Exact multiples again after the float nudge
+    leverage_flat = np.tile(leverage_grid.ravel(), 3)
+    keep = stops >= MIN_STOP_PRICE
+    stops, leverage_flat = stops[keep], leverage_flat[keep]
+
+    metrics = calculate_trade_metrics_batch(
+        liquid_capital, risk_percent, entry_price, direction, target_price,
+        leverage_flat, stops, slippage_pct,
+        instrument.size_step if instrument is not None else None,
+    )
+    past_liquidation = None
+    within_tier = True
+    if margin_tiers is not None:
+        from liquidation import stop_past_liquidation
+
+        size = metrics["position_size"].to_numpy()
+        liquidation_price = margin_tiers.liquidation_price_batch(
+            entry_price, direction, size, metrics["capital_required"].to_numpy()
+        )
+        past_liquidation = stop_past_liquidation(
+            direction, metrics["effective_stop_loss"].to_numpy(), liquidation_price
+        )
+        with np.errstate(invalid="ignore"):
+            within_tier = leverage_flat <= margin_tiers.max_leverage_batch(size * entry_price)
+    notices = trade_notices_batch(
+        liquid_capital, leverage_flat, entry_price,
+        metrics["effective_stop_loss"].to_numpy(), metrics["capital_required"].to_numpy(),
+        metrics["reward_to_risk"].to_numpy(), past_liquidation,
+    )
+    passes = (metrics["status"].to_numpy() == STATUS_OK) & within_tier
+    for flags in notices.values():
+        passes &= ~flags
+    if instrument is not None:
+        # The exchange rejects orders under one lot or below the minimum notional
+        size = metrics["position_size"].to_numpy()
+        passes &= (size > 0) & (size * entry_price >= instrument.min_notional)
+    if not passes.any():
+        return region, None
+
+    stop_distance = np.abs(entry_price - metrics["effective_stop_loss"].to_numpy())
+    capital = metrics["capital_required"].to_numpy()
+    # np.lexsort sorts by the last key first; the best candidate ends up first
+    if objective == "safest":
+        order = np.lexsort((leverage_flat, -stop_distance, ~passes))
+    elif objective == "max_reward_to_risk":
+        order = np.lexsort((leverage_flat, -metrics["reward_to_risk"].to_numpy(), ~passes))
+    else:
+        order = np.lexsort((leverage_flat, capital, ~passes))
+    best = order[0]
+    row = metrics.iloc[best]
+    stop_loss_price = float(stops[best])
+    stop_loss_price = instrument.round_price(stop_loss_price) if instrument is not None else round(stop_loss_price, 3)
+    solution = Solution(
+        stop_loss_price=stop_loss_price,
+        leverage=round(float(leverage_flat[best]), 3),
+        metrics=TradeMetrics(*(float(row[c]) for c in TradeMetrics._fields)),
+    )
+    return region, solution